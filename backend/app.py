@@ -5,6 +5,7 @@ Main Flask Application - Email Automation System with AI and Gmail OAuth
 from flask import Flask, request, jsonify, send_file, session, redirect
 from flask_cors import CORS
 from werkzeug.utils import secure_filename
+import math
 import os
 import sys
 import threading
@@ -14,13 +15,27 @@ import csv
 # Add backend to path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from config import Config
+from config import Config, DEFAULT_SECRET_KEY
 from services.file_service import FileService
 from services.gmail_service import get_gmail_service
-from services.gemini_service import get_gemini_service
 from services.tracking_service import get_tracking_service
+from services.campaign_service import get_campaign_service, RESUMABLE_STATUSES, ACTIVE_STATUSES, SCHEDULED
+from services.campaign_scheduler import get_campaign_scheduler
+from services.send_window import SendWindow
+from services.campaign_runner import CampaignRunner
+from services.campaign_simulator import CampaignSimulator, SEND_LATENCY, AI_LATENCY
 from routes.ai_routes import ai_bp
-from routes.auth_routes import auth_bp
+from services.credential_manager import get_credential_manager
+from routes.auth_routes import (auth_bp, remember_gmail_account, get_session_accounts, get_live_credentials,
+                                get_primary_account_id, credentials_to_dict)
+from routes.suppression_routes import suppression_bp
+from services import warm_up
+from services.gemini_governor import get_gemini_governor
+from services.circuit_breaker import get_gemini_breaker
+from services.template_service import compile_template, build_context, TemplateError
+from services.upload_store import get_upload_store
+from services.upload_retention import get_upload_retention
+from services.tracking_archive import get_tracking_archiver
 
 # Initialize Flask app
 app = Flask(__name__)
@@ -37,9 +52,10 @@ CORS(app,
 # Register blueprints
 app.register_blueprint(ai_bp, url_prefix='/api/ai')
 app.register_blueprint(auth_bp, url_prefix='/api/auth')
+app.register_blueprint(suppression_bp, url_prefix='/api/suppressions')
 
-# Global variables for progress tracking
-email_progress = {
+# Progress reported when no campaign has been started yet
+IDLE_PROGRESS = {
     'status': 'idle',
     'current': 0,
     'total': 0,
@@ -49,9 +65,70 @@ email_progress = {
     'cancelled': False
 }
 
-# Email sending thread reference
+# In-process runner identity and thread reference (CAMPAIGN_RUNNER=thread)
+WORKER_ID = f'web-{os.getpid()}'
 email_thread = None
 
+_background_started = False
+_background_lock = threading.Lock()
+
+def check_secret_key():
+    """
+    Refuse to serve stored Gmail tokens behind the public default secret key
+    
+    The session cookie names the accounts a browser may send from; anyone who
+    knows the signing key can forge one naming any stored mailbox.
+    
+    Raises:
+        RuntimeError: If FLASK_SECRET_KEY is unset and tokens are stored
+    """
+    if Config.SECRET_KEY != DEFAULT_SECRET_KEY:
+        return
+    if get_credential_manager().has_accounts() or get_campaign_service().has_stored_accounts():
+        raise RuntimeError(
+            "FLASK_SECRET_KEY is not set but Gmail tokens are stored in campaigns.db; "
+            "set it in .env (python -c \"import secrets; print(secrets.token_hex(32))\")"
+        )
+    print("⚠️ FLASK_SECRET_KEY is not set; using the development default")
+
+def init_background_services():
+    """
+    Start the web process's background jobs, once per serving process
+
+    Not run on import: the debug reloader imports this module in a watcher
+    process as well as in the process that serves requests, and PDF workers
+    import it as '__mp_main__'. `python app.py` calls this in the serving
+    process; under a WSGI server (gunicorn) the first request does.
+    """
+    global _background_started
+    with _background_lock:
+        if _background_started:
+            return
+        # Raises on every request until the key is set
+        check_secret_key()
+        _background_started = True
+
+    if Config.WARM_UP_SERVICES:
+        # Opt-in: load heavy dependencies off the request path
+        threading.Thread(target=warm_up, daemon=True).start()
+
+    if Config.CAMPAIGN_RUNNER == 'thread':
+        # Campaigns whose runner stopped heartbeating (e.g. died with a previous
+        # process); sibling WSGI processes' live campaigns are left alone
+        get_campaign_service().mark_interrupted(Config.CAMPAIGN_HEARTBEAT_TIMEOUT)
+        # Multi-day campaigns continue when their next send window or quota opens
+        get_campaign_scheduler().start(start_scheduled_campaign)
+
+    # Keep the upload folder under UPLOAD_QUOTA_MB
+    get_upload_retention(app.config['UPLOAD_FOLDER']).start()
+
+    # Move send history older than TRACKING_ARCHIVE_DAYS out of tracking.db
+    get_tracking_archiver().start()
+
+@app.before_request
+def ensure_background_services():
+    init_background_services()
+
 @app.route('/')
 def index():
     """API status endpoint"""
@@ -99,18 +176,12 @@ def oauth2callback():
         gmail_service = get_gmail_service()
         credentials = gmail_service.get_credentials_from_code(code, state)
         
-        # Store credentials in session
-        session['gmail_credentials'] = {
-            'token': credentials.token,
-            'refresh_token': credentials.refresh_token,
-            'token_uri': credentials.token_uri,
-            'client_id': credentials.client_id,
-            'client_secret': credentials.client_secret,
-            'scopes': list(credentials.scopes) if credentials.scopes else []
-        }
+        # Store credentials server-side and add the mailbox to the sender pool
+        account_id = remember_gmail_account(credentials_to_dict(credentials),
+                                            gmail_service.get_account_email(credentials))
         
-        print("✅ Gmail OAuth successful - credentials stored in session")
-        print(f"Gmail connected: {session.get('gmail_credentials') is not None}")
+        print("✅ Gmail OAuth successful")
+        print(f"Gmail connected: account {account_id}, {len(session.get('gmail_account_ids', []))} account(s) in pool")
         
         # Redirect to frontend with success
         return redirect('http://localhost:3000?auth=success')
@@ -154,7 +225,7 @@ def upload_file():
         - file: File to upload
     
     Returns:
-        JSON with file info
+        JSON with file info, including the content hash
     """
     try:
         if 'file' not in request.files:
@@ -164,23 +235,22 @@ def upload_file():
         if file.filename == '':
             return jsonify({'error': 'No file selected'}), 400
         
-        # Save file
-        file_service = FileService()
-        filepath = file_service.save_uploaded_file(file, app.config['UPLOAD_FOLDER'])
-        
-        if filepath:
-            file_info = file_service.get_file_info(filepath)
-            return jsonify({
-                'success': True,
-                'filename': file_info['filename'],
-                'path': filepath,
-                'size_mb': file_info['size_mb']
-            })
-        else:
+        if not FileService.allowed_file(file.filename):
             return jsonify({
                 'success': False,
                 'error': 'Invalid file type'
             }), 400
+        
+        # Streamed to disk while hashed; identical content is stored only once
+        stored = get_upload_store(app.config['UPLOAD_FOLDER']).save(file)
+        return jsonify({
+            'success': True,
+            'filename': stored['filename'],
+            'path': stored['path'],
+            'hash': stored['content_hash'],
+            'deduplicated': stored['deduplicated'],
+            'size_mb': round(stored['size'] / (1024 * 1024), 2)
+        })
             
     except Exception as e:
         print(f"Upload error: {e}")
@@ -189,6 +259,33 @@ def upload_file():
             'error': str(e)
         }), 500
 
+@app.route('/uploads/usage', methods=['GET'])
+def upload_usage():
+    """Upload folder size against the quota, and recent evictions"""
+    try:
+        limit = int(request.args.get('limit', 20))
+    except ValueError:
+        limit = 0
+    if limit < 1:
+        return jsonify({'success': False, 'error': 'limit must be a positive integer'}), 400
+    
+    try:
+        retention = get_upload_retention(app.config['UPLOAD_FOLDER'])
+        usage = retention.usage()
+        return jsonify({
+            'success': True,
+            'files': usage['files'],
+            'size_mb': round(usage['bytes'] / (1024 * 1024), 2),
+            'quota_mb': round(usage['quota_bytes'] / (1024 * 1024), 2),
+            'protected': len(get_campaign_service().referenced_files()),
+            'evictions': get_upload_store().get_evictions(limit)
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
 @app.route('/send_emails', methods=['POST'])
 def send_emails():
     """
@@ -201,17 +298,24 @@ def send_emails():
         - body (str): Email body
         - max_emails (int): Maximum emails to send
         - use_ai (bool): Whether to use AI for personalization
+        - ai_mode (str, optional): 'recipient' (one Gemini call per recipient, default)
+          or 'company' (one draft per company/domain, name filled in locally)
+        - send_window (dict, optional): Hours to send in, e.g. {"start": "09:00",
+          "end": "17:00", "days": "mon-fri", "timezone": "UTC"}; applied in the
+          recipient's time zone when the CSV has a timezone column
+    
+    Query:
+        - dry_run=1: Simulate the campaign instead (see dry_run_campaign)
     
     Returns:
-        JSON with campaign start status
+        JSON with campaign start status and campaign ID
     """
-    global email_progress, email_thread
-    
     try:
         data = request.json
+        dry_run = request.args.get('dry_run', '').lower() in ('1', 'true', 'yes')
         
         # Check Gmail authentication
-        if 'gmail_credentials' not in session:
+        if not get_primary_account_id() and not dry_run:
             return jsonify({
                 'success': False,
                 'error': 'Not authenticated',
@@ -225,6 +329,13 @@ def send_emails():
         body = data.get('body')
         max_emails = int(data.get('max_emails', 30))
         use_ai = data.get('use_ai', False)
+        ai_mode = data.get('ai_mode', 'recipient')
+        
+        if ai_mode not in ('recipient', 'company'):
+            return jsonify({
+                'success': False,
+                'error': "ai_mode must be 'recipient' or 'company'"
+            }), 400
         
         if not csv_file or not os.path.exists(csv_file):
             return jsonify({
@@ -232,28 +343,64 @@ def send_emails():
                 'error': 'CSV file not found'
             }), 400
         
-        # Reset progress
-        email_progress = {
-            'status': 'running',
-            'current': 0,
-            'total': 0,
-            'sent': 0,
-            'failed': 0,
-            'logs': [],
-            'cancelled': False
-        }
+        # Reject malformed placeholder templates before queueing
+        try:
+            compile_template(subject)
+            compile_template(body)
+        except TemplateError as e:
+            return jsonify({
+                'success': False,
+                'error': f'Invalid template: {e}'
+            }), 400
         
-        # Start email sending in background thread
-        email_thread = threading.Thread(
-            target=send_emails_worker,
-            args=(csv_file, resume_file, subject, body, max_emails, use_ai, session.get('gmail_credentials'))
-        )
-        email_thread.daemon = True
-        email_thread.start()
+        send_window = data.get('send_window')
+        try:
+            SendWindow.from_params(send_window)
+        except (ValueError, AttributeError) as e:
+            return jsonify({
+                'success': False,
+                'error': f'Invalid send window: {e}'
+            }), 400
+        
+        if dry_run:
+            return dry_run_campaign(data, {
+                'csv_file': csv_file,
+                'resume_file': resume_file,
+                'subject': subject,
+                'body': body,
+                'max_emails': max_emails,
+                'use_ai': use_ai,
+                'ai_mode': ai_mode,
+                'send_window': send_window
+            })
+        
+        campaign_service = get_campaign_service()
+        
+        # The in-process runner handles one campaign at a time
+        if app.config['CAMPAIGN_RUNNER'] == 'thread' and campaign_service.has_active_campaign():
+            return jsonify({
+                'success': False,
+                'error': 'A campaign is already running'
+            }), 409
+        
+        # Checkpoint the campaign before any work starts
+        campaign_id = campaign_service.create_campaign({
+            'csv_file': csv_file,
+            'resume_file': resume_file,
+            'subject': subject,
+            'body': body,
+            'max_emails': max_emails,
+            'use_ai': use_ai,
+            'ai_mode': ai_mode,
+            'send_window': send_window
+        }, accounts=get_session_accounts())
+        
+        start_campaign(campaign_id)
         
         return jsonify({
             'success': True,
-            'message': 'Email campaign started'
+            'message': 'Email campaign started',
+            'campaign_id': campaign_id
         })
         
     except Exception as e:
@@ -263,133 +410,243 @@ def send_emails():
             'error': str(e)
         }), 500
 
-def send_emails_worker(csv_file, resume_file, subject, body, max_emails, use_ai, credentials):
-    """Background worker for sending emails"""
-    global email_progress
+def dry_run_campaign(data, params):
+    """
+    Simulate a campaign on a virtual clock: nothing is sent or recorded
+    
+    Extra request JSON (all optional):
+        - ai_sample (bool): Generate the sample email with Gemini (2 real requests)
+        - send_latency (float): Seconds per Gmail send (default 1.0)
+        - ai_latency (float): Seconds per Gemini call (default 3.0)
+        - failure_rate (float): Share of sends that fail transiently (default 0)
+    
+    Returns:
+        JSON with send counts, projected duration, quota usage and a sample email
+    """
+    settings = {}
+    for key, default, upper in (('send_latency', SEND_LATENCY, None),
+                                ('ai_latency', AI_LATENCY, None),
+                                ('failure_rate', 0.0, 1.0)):
+        value = data.get(key, default)
+        try:
+            if isinstance(value, bool):
+                raise ValueError(value)
+            value = float(value)
+        except (TypeError, ValueError):
+            value = math.nan
+        # NaN fails both comparisons; infinite latencies would never finish
+        if not (0 <= value < math.inf and (upper is None or value <= upper)):
+            if upper is None:
+                error = f'{key} must be a non-negative number of seconds'
+            else:
+                error = f'{key} must be between 0 and {upper:g}'
+            return jsonify({'success': False, 'error': error}), 400
+        settings[key] = value
+    
+    simulator = CampaignSimulator(app.config, accounts=list(get_session_accounts()), **settings)
+    try:
+        report = simulator.simulate(params, ai_sample=bool(data.get('ai_sample', False)))
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    return jsonify(dict(report, success=True, dry_run=True))
+
+def start_campaign(campaign_id):
+    """
+    Hand a queued campaign to a runner.
+    
+    With CAMPAIGN_RUNNER=external the campaign stays queued for a separate
+    `worker.py` process; otherwise it runs in a background thread here.
+    """
+    global email_thread
+    
+    if app.config['CAMPAIGN_RUNNER'] != 'thread':
+        return
+    
+    campaign_service = get_campaign_service()
+    if campaign_service.claim_campaign(WORKER_ID, campaign_id) is None:
+        return
+    
+    runner = CampaignRunner(campaign_id, app.config, campaign_service, WORKER_ID)
+    email_thread = threading.Thread(target=runner.run)
+    email_thread.daemon = True
+    email_thread.start()
+
+def start_scheduled_campaign(campaign_id):
+    """Scheduler dispatch: run a due campaign unless another one is sending"""
+    if email_thread is not None and email_thread.is_alive():
+        return False
+    start_campaign(campaign_id)
+    return True
+
+@app.route('/preview_emails', methods=['POST'])
+def preview_emails():
+    """
+    Render the subject/body templates for the first recipients of a CSV
+    
+    Request JSON:
+        - csv_file (str): Path to CSV file with emails
+        - subject (str): Subject template
+        - body (str): Body template
+        - limit (int, optional): Number of recipients to render (default 10, max 500)
+    
+    Returns:
+        JSON with rendered emails and placeholders no column provides
+    """
+    try:
+        data = request.json
+        csv_file = data.get('csv_file')
+        limit = min(int(data.get('limit', 10)), 500)
+        
+        if not csv_file or not os.path.exists(csv_file):
+            return jsonify({
+                'success': False,
+                'error': 'CSV file not found'
+            }), 400
+        
+        try:
+            subject_template = compile_template(data.get('subject'))
+            body_template = compile_template(data.get('body'))
+        except TemplateError as e:
+            return jsonify({
+                'success': False,
+                'error': f'Invalid template: {e}'
+            }), 400
+        
+        recipients = FileService().extract_emails_from_csv(csv_file, limit)
+        
+        start = time.perf_counter()
+        previews = []
+        available = set()
+        for recipient in recipients:
+            context = build_context(recipient)
+            available.update(context)
+            previews.append({
+                'email': recipient['email'],
+                'subject': subject_template.render(context),
+                'body': body_template.render(context)
+            })
+        render_ms = (time.perf_counter() - start) * 1000
+        
+        return jsonify({
+            'success': True,
+            'emails': previews,
+            'count': len(previews),
+            'missing_fields': sorted((subject_template.fields | body_template.fields) - available),
+            'render_ms': round(render_ms, 3)
+        })
+        
+    except Exception as e:
+        print(f"Error previewing emails: {e}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/campaigns', methods=['GET'])
+def list_campaigns():
+    """List recent campaigns with their checkpointed status"""
+    return jsonify({
+        'success': True,
+        'campaigns': get_campaign_service().list_campaigns(),
+        'scheduled': get_campaign_scheduler().pending()
+    })
+
+@app.route('/campaigns/<campaign_id>', methods=['GET'])
+def get_campaign(campaign_id):
+    """Get a campaign's checkpoint: cursor, status and per-state recipient counts"""
+    campaign = get_campaign_service().get_campaign(campaign_id)
+    if campaign is None:
+        return jsonify({'success': False, 'error': 'Campaign not found'}), 404
+    return jsonify({'success': True, 'campaign': campaign})
+
+@app.route('/campaigns/<campaign_id>/resume', methods=['POST'])
+def resume_campaign(campaign_id):
+    """
+    Resume an interrupted, cancelled or failed campaign from its checkpoint
+    
+    Already processed recipients are not re-checked and the CSV is not re-read.
+    The campaign picks up the Gmail accounts connected in the current session.
     
+    Returns:
+        JSON with resume status
+    """
     try:
-        # Extract emails from CSV
-        file_service = FileService()
-        recipients = file_service.extract_emails_from_csv(csv_file, max_emails)
+        if not get_primary_account_id():
+            return jsonify({
+                'success': False,
+                'error': 'Not authenticated',
+                'message': 'Please connect your Gmail account first'
+            }), 401
         
-        if not recipients:
-            email_progress['status'] = 'error'
-            email_progress['logs'].append('❌ No valid emails found in CSV file')
-            return
+        campaign_service = get_campaign_service()
         
-        email_progress['total'] = len(recipients)
-        email_progress['logs'].append(f'📧 Found {len(recipients)} recipients')
+        # A runner that stopped heartbeating is gone
+        campaign_service.mark_interrupted(app.config['CAMPAIGN_HEARTBEAT_TIMEOUT'])
         
-        # Get services
-        gmail_service = get_gmail_service()
-        tracking_service = get_tracking_service()
-        gemini_service = None
+        if app.config['CAMPAIGN_RUNNER'] == 'thread' and campaign_service.has_active_campaign():
+            return jsonify({
+                'success': False,
+                'error': 'A campaign is already running'
+            }), 409
         
-        if use_ai:
-            try:
-                gemini_service = get_gemini_service()
-                email_progress['logs'].append('🤖 AI personalization enabled')
-            except:
-                email_progress['logs'].append('⚠️ AI not available, using template')
+        campaign = campaign_service.get_campaign(campaign_id)
+        if campaign is None:
+            return jsonify({'success': False, 'error': 'Campaign not found'}), 404
         
-        # Send emails with rate limiting
-        delay_between_emails = 3600 / app.config['MAX_EMAILS_PER_HOUR']
+        if campaign['status'] not in RESUMABLE_STATUSES:
+            return jsonify({
+                'success': False,
+                'error': f"Campaign is {campaign['status']} and cannot be resumed"
+            }), 400
         
-        emails_sent_count = 0
+        campaign_service.enqueue(campaign_id, get_session_accounts())
+        start_campaign(campaign_id)
         
-        for idx, recipient in enumerate(recipients):
-            # Check if cancelled
-            if email_progress.get('cancelled'):
-                email_progress['logs'].append('🛑 Campaign cancelled by user')
-                break
-            
-            # Check for max emails limit in this run
-            if emails_sent_count >= max_emails:
-                email_progress['logs'].append(f'⏹️ Reached limit of {max_emails} emails for this run')
-                break
-
-            try:
-                recipient_email = recipient['email']
-                
-                # DUPLICATE CHECK
-                if tracking_service.is_email_sent(recipient_email):
-                    # email_progress['logs'].append(f'⏭️ Skipping {recipient_email} (Already sent)')
-                    # Don't increment current/sent count, just skip
-                    continue
-                
-                recipient_name = recipient.get('name', 'Hiring Manager')
-                company = recipient.get('company', '')
-                
-                # Generate personalized content if AI enabled
-                email_subject = subject
-                email_body = body
-                
-                if use_ai and gemini_service:
-                    try:
-                        email_subject = gemini_service.generate_subject(recipient_name, company)
-                        email_body = gemini_service.generate_email(recipient_name, company, resume_text=None)
-                        email_progress['logs'].append(f'🤖 AI content generated for {recipient_name}')
-                    except Exception as e:
-                        email_progress['logs'].append(f'⚠️ AI generation failed for {recipient_name}, using template')
-                
-                # Send email
-                email_progress['logs'].append(f'📤 Sending to {recipient_email}...')
-                
-                success = gmail_service.send_email(
-                    credentials,
-                    recipient_email,
-                    email_subject,
-                    email_body,
-                    resume_file
-                )
-                
-                if success:
-                    email_progress['sent'] += 1
-                    emails_sent_count += 1
-                    email_progress['logs'].append(f'✅ Email sent to {recipient_email}')
-                    
-                    # LOG SUCCESS TO DB
-                    tracking_service.log_email(recipient_email, 'sent', email_subject)
-                else:
-                    email_progress['failed'] += 1
-                    email_progress['logs'].append(f'❌ Failed to send to {recipient_email}')
-                    
-                    # LOG FAILURE TO DB
-                    tracking_service.log_email(recipient_email, 'failed', email_subject)
-                
-                email_progress['current'] += 1
-                
-                # Rate limiting delay
-                time.sleep(delay_between_emails)
-                
-            except Exception as e:
-                email_progress['failed'] += 1
-                email_progress['current'] += 1
-                email_progress['logs'].append(f'❌ Error sending to {recipient.get("email", "unknown")}: {str(e)}')
-        
-        # Campaign complete
-        if not email_progress.get('cancelled'):
-            email_progress['status'] = 'completed'
-            email_progress['logs'].append(f'✨ Campaign completed: {email_progress["sent"]} sent, {email_progress["failed"]} failed')
+        return jsonify({
+            'success': True,
+            'message': 'Email campaign resumed',
+            'campaign_id': campaign_id
+        })
         
     except Exception as e:
-        email_progress['status'] = 'error'
-        email_progress['logs'].append(f'❌ Campaign error: {str(e)}')
-        print(f"Email worker error: {e}")
+        print(f"Error resuming email campaign: {e}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
 
 @app.route('/progress', methods=['GET'])
 def get_progress():
-    """Get current email sending progress"""
-    return jsonify(email_progress)
+    """
+    Get email sending progress from the shared campaign store
+    
+    Query params:
+        - campaign_id (str, optional): Campaign to report; latest if omitted
+    """
+    campaign_service = get_campaign_service()
+    campaign_id = request.args.get('campaign_id') or campaign_service.latest_campaign_id()
+    
+    progress = campaign_service.get_progress(campaign_id) if campaign_id else None
+    return jsonify(progress or IDLE_PROGRESS)
 
 @app.route('/cancel_emails', methods=['POST'])
 def cancel_emails():
-    """Cancel ongoing email campaign"""
-    global email_progress
+    """
+    Cancel ongoing email campaign
+    
+    Request JSON:
+        - campaign_id (str, optional): Campaign to cancel; latest if omitted
+    """
+    campaign_service = get_campaign_service()
+    data = request.get_json(silent=True) or {}
+    campaign_id = data.get('campaign_id') or campaign_service.latest_campaign_id()
     
-    if email_progress['status'] == 'running':
-        email_progress['cancelled'] = True
-        email_progress['status'] = 'cancelled'
+    if campaign_id and campaign_service.get_status(campaign_id) in ACTIVE_STATUSES + (SCHEDULED,):
+        # The runner polls the stored status and stops at the next recipient
+        campaign_service.set_status(campaign_id, 'cancelled')
         return jsonify({
             'success': True,
             'message': 'Email campaign cancelled'
@@ -415,7 +672,7 @@ def send_test_email():
         JSON with test result
     """
     try:
-        if 'gmail_credentials' not in session:
+        if not get_primary_account_id():
             return jsonify({
                 'success': False,
                 'error': 'Not authenticated'
@@ -436,7 +693,7 @@ def send_test_email():
         # Send test email
         gmail_service = get_gmail_service()
         success = gmail_service.send_email(
-            session.get('gmail_credentials'),
+            get_live_credentials(),
             test_email,
             subject,
             body,
@@ -461,6 +718,42 @@ def send_test_email():
             'error': str(e)
         }), 500
 
+@app.route('/stats', methods=['GET'])
+def get_stats():
+    """
+    Send statistics from the maintained aggregates
+
+    Query parameters: group_by (comma-separated: campaign, day, status,
+    domain), campaign_id, since / until (YYYY-MM-DD) and limit.
+    """
+    try:
+        tracking_service = get_tracking_service()
+        group_by = [g.strip() for g in request.args.get('group_by', 'day,status').split(',') if g.strip()]
+        limit = request.args.get('limit')
+        breakdown = tracking_service.get_breakdown(
+            group_by,
+            campaign_id=request.args.get('campaign_id'),
+            since=request.args.get('since'),
+            until=request.args.get('until'),
+            limit=int(limit) if limit else None
+        )
+        return jsonify({
+            'success': True,
+            'totals': tracking_service.get_stats(),
+            'group_by': group_by,
+            'breakdown': breakdown
+        })
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
 @app.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
@@ -469,7 +762,11 @@ def health_check():
         'services': {
             'gemini_ai': os.getenv('GEMINI_API_KEY') is not None,
             'gmail_oauth': os.getenv('GOOGLE_CLIENT_ID') is not None,
-            'gmail_authenticated': 'gmail_credentials' in session
+            'gmail_authenticated': get_primary_account_id() is not None
+        },
+        'ai': {
+            'governor': get_gemini_governor().stats(),
+            'circuit_breaker': get_gemini_breaker().stats()
         }
     })
 
@@ -485,4 +782,8 @@ if __name__ == '__main__':
     print("Starting server on http://localhost:5000")
     print("=" * 60)
     
+    # The debug reloader serves from a child process (WERKZEUG_RUN_MAIN);
+    # the watcher process must not run a second scheduler and archiver
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        init_background_services()
     app.run(debug=True, port=5000, host='0.0.0.0')
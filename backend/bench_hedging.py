@@ -0,0 +1,86 @@
+"""
+Hedging Benchmark - tail latency with and without hedged model requests
+
+Runs the same workload against a FakeProvider whose latency has a
+straggler tail. It runs once calling the provider directly and once
+through HedgedModel, then compares the latency percentiles and the extra
+requests the hedges cost. No API key or network is needed.
+
+    python bench_hedging.py
+    python bench_hedging.py --calls 500 --latency 0.2 --tail-rate 0.1 --hedge-latency 0.1
+"""
+
+import argparse
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from services.model_providers import FakeProvider, HedgedModel, LatencyTracker
+
+
+def run(provider, calls, concurrency):
+    """Issue `calls` prompts from `concurrency` threads and collect latencies"""
+    latencies = LatencyTracker(size=calls)
+    errors = []
+    lock = threading.Lock()
+
+    def one(i):
+        start = time.perf_counter()
+        try:
+            provider.generate(f"prompt {i}")
+            latencies.add(time.perf_counter() - start)
+        except Exception as e:
+            with lock:
+                errors.append(e)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(calls)))
+    return latencies, errors
+
+
+def report(label, latencies, errors):
+    p50, p95, p99, worst = (latencies.percentile(p) for p in (50, 95, 99, 100))
+    print(f"{label:<10} p50 {p50 * 1000:7.0f} ms   p95 {p95 * 1000:7.0f} ms   "
+          f"p99 {p99 * 1000:7.0f} ms   max {worst * 1000:7.0f} ms   errors {len(errors)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark hedged model requests against a fake model')
+    parser.add_argument('--calls', type=int, default=300)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--latency', type=float, default=0.1, help='Primary median latency (s)')
+    parser.add_argument('--jitter', type=float, default=0.25)
+    parser.add_argument('--tail-rate', type=float, default=0.05, help='Share of straggler calls')
+    parser.add_argument('--tail-factor', type=float, default=10.0)
+    parser.add_argument('--hedge-latency', type=float, default=None,
+                        help='Median latency of a lighter hedge model (default: same as primary)')
+    parser.add_argument('--percentile', type=float, default=95)
+    args = parser.parse_args()
+
+    def primary():
+        return FakeProvider('primary', args.latency, args.jitter, args.tail_rate, args.tail_factor)
+
+    print("--- Hedging Benchmark ---")
+    print(f"Calls: {args.calls}, concurrency: {args.concurrency}, primary median {args.latency}s, "
+          f"{args.tail_rate:.0%} stragglers x{args.tail_factor:g}")
+
+    baseline = primary()
+    report('direct', *run(baseline, args.calls, args.concurrency))
+
+    hedge = None
+    if args.hedge_latency:
+        hedge = FakeProvider('hedge', args.hedge_latency, args.jitter, args.tail_rate, args.tail_factor)
+    hedged_primary = primary()
+    hedged = HedgedModel(hedged_primary, hedge, percentile=args.percentile,
+                         initial_deadline=args.latency * 3, min_samples=20)
+    report('hedged', *run(hedged, args.calls, args.concurrency))
+
+    stats = hedged.stats()
+    hedge_calls = (hedge.calls if hedge else hedged_primary.calls - args.calls)
+    print(f"\nHedges sent: {stats['hedged']} ({stats['hedged'] / args.calls:.1%} extra requests), "
+          f"hedge wins: {stats['hedge_wins']}, final deadline: {stats['deadline_s'] * 1000:.0f} ms, "
+          f"hedge-provider calls: {hedge_calls}")
+
+
+if __name__ == '__main__':
+    main()
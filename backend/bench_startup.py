@@ -0,0 +1,87 @@
+"""
+Startup Benchmark - measures app import time and time-to-first-request
+
+Each run happens in a fresh interpreter so module caches don't hide the cost.
+Exits non-zero if the median exceeds the budget or if any heavy dependency
+is imported during startup, so it can gate CI or a pre-commit hook.
+
+    python bench_startup.py
+    python bench_startup.py --runs 10 --max-import-ms 800 --max-first-request-ms 150
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Runs inside the child interpreter
+PROBE = r"""
+import json, sys, time
+start = time.perf_counter()
+import app as application
+imported = time.perf_counter()
+client = application.app.test_client()
+response = client.get('/health')
+first_request = time.perf_counter()
+from services import HEAVY_MODULES
+print(json.dumps({
+    'import_ms': (imported - start) * 1000,
+    'first_request_ms': (first_request - imported) * 1000,
+    'status_code': response.status_code,
+    'heavy_loaded': [m for m in HEAVY_MODULES if m in sys.modules],
+}))
+"""
+
+
+def run_probe():
+    """Run one cold start in a subprocess and return its measurements"""
+    env = dict(os.environ, WARM_UP_SERVICES='False')
+    result = subprocess.run(
+        [sys.executable, '-c', PROBE],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Startup probe failed:\n{result.stderr}")
+    # App startup may print; the measurements are the last line
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark backend startup time')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--max-import-ms', type=float, default=1500)
+    parser.add_argument('--max-first-request-ms', type=float, default=250)
+    args = parser.parse_args()
+
+    print("--- Startup Benchmark ---")
+    samples = [run_probe() for _ in range(args.runs)]
+
+    import_ms = statistics.median(s['import_ms'] for s in samples)
+    first_request_ms = statistics.median(s['first_request_ms'] for s in samples)
+    heavy_loaded = sorted({m for s in samples for m in s['heavy_loaded']})
+
+    print(f"Runs:               {args.runs}")
+    print(f"Import (median):    {import_ms:.1f} ms  (budget {args.max_import_ms:.0f} ms)")
+    print(f"First request:      {first_request_ms:.1f} ms  (budget {args.max_first_request_ms:.0f} ms)")
+    print(f"Heavy deps at boot: {', '.join(heavy_loaded) if heavy_loaded else 'none'}")
+
+    failures = []
+    if import_ms > args.max_import_ms:
+        failures.append('import time over budget')
+    if first_request_ms > args.max_first_request_ms:
+        failures.append('time-to-first-request over budget')
+    if heavy_loaded:
+        failures.append('heavy dependencies imported at startup')
+
+    if failures:
+        print(f"❌ Regression: {'; '.join(failures)}")
+        sys.exit(1)
+    print("✅ Startup within budget")
+
+
+if __name__ == '__main__':
+    main()
@@ -4,11 +4,14 @@ from dotenv import load_dotenv
 # Load environment variables
 load_dotenv()
 
+# Public placeholder; the app will not serve stored Gmail tokens while it is in use
+DEFAULT_SECRET_KEY = 'dev-secret-key-change-in-production'
+
 class Config:
     """Application configuration"""
     
     # Flask
-    SECRET_KEY = os.getenv('FLASK_SECRET_KEY', 'dev-secret-key-change-in-production')
+    SECRET_KEY = os.getenv('FLASK_SECRET_KEY', DEFAULT_SECRET_KEY)
     DEBUG = os.getenv('FLASK_DEBUG', 'True') == 'True'
     
     # File Upload
@@ -16,6 +19,16 @@ class Config:
     MAX_CONTENT_LENGTH = int(os.getenv('MAX_CONTENT_LENGTH', 16 * 1024 * 1024))  # 16MB
     ALLOWED_EXTENSIONS = {'pdf', 'csv', 'xlsx'}
     
+    # Upload retention: least recently used uploads are evicted once the
+    # folder exceeds the quota (files of active/resumable campaigns are kept)
+    UPLOAD_QUOTA_MB = float(os.getenv('UPLOAD_QUOTA_MB', 500))
+    UPLOAD_RETENTION_INTERVAL = float(os.getenv('UPLOAD_RETENTION_INTERVAL', 600))
+    
+    # Send history older than this many days moves to per-month archive
+    # databases (0 keeps everything in tracking.db)
+    TRACKING_ARCHIVE_DAYS = float(os.getenv('TRACKING_ARCHIVE_DAYS', 180))
+    TRACKING_ARCHIVE_INTERVAL = float(os.getenv('TRACKING_ARCHIVE_INTERVAL', 86400))
+    
     # Gemini AI
     GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
     
@@ -24,8 +37,34 @@ class Config:
     GOOGLE_CLIENT_SECRET = os.getenv('GOOGLE_CLIENT_SECRET')
     GOOGLE_REDIRECT_URI = os.getenv('GOOGLE_REDIRECT_URI', 'http://localhost:5000/oauth2callback')
     
-    # Email Settings
+    # Email Settings (quotas apply per connected Gmail account)
     MAX_EMAILS_PER_HOUR = int(os.getenv('MAX_EMAILS_PER_HOUR', 150))
+    MAX_EMAILS_PER_DAY = int(os.getenv('MAX_EMAILS_PER_DAY', 500))
+    
+    # Sender pool: 'round_robin' or 'least_loaded'
+    SENDER_POOL_STRATEGY = os.getenv('SENDER_POOL_STRATEGY', 'round_robin')
+    SENDER_MAX_CONSECUTIVE_ERRORS = int(os.getenv('SENDER_MAX_CONSECUTIVE_ERRORS', 3))
+    SENDER_COOLDOWN_SECONDS = int(os.getenv('SENDER_COOLDOWN_SECONDS', 600))
+    
+    # Per recipient domain: seconds between sends and sends per rolling hour
+    # (large mailbox providers such as gmail.com are exempt)
+    DOMAIN_MIN_INTERVAL = float(os.getenv('DOMAIN_MIN_INTERVAL', 60))
+    DOMAIN_MAX_PER_HOUR = int(os.getenv('DOMAIN_MAX_PER_HOUR', 20))
+    
+    # Retries for transient Gmail failures (429/5xx/network)
+    SEND_MAX_ATTEMPTS = int(os.getenv('SEND_MAX_ATTEMPTS', 5))
+    SEND_RETRY_BASE_DELAY = float(os.getenv('SEND_RETRY_BASE_DELAY', 30))
+    SEND_RETRY_MAX_DELAY = float(os.getenv('SEND_RETRY_MAX_DELAY', 3600))
+    
+    # Campaign runner: 'thread' runs campaigns inside the web process,
+    # 'external' leaves them queued for `python worker.py`
+    CAMPAIGN_RUNNER = os.getenv('CAMPAIGN_RUNNER', 'thread')
+    CAMPAIGN_HEARTBEAT_TIMEOUT = int(os.getenv('CAMPAIGN_HEARTBEAT_TIMEOUT', 300))
+    WORKER_POLL_INTERVAL = float(os.getenv('WORKER_POLL_INTERVAL', 2))
+    
+    # Import heavy service dependencies in the background at startup instead
+    # of on the first request that needs them
+    WARM_UP_SERVICES = os.getenv('WARM_UP_SERVICES', 'False') == 'True'
     
     # CORS
     CORS_ORIGINS = ['http://localhost:3000', 'http://localhost:5173']
@@ -0,0 +1,187 @@
+"""
+AI Route Load Test - blocking vs job-handle generation against a fake model
+
+Swaps the Gemini generator for a fake with a controlled latency
+distribution, serves the app from a threaded server in this process, and
+sends the same burst of concurrent /generate_email_ai requests twice:
+once waiting for each response, and once with ?async=1 and then polling
+the job handle. It reports latency percentiles and the peak number of
+server threads busy inside a request.
+
+    python load_test_ai.py
+    python load_test_ai.py --clients 300 --latency 3 --jitter 0.5 --workers 32
+"""
+
+import argparse
+import json
+import os
+import random
+import threading
+import time
+import urllib.request
+
+
+class FakeEmailGenerator:
+    """Stands in for GeminiEmailGenerator; every model call just sleeps"""
+
+    def __init__(self, latency=2.0, jitter=0.3):
+        """
+        Args:
+            latency (float): Median seconds per model call
+            jitter (float): Log-normal sigma; 0 makes every call take `latency`
+        """
+        self.latency = latency
+        self.jitter = jitter
+
+    def _call(self):
+        time.sleep(random.lognormvariate(0, self.jitter) * self.latency if self.jitter else self.latency)
+
+    def generate_subject(self, recipient_name='Hiring Manager', company='', job_role=None):
+        self._call()
+        return f"Application at {company or 'your company'}"
+
+    def generate_email(self, recipient_name='Hiring Manager', company='', job_role=None,
+                       experience_level=None, resume_text=None, report=None):
+        self._call()
+        return f"Dear {recipient_name},\n\nFake body for {company}."
+
+    def extract_resume_text(self, pdf_path):
+        return None
+
+    def analyze_resume(self, resume_text, job_description=None):
+        self._call()
+        return {'score': 80}
+
+
+class InFlightCounter:
+    """Tracks how many server threads are inside a request"""
+
+    def __init__(self):
+        self.current = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def enter(self):
+        with self._lock:
+            self.current += 1
+            self.peak = max(self.peak, self.current)
+
+    def leave(self, *_):
+        with self._lock:
+            self.current -= 1
+
+    def reset(self):
+        with self._lock:
+            self.peak = self.current
+
+
+def post(url, payload):
+    request = urllib.request.Request(url, data=json.dumps(payload).encode(),
+                                     headers={'Content-Type': 'application/json'})
+    with urllib.request.urlopen(request, timeout=600) as response:
+        return response.status, json.loads(response.read())
+
+
+def get(url):
+    with urllib.request.urlopen(url, timeout=60) as response:
+        return json.loads(response.read())
+
+
+def run_client(base_url, mode, index, poll_interval, results):
+    payload = {'recipient_name': f'Contact {index}', 'company': f'Company {index % 20}'}
+    start = time.perf_counter()
+    try:
+        if mode == 'blocking':
+            status, body = post(f"{base_url}/api/ai/generate_email_ai", payload)
+            submitted = time.perf_counter()
+            ok = status == 200 and body.get('success')
+        else:
+            status, body = post(f"{base_url}/api/ai/generate_email_ai?async=1", payload)
+            submitted = time.perf_counter()
+            ok = False
+            while status == 202:
+                job = get(f"{base_url}{body['status_url']}")['job']
+                if job['status'] in ('done', 'error'):
+                    ok = job['status'] == 'done'
+                    break
+                time.sleep(poll_interval)
+        results.append({'ok': ok, 'submit': submitted - start, 'total': time.perf_counter() - start})
+    except Exception as e:
+        results.append({'ok': False, 'error': str(e), 'submit': None, 'total': time.perf_counter() - start})
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+def run_burst(base_url, mode, clients, poll_interval, counter):
+    counter.reset()
+    results = []
+    threads = [threading.Thread(target=run_client, name='load-client',
+                                args=(base_url, mode, i, poll_interval, results))
+               for i in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - start
+
+    ok = [r for r in results if r['ok']]
+    submit = [r['submit'] * 1000 for r in ok]
+    total = [r['total'] for r in ok]
+    print(f"\n[{mode}]")
+    print(f"  completed:            {len(ok)}/{clients}  in {wall:.1f}s")
+    print(f"  response time p50/95: {percentile(submit, 50):.0f} / {percentile(submit, 95):.0f} ms")
+    print(f"  end-to-end p50/95:    {percentile(total, 50):.2f} / {percentile(total, 95):.2f} s")
+    print(f"  peak busy server threads: {counter.peak}")
+    errors = [r['error'] for r in results if r.get('error')]
+    if errors:
+        print(f"  errors: {len(errors)} (first: {errors[0]})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the AI routes with a fake high-latency model')
+    parser.add_argument('--clients', type=int, default=100, help='Concurrent requests per burst')
+    parser.add_argument('--latency', type=float, default=2.0, help='Median seconds per fake model call')
+    parser.add_argument('--jitter', type=float, default=0.3, help='Log-normal sigma of the latency')
+    parser.add_argument('--workers', type=int, default=None, help='AI job executor size (AI_JOB_WORKERS)')
+    parser.add_argument('--poll-interval', type=float, default=0.25)
+    parser.add_argument('--mode', choices=('both', 'blocking', 'async'), default='both')
+    parser.add_argument('--port', type=int, default=5055)
+    args = parser.parse_args()
+
+    if args.workers:
+        os.environ['AI_JOB_WORKERS'] = str(args.workers)
+    os.environ.setdefault('GEMINI_API_KEY', 'load-test')
+
+    from werkzeug.serving import make_server
+    import services.gemini_service as gemini_module
+    import app as application
+
+    gemini_module._gemini_service = FakeEmailGenerator(args.latency, args.jitter)
+
+    counter = InFlightCounter()
+    application.app.before_request(counter.enter)
+    application.app.teardown_request(counter.leave)
+
+    server = make_server('127.0.0.1', args.port, application.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{args.port}"
+
+    print("--- AI Route Load Test ---")
+    print(f"Clients: {args.clients}, fake model latency: {args.latency}s (sigma {args.jitter}), "
+          f"2 model calls per email")
+
+    modes = ('blocking', 'async') if args.mode == 'both' else (args.mode,)
+    for mode in modes:
+        run_burst(base_url, mode, args.clients, args.poll_interval, counter)
+
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""
+Maintenance commands for the backend databases
+
+    python manage.py rebuild-stats    # recompute send statistics from tracking.db
+    python manage.py archive          # move old send history to archive databases
+    python manage.py archive --list   # show the archive databases
+    python manage.py import-suppressions unsubscribes.csv --source unsubscribes
+"""
+
+import argparse
+import os
+import sys
+import time
+
+# Add backend to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from services.tracking_service import get_tracking_service
+from services.tracking_archive import get_tracking_archiver
+from services.suppression_service import get_suppression_service
+
+
+def rebuild_stats(args):
+    """Recompute the per campaign/day/status/domain aggregates"""
+    started = time.time()
+    counted = get_tracking_service().rebuild_stats(get_tracking_archiver().archive_paths())
+    print(f"📊 Rebuilt send statistics from {counted} logged attempt(s) in {time.time() - started:.2f}s")
+
+
+def archive(args):
+    """Run one archiving pass, or list the archives"""
+    archiver = get_tracking_archiver()
+    if args.days is not None:
+        archiver.retention_days = args.days
+    if not args.list:
+        report = archiver.archive(convert=True)
+        if report['cutoff'] is None:
+            print("Archiving is disabled (TRACKING_ARCHIVE_DAYS=0)")
+        elif not report['moved']:
+            print(f"Nothing older than {report['cutoff']} to archive")
+        if report['pages_freed']:
+            print(f"Returned {report['pages_freed']} free page(s) to the file system")
+    for entry in archiver.archives():
+        print(f"  {entry['period']}: {entry['rows']} row(s), {entry['bytes'] / (1024 * 1024):.1f} MB")
+
+
+def import_suppressions(args):
+    """Bulk-import a suppression list file"""
+    started = time.time()
+    service = get_suppression_service()
+    result = service.import_file(args.file, args.source)
+    print(f"🚫 Read {result['read']} line(s): {result['added']} added, "
+          f"{result['duplicates']} already listed, {result['invalid']} invalid "
+          f"({time.time() - started:.1f}s)")
+    print(f"   {service.stats()['entries']} entries on the suppression list")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Backend maintenance commands')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    commands.add_parser('rebuild-stats', help='Recompute send statistics from the sent email log') \
+        .set_defaults(handler=rebuild_stats)
+
+    archive_parser = commands.add_parser('archive', help='Move old send history to archive databases')
+    archive_parser.add_argument('--days', type=float, help='Archive rows older than this (default TRACKING_ARCHIVE_DAYS)')
+    archive_parser.add_argument('--list', action='store_true', help='Only list the archive databases')
+    archive_parser.set_defaults(handler=archive)
+
+    suppress_parser = commands.add_parser('import-suppressions', help='Import a never-contact list (CSV or text)')
+    suppress_parser.add_argument('file', help='List file, one address or domain per line')
+    suppress_parser.add_argument('--source', help='Label stored with the entries (default: file name)')
+    suppress_parser.set_defaults(handler=import_suppressions)
+
+    args = parser.parse_args()
+    args.handler(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -2,12 +2,70 @@
 AI Routes - Endpoints for Gemini AI email generation
 """
 
-from flask import Blueprint, request, jsonify, session
+from flask import Blueprint, request, jsonify, session, Response, stream_with_context
+import json
+import time
 from services.gemini_service import get_gemini_service
 from services.file_service import FileService
+from services.ai_jobs import get_ai_job_service
+from services.ats_service import get_ats_analyzer, MAX_RESUME_PAGES
+from services.upload_store import get_upload_store
 
 ai_bp = Blueprint('ai', __name__)
 
+def _wants_async():
+    """Clients opt into job handles with ?async=1 or 'Prefer: respond-async'"""
+    return (request.args.get('async', '').lower() in ('1', 'true')
+            or 'respond-async' in request.headers.get('Prefer', ''))
+
+def _accepted(kind, fn, *args):
+    """Submit work to the AI executor and answer 202 with the job handle"""
+    try:
+        job = get_ai_job_service().submit(kind, fn, *args)
+    except RuntimeError as e:
+        return jsonify({'success': False, 'error': str(e)}), 503
+    return jsonify({
+        'success': True,
+        'job_id': job['id'],
+        'status': job['status'],
+        'status_url': f"/api/ai/jobs/{job['id']}"
+    }), 202
+
+def _generate_single(gemini_service, data):
+    """Generate one subject/body pair; returns the response payload"""
+    recipient_name = data.get('recipient_name', 'Hiring Manager')
+    company = data.get('company', '')
+    job_role = data.get('job_role')
+    experience_level = data.get('experience_level')
+    resume_file = data.get('resume_file')
+    
+    # Extract resume text if provided
+    resume_text = None
+    if resume_file:
+        resume_text = gemini_service.extract_resume_text(resume_file)
+        if resume_text:
+            print(f"Extracted {len(resume_text)} characters from resume")
+    
+    # Generate email content
+    print(f"Generating email for {recipient_name} at {company}...")
+    subject = gemini_service.generate_subject(recipient_name, company, job_role)
+    prompt_report = {}
+    body = gemini_service.generate_email(recipient_name, company, job_role, experience_level, resume_text,
+                                         report=prompt_report)
+    
+    return {
+        'success': True,
+        'subject': subject,
+        'body': body,
+        'metadata': {
+            'recipient_name': recipient_name,
+            'company': company,
+            'job_role': job_role,
+            'used_resume': resume_text is not None,
+            'prompt': prompt_report
+        }
+    }
+
 @ai_bp.route('/generate_email_ai', methods=['POST'])
 def generate_email_ai():
     """
@@ -20,43 +78,21 @@ def generate_email_ai():
         - experience_level (str, optional): Experience level
         - resume_file (str, optional): Path to uploaded resume
     
+    Query:
+        - async (bool, optional): Return 202 with a job handle instead of waiting
+    
     Returns:
-        JSON with subject and body
+        JSON with subject and body (or job_id/status_url when async)
     """
     try:
-        data = request.json
-        recipient_name = data.get('recipient_name', 'Hiring Manager')
-        company = data.get('company', '')
-        job_role = data.get('job_role')
-        experience_level = data.get('experience_level')
-        resume_file = data.get('resume_file')
+        data = request.json or {}
         
         # Get Gemini service
         gemini_service = get_gemini_service()
         
-        # Extract resume text if provided
-        resume_text = None
-        if resume_file:
-            resume_text = gemini_service.extract_resume_text(resume_file)
-            if resume_text:
-                print(f"Extracted {len(resume_text)} characters from resume")
-        
-        # Generate email content
-        print(f"Generating email for {recipient_name} at {company}...")
-        subject = gemini_service.generate_subject(recipient_name, company, job_role)
-        body = gemini_service.generate_email(recipient_name, company, job_role, experience_level, resume_text)
-        
-        return jsonify({
-            'success': True,
-            'subject': subject,
-            'body': body,
-            'metadata': {
-                'recipient_name': recipient_name,
-                'company': company,
-                'job_role': job_role,
-                'used_resume': resume_text is not None
-            }
-        })
+        if _wants_async():
+            return _accepted('generate_email', _generate_single, gemini_service, data)
+        return jsonify(_generate_single(gemini_service, data))
         
     except ValueError as e:
         return jsonify({
@@ -72,38 +108,141 @@ def generate_email_ai():
             'message': 'Failed to generate email content'
         }), 500
 
+@ai_bp.route('/jobs/<job_id>', methods=['GET'])
+def get_ai_job(job_id):
+    """
+    Poll an asynchronous AI job
+    
+    Returns:
+        JSON with status ('queued', 'running', 'done', 'error'), the result
+        (same payload the synchronous route returns) and queue/run timings
+    """
+    job = get_ai_job_service().get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': 'Job not found or expired'}), 404
+    return jsonify({'success': True, 'job': job})
+
+@ai_bp.route('/jobs', methods=['GET'])
+def ai_job_stats():
+    """Queued/running/finished AI job counts"""
+    return jsonify({'success': True, 'stats': get_ai_job_service().stats()})
+
+def _sse(event, payload):
+    """Format one server-sent event"""
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+@ai_bp.route('/generate_email_ai/stream', methods=['POST'])
+def generate_email_ai_stream():
+    """
+    Stream AI-generated email content over server-sent events
+    
+    Request JSON: same as /generate_email_ai
+    
+    Events:
+        - chunk: {"text": ...} body text as Gemini produces it
+        - fallback: {"body": ...} template body replacing anything streamed so far
+        - done: {"subject": ..., "body": ..., "metadata": {...}} final result
+        - error: {"error": ..., "message": ...} if generation could not start
+    """
+    data = request.json or {}
+    recipient_name = data.get('recipient_name', 'Hiring Manager')
+    company = data.get('company', '')
+    job_role = data.get('job_role')
+    experience_level = data.get('experience_level')
+    resume_file = data.get('resume_file')
+    
+    def events():
+        start = time.perf_counter()
+        try:
+            gemini_service = get_gemini_service()
+        except ValueError as e:
+            yield _sse('error', {
+                'error': str(e),
+                'message': 'Please configure GEMINI_API_KEY in your .env file'
+            })
+            return
+        
+        resume_text = gemini_service.extract_resume_text(resume_file) if resume_file else None
+        
+        parts = []
+        first_token_ms = None
+        used_fallback = False
+        for kind, text in gemini_service.stream_email(recipient_name, company, job_role, experience_level, resume_text):
+            if first_token_ms is None:
+                first_token_ms = round((time.perf_counter() - start) * 1000)
+            if kind == 'fallback':
+                used_fallback = True
+                parts = [text]
+                yield _sse('fallback', {'body': text})
+            else:
+                parts.append(text)
+                yield _sse('chunk', {'text': text})
+        
+        # The subject is short; generating it last keeps time-to-first-token low
+        subject = gemini_service.generate_subject(recipient_name, company, job_role)
+        yield _sse('done', {
+            'subject': subject,
+            'body': ''.join(parts).strip(),
+            'metadata': {
+                'recipient_name': recipient_name,
+                'company': company,
+                'job_role': job_role,
+                'used_resume': resume_text is not None,
+                'used_fallback': used_fallback,
+                'time_to_first_token_ms': first_token_ms,
+                'total_ms': round((time.perf_counter() - start) * 1000)
+            }
+        })
+    
+    return Response(
+        stream_with_context(events()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+def _analyze(resume_file, job_description):
+    """Score a resume locally; returns the response payload"""
+    resume_text = FileService.extract_pdf_text(resume_file, max_pages=MAX_RESUME_PAGES)
+    if not resume_text:
+        return {'success': False, 'error': 'Could not read resume text'}
+    
+    analysis = get_ats_analyzer().analyze(resume_text, job_description)
+    return {
+        'success': True,
+        'analysis': analysis
+    }
+
 @ai_bp.route('/analyze_resume', methods=['POST'])
 def analyze_resume():
     """
     Analyze resume and return ATS score and feedback
     
+    Scoring is local (keyword coverage, TF-IDF similarity and structure
+    checks) and needs no Gemini API key.
+    
     Request JSON:
-        - resume_file (str): Path to uploaded resume
+        - resume_file (str): Path or upload hash of the resume
         - job_description (str, optional): Target JD
+    
+    Query:
+        - async (bool, optional): Return 202 with a job handle instead of waiting
         
     Returns:
         JSON with analysis result
     """
     try:
-        data = request.json
-        resume_file = data.get('resume_file')
+        data = request.json or {}
+        resume_file = get_upload_store().resolve(data.get('resume_file'))
         job_description = data.get('job_description')
         
         if not resume_file:
             return jsonify({'success': False, 'error': 'No resume file provided'}), 400
-            
-        gemini_service = get_gemini_service()
-        resume_text = gemini_service.extract_resume_text(resume_file)
         
-        if not resume_text:
-             return jsonify({'success': False, 'error': 'Could not read resume text'}), 400
-             
-        analysis = gemini_service.analyze_resume(resume_text, job_description)
+        if _wants_async():
+            return _accepted('analyze_resume', _analyze, resume_file, job_description)
         
-        return jsonify({
-            'success': True,
-            'analysis': analysis
-        })
+        result = _analyze(resume_file, job_description)
+        return jsonify(result), (200 if result['success'] else 400)
         
     except Exception as e:
         print(f"Error in analyze_resume: {e}")
@@ -112,6 +251,106 @@ def analyze_resume():
             'error': str(e)
         }), 500
 
+# Upper bound on job descriptions per match request
+MAX_MATCH_JOBS = 500
+
+@ai_bp.route('/match_jobs', methods=['POST'])
+def match_jobs():
+    """
+    Rank many job descriptions against one resume
+    
+    Request JSON:
+        - resume_file (str): Path or upload hash of the resume, or
+        - resume_hash (str): Hash returned by an earlier analysis/match (skips PDF extraction)
+        - job_descriptions (list): Strings, or objects with text plus optional id/title
+        - limit (int, optional): Return only the best N
+    
+    Returns:
+        JSON with resume_hash and results ranked by score
+    """
+    try:
+        data = request.json or {}
+        jobs = data.get('job_descriptions') or []
+        resume_hash = data.get('resume_hash')
+        resume_file = get_upload_store().resolve(data.get('resume_file'))
+        
+        if not isinstance(jobs, list) or not jobs:
+            return jsonify({'success': False, 'error': 'No job descriptions provided'}), 400
+        if len(jobs) > MAX_MATCH_JOBS:
+            return jsonify({'success': False, 'error': f'At most {MAX_MATCH_JOBS} job descriptions per request'}), 400
+
+        limit = data.get('limit')
+        if limit is not None:
+            try:
+                if isinstance(limit, bool) or (isinstance(limit, float) and not limit.is_integer()):
+                    raise ValueError(limit)
+                limit = int(limit)
+            except (TypeError, ValueError):
+                limit = 0
+            if limit < 1:
+                return jsonify({'success': False, 'error': 'limit must be a positive integer'}), 400
+
+        analyzer = get_ats_analyzer()
+        profile = analyzer.cached_profile(resume_hash) if resume_hash else None
+        if profile is None:
+            if not resume_file:
+                error = 'Resume no longer cached, send resume_file' if resume_hash else 'No resume file provided'
+                return jsonify({'success': False, 'error': error}), 400
+            resume_text = FileService.extract_pdf_text(resume_file, max_pages=MAX_RESUME_PAGES)
+            if not resume_text:
+                return jsonify({'success': False, 'error': 'Could not read resume text'}), 400
+            profile = analyzer.profile(resume_text)
+        
+        ranking = analyzer.rank(profile, jobs, limit=limit)
+        return jsonify({'success': True, **ranking})
+        
+    except Exception as e:
+        print(f"Error in match_jobs: {e}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+def _generate_batch(gemini_service, recipients, resume_file, default_job_role):
+    """Generate emails for up to 10 recipients; returns the response payload"""
+    # Extract resume text once
+    resume_text = None
+    if resume_file:
+        resume_text = gemini_service.extract_resume_text(resume_file)
+    
+    # Generate emails for each recipient
+    generated_emails = []
+    for recipient in recipients[:10]:  # Limit to 10 for batch generation
+        try:
+            name = recipient.get('name', 'Hiring Manager')
+            company = recipient.get('company', '')
+            job_role = recipient.get('job_role', default_job_role)
+            
+            subject = gemini_service.generate_subject(name, company, job_role)
+            prompt_report = {}
+            body = gemini_service.generate_email(name, company, job_role, resume_text=resume_text,
+                                                 report=prompt_report)
+            
+            generated_emails.append({
+                'recipient': recipient,
+                'subject': subject,
+                'body': body,
+                'prompt': prompt_report,
+                'success': True
+            })
+        except Exception as e:
+            generated_emails.append({
+                'recipient': recipient,
+                'error': str(e),
+                'success': False
+            })
+    
+    return {
+        'success': True,
+        'emails': generated_emails,
+        'count': len(generated_emails)
+    }
+
 @ai_bp.route('/generate_batch_emails', methods=['POST'])
 def generate_batch_emails():
     """
@@ -122,11 +361,14 @@ def generate_batch_emails():
         - resume_file (str, optional): Path to uploaded resume
         - job_role (str, optional): Default job role
     
+    Query:
+        - async (bool, optional): Return 202 with a job handle instead of waiting
+    
     Returns:
         JSON with generated emails for each recipient
     """
     try:
-        data = request.json
+        data = request.json or {}
         recipients = data.get('recipients', [])
         resume_file = data.get('resume_file')
         default_job_role = data.get('job_role')
@@ -140,40 +382,10 @@ def generate_batch_emails():
         # Get Gemini service
         gemini_service = get_gemini_service()
         
-        # Extract resume text once
-        resume_text = None
-        if resume_file:
-            resume_text = gemini_service.extract_resume_text(resume_file)
-        
-        # Generate emails for each recipient
-        generated_emails = []
-        for recipient in recipients[:10]:  # Limit to 10 for batch generation
-            try:
-                name = recipient.get('name', 'Hiring Manager')
-                company = recipient.get('company', '')
-                job_role = recipient.get('job_role', default_job_role)
-                
-                subject = gemini_service.generate_subject(name, company, job_role)
-                body = gemini_service.generate_email(name, company, job_role, resume_text)
-                
-                generated_emails.append({
-                    'recipient': recipient,
-                    'subject': subject,
-                    'body': body,
-                    'success': True
-                })
-            except Exception as e:
-                generated_emails.append({
-                    'recipient': recipient,
-                    'error': str(e),
-                    'success': False
-                })
-        
-        return jsonify({
-            'success': True,
-            'emails': generated_emails,
-            'count': len(generated_emails)
-        })
+        if _wants_async():
+            return _accepted('generate_batch_emails', _generate_batch,
+                             gemini_service, recipients, resume_file, default_job_role)
+        return jsonify(_generate_batch(gemini_service, recipients, resume_file, default_job_role))
         
     except Exception as e:
         print(f"Error in generate_batch_emails: {e}")
@@ -4,9 +4,86 @@ Auth Routes - Endpoints for Gmail OAuth 2.0 authentication
 
 from flask import Blueprint, request, jsonify, session, redirect
 from services.gmail_service import get_gmail_service
+from services.sender_pool import account_id_for
+from services.credential_manager import get_credential_manager
 
 auth_bp = Blueprint('auth', __name__)
 
+def remember_gmail_account(credentials_dict, email_address):
+    """
+    Add an authenticated mailbox to the sender pool and make it the primary account
+    
+    Credentials stay server-side in the credential manager; the session (a
+    signed, but readable, cookie) only holds account IDs. Connecting the same
+    mailbox again replaces its stored token instead of adding a second account.
+    
+    Args:
+        credentials_dict (dict): OAuth credentials as dictionary
+        email_address (str): Address of the authenticated mailbox
+        
+    Returns:
+        str: Account identifier
+    """
+    account_id = account_id_for(email_address)
+    get_credential_manager().register(account_id, credentials_dict)
+    
+    account_ids = [a for a in session.get('gmail_account_ids', []) if a != account_id]
+    session['gmail_account_ids'] = account_ids + [account_id]
+    session['gmail_primary'] = account_id
+    
+    # Sessions from before accounts were keyed by address carried the tokens
+    session.pop('gmail_credentials', None)
+    session.pop('gmail_accounts', None)
+    return account_id
+
+def get_primary_account_id():
+    """
+    Get the session's primary Gmail account
+    
+    Returns:
+        str: Account identifier, or None if Gmail is not connected
+    """
+    return session.get('gmail_primary')
+
+def get_live_credentials():
+    """
+    Get the primary account's shared live credentials
+    
+    Returns:
+        Credentials: Credentials for GmailService.send_email, or None
+    """
+    primary = get_primary_account_id()
+    if not primary:
+        return None
+    return get_credential_manager().get(primary)
+
+def get_session_accounts():
+    """
+    Get every Gmail account connected in this session
+    
+    Returns:
+        dict: Account identifier -> stored credentials dictionary
+    """
+    credential_manager = get_credential_manager()
+    accounts = {}
+    for account_id in session.get('gmail_account_ids', []):
+        stored = credential_manager.stored(account_id)
+        if stored:
+            accounts[account_id] = stored
+    return accounts
+
+def credentials_to_dict(credentials):
+    """Serialize OAuth credentials from the callback for the credential manager"""
+    return {
+        'token': credentials.token,
+        'refresh_token': credentials.refresh_token,
+        'token_uri': credentials.token_uri,
+        'client_id': credentials.client_id,
+        'client_secret': credentials.client_secret,
+        'scopes': list(credentials.scopes) if credentials.scopes else [],
+        'expiry': credentials.expiry.isoformat() if credentials.expiry else None
+    }
+
 @auth_bp.route('/gmail/authorize', methods=['GET'])
 def gmail_authorize():
     """
@@ -66,17 +143,11 @@ def oauth2callback():
         gmail_service = get_gmail_service()
         credentials = gmail_service.get_credentials_from_code(code, state)
         
-        # Store credentials in session (temporary storage)
-        session['gmail_credentials'] = {
-            'token': credentials.token,
-            'refresh_token': credentials.refresh_token,
-            'token_uri': credentials.token_uri,
-            'client_id': credentials.client_id,
-            'client_secret': credentials.client_secret,
-            'scopes': credentials.scopes
-        }
+        # Store credentials server-side; the session only keeps the account ID
+        account_id = remember_gmail_account(credentials_to_dict(credentials),
+                                            gmail_service.get_account_email(credentials))
         
-        print("Gmail OAuth successful - credentials stored in session")
+        print(f"Gmail OAuth successful - account {account_id} connected")
         
         # Redirect to frontend with success
         return redirect('http://localhost:3000?auth=success')
@@ -94,22 +165,17 @@ def gmail_status():
         JSON with authentication status
     """
     try:
-        authenticated = 'gmail_credentials' in session
+        primary = get_primary_account_id()
         
-        # If authenticated, verify credentials are still valid
-        if authenticated:
-            gmail_service = get_gmail_service()
-            credentials = session.get('gmail_credentials')
-            
-            # Quick validation
-            if not credentials or not credentials.get('token'):
-                authenticated = False
-                session.pop('gmail_credentials', None)
+        # The stored token may have been removed since the session was created
+        authenticated = bool(primary) and get_credential_manager().stored(primary) is not None
+        if primary and not authenticated:
+            session.pop('gmail_primary', None)
         
         return jsonify({
             'success': True,
             'authenticated': authenticated,
-            'has_credentials': 'gmail_credentials' in session
+            'has_credentials': authenticated
         })
         
     except Exception as e:
@@ -123,15 +189,18 @@ def gmail_status():
 @auth_bp.route('/gmail/disconnect', methods=['POST'])
 def gmail_disconnect():
     """
-    Disconnect Gmail account (remove credentials from session)
+    Disconnect Gmail accounts (remove them from the session and drop their
+    stored credentials)
     
     Returns:
         JSON with success status
     """
     try:
-        if 'gmail_credentials' in session:
-            session.pop('gmail_credentials')
-            print("Gmail credentials removed from session")
+        credential_manager = get_credential_manager()
+        for account_id in session.pop('gmail_account_ids', []):
+            credential_manager.forget(account_id)
+        if session.pop('gmail_primary', None):
+            print("Gmail accounts removed from session")
         
         return jsonify({
             'success': True,
@@ -145,6 +214,55 @@ def gmail_disconnect():
             'error': str(e)
         }), 500
 
+@auth_bp.route('/gmail/accounts', methods=['GET'])
+def gmail_accounts():
+    """
+    List Gmail accounts connected for the sender pool
+    
+    Connect another account by running the OAuth flow again and choosing a
+    different Google account.
+    
+    Returns:
+        JSON with account identifiers
+    """
+    primary_id = get_primary_account_id()
+    
+    return jsonify({
+        'success': True,
+        'accounts': [
+            {'account_id': account_id, 'primary': account_id == primary_id}
+            for account_id in get_session_accounts()
+        ]
+    })
+
+@auth_bp.route('/gmail/accounts/<account_id>', methods=['DELETE'])
+def gmail_remove_account(account_id):
+    """
+    Remove one account from the sender pool
+    
+    Returns:
+        JSON with success status
+    """
+    account_ids = session.get('gmail_account_ids', [])
+    if account_id not in account_ids:
+        return jsonify({'success': False, 'error': 'Account not found'}), 404
+    
+    account_ids = [a for a in account_ids if a != account_id]
+    session['gmail_account_ids'] = account_ids
+    get_credential_manager().forget(account_id)
+    
+    if get_primary_account_id() == account_id:
+        if account_ids:
+            session['gmail_primary'] = account_ids[0]
+        else:
+            session.pop('gmail_primary')
+    
+    return jsonify({
+        'success': True,
+        'message': 'Gmail account removed',
+        'remaining': len(account_ids)
+    })
+
 @auth_bp.route('/gmail/test', methods=['POST'])
 def gmail_test():
     """
@@ -157,7 +275,7 @@ def gmail_test():
         JSON with test result
     """
     try:
-        if 'gmail_credentials' not in session:
+        if not get_primary_account_id():
             return jsonify({
                 'success': False,
                 'error': 'Not authenticated',
@@ -175,7 +293,7 @@ def gmail_test():
         
         # Send test email
         gmail_service = get_gmail_service()
-        credentials = session.get('gmail_credentials')
+        credentials = get_live_credentials()
         
         success = gmail_service.send_email(
             credentials,
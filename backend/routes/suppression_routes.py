@@ -0,0 +1,77 @@
+"""
+Suppression Routes - Endpoints for the "never contact" list
+"""
+
+from flask import Blueprint, request, jsonify
+from services.suppression_service import get_suppression_service, canonical_email
+
+suppression_bp = Blueprint('suppressions', __name__)
+
+@suppression_bp.route('', methods=['GET'])
+def suppression_stats():
+    """Number of suppressed addresses and domains"""
+    try:
+        return jsonify({'success': True, **get_suppression_service().stats()})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@suppression_bp.route('', methods=['POST'])
+def add_suppressions():
+    """
+    Add entries to the list
+
+    Request body:
+        {"entries": ["jane@acme.com", "@competitor.io"], "source": "manual"}
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        entries = data.get('entries')
+        if not isinstance(entries, list) or not entries:
+            return jsonify({'success': False, 'error': 'entries must be a non-empty list'}), 400
+        result = get_suppression_service().import_entries(
+            (str(entry) for entry in entries), data.get('source', 'api')
+        )
+        return jsonify({'success': True, **result})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@suppression_bp.route('/import', methods=['POST'])
+def import_suppressions():
+    """
+    Import a list file (CSV or text, one entry per line)
+
+    Form data:
+        - file: List file; a column named email/address/domain is used if present
+        - source: Optional label, e.g. 'unsubscribes'
+    """
+    try:
+        file = request.files.get('file')
+        if file is None or file.filename == '':
+            return jsonify({'success': False, 'error': 'No file provided'}), 400
+        result = get_suppression_service().import_upload(file, request.form.get('source'))
+        print(f"🚫 Imported suppression list {file.filename}: {result['added']} new entries")
+        return jsonify({'success': True, **result})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@suppression_bp.route('/check', methods=['GET'])
+def check_suppression():
+    """Whether an address would be skipped, and which entry matches"""
+    email = request.args.get('email', '')
+    if not email:
+        return jsonify({'success': False, 'error': 'email is required'}), 400
+    match = get_suppression_service().match(email)
+    return jsonify({
+        'success': True,
+        'email': email,
+        'canonical': canonical_email(email),
+        'suppressed': match is not None,
+        'match': match
+    })
+
+@suppression_bp.route('/<path:entry>', methods=['DELETE'])
+def remove_suppression(entry):
+    """Take an address or '@domain' off the list"""
+    if not get_suppression_service().remove(entry):
+        return jsonify({'success': False, 'error': 'Entry not found'}), 404
+    return jsonify({'success': True})
@@ -1 +1,41 @@
 # Services package
+#
+# Service modules import their heavy dependencies (Google client libraries,
+# Gemini SDK, pandas, NumPy, PyPDF2) on first use so that booting the web app
+# stays cheap. Call warm_up() to pay that cost up front instead.
+
+import time
+
+HEAVY_MODULES = (
+    'numpy',
+    'pandas',
+    'PyPDF2',
+    'google.generativeai',
+    'google.oauth2.credentials',
+    'google_auth_oauthlib.flow',
+    'googleapiclient.discovery',
+)
+
+
+def warm_up(modules=HEAVY_MODULES):
+    """
+    Import heavy dependencies ahead of the first request that needs them
+
+    Args:
+        modules (tuple): Module names to import
+
+    Returns:
+        dict: Module name -> import time in milliseconds (None if unavailable)
+    """
+    import importlib
+
+    timings = {}
+    for name in modules:
+        start = time.perf_counter()
+        try:
+            importlib.import_module(name)
+            timings[name] = round((time.perf_counter() - start) * 1000, 1)
+        except ImportError as e:
+            print(f"Warm-up could not import {name}: {e}")
+            timings[name] = None
+    return timings
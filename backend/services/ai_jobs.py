@@ -0,0 +1,211 @@
+"""
+AI Job Service - runs Gemini generations off the request threads
+
+A Gemini call takes seconds, and an AI route that waits for it holds a
+server thread the whole time. Routes instead submit the work here and
+return a job handle straight away; clients poll `/api/ai/jobs/<id>` for
+the result. A bounded executor runs the jobs, so each running generation
+still occupies one executor thread, but waiting jobs and finished results
+no longer hold server threads.
+
+Job state and results are kept in an `ai_jobs` table in campaigns.db. Under
+a multi-process WSGI server the poll may reach a different process than
+the one running the job, and it still finds the job there.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+JOB_STATES = ('queued', 'running', 'done', 'error')
+
+JOB_COLUMNS = ('id', 'kind', 'status', 'result', 'error', 'created_at', 'started_at', 'finished_at')
+
+
+class AIJobService:
+    """Bounded executor plus a table of job handles shared by every process"""
+
+    DB_NAME = 'campaigns.db'
+
+    def __init__(self, max_workers=16, ttl=600, max_jobs=5000, db_path=None):
+        """
+        Args:
+            max_workers (int): Generations this process runs at once
+            ttl (int): Seconds a finished job stays available for polling; a job
+                still unfinished this long after it was queued is reported as
+                lost (its process stopped)
+            max_jobs (int): Pending + finished jobs kept before new ones are refused
+            db_path (str, optional): SQLite file holding the jobs
+        """
+        self.max_workers = max_workers
+        self.ttl = ttl
+        self.max_jobs = max_jobs
+        self.db_path = db_path or os.path.join(os.path.dirname(os.path.dirname(__file__)), self.DB_NAME)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='ai-job')
+        self._init_db()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _init_db(self):
+        """Initialize database with required tables"""
+        conn = self._connect()
+        try:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS ai_jobs (
+                    id TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    result TEXT,
+                    error TEXT,
+                    created_at REAL NOT NULL,
+                    started_at REAL,
+                    finished_at REAL
+                )
+            ''')
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_ai_jobs_created ON ai_jobs(created_at)")
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _update(self, job_id, **fields):
+        conn = self._connect()
+        try:
+            assignments = ', '.join(f'{column} = ?' for column in fields)
+            conn.execute(f"UPDATE ai_jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id))
+            conn.commit()
+        finally:
+            conn.close()
+
+    def submit(self, kind, fn, *args, **kwargs):
+        """
+        Queue a generation
+
+        Args:
+            kind (str): Job type shown to clients (e.g. 'generate_email')
+            fn (callable): Work to run; its return value (JSON-serializable)
+                becomes the job result
+            *args, **kwargs: Passed to fn
+
+        Returns:
+            dict: The new job (see get())
+
+        Raises:
+            RuntimeError: If the job table is full
+        """
+        job = {
+            'id': uuid.uuid4().hex,
+            'kind': kind,
+            'status': 'queued',
+            'result': None,
+            'error': None,
+            'created_at': time.time(),
+            'started_at': None,
+            'finished_at': None
+        }
+        conn = self._connect()
+        try:
+            with conn:
+                self._prune(conn)
+                if conn.execute("SELECT COUNT(*) FROM ai_jobs").fetchone()[0] >= self.max_jobs:
+                    raise RuntimeError("Too many AI jobs in flight, try again shortly")
+                conn.execute(
+                    f"INSERT INTO ai_jobs ({', '.join(JOB_COLUMNS)}) VALUES ({', '.join('?' * len(JOB_COLUMNS))})",
+                    tuple(job[column] for column in JOB_COLUMNS)
+                )
+        finally:
+            conn.close()
+        self._executor.submit(self._run, job['id'], fn, args, kwargs)
+        return self._public(job)
+
+    def _run(self, job_id, fn, args, kwargs):
+        try:
+            self._update(job_id, status='running', started_at=time.time())
+            result = fn(*args, **kwargs)
+            self._update(job_id, status='done', result=json.dumps(result), finished_at=time.time())
+        except Exception as e:
+            print(f"AI job {job_id} failed: {e}")
+            try:
+                self._update(job_id, status='error', error=str(e), finished_at=time.time())
+            except sqlite3.Error as db_error:
+                print(f"Could not record the failure of AI job {job_id}: {db_error}")
+
+    def _prune(self, conn):
+        """Drop finished jobs past their TTL and mark lost ones failed"""
+        now = time.time()
+        cutoff = now - self.ttl
+        conn.execute("DELETE FROM ai_jobs WHERE finished_at IS NOT NULL AND finished_at < ?", (cutoff,))
+        conn.execute(
+            '''
+            UPDATE ai_jobs SET status = 'error', error = 'Job was lost with the process running it',
+                               finished_at = ?
+            WHERE finished_at IS NULL AND created_at < ?
+            ''',
+            (now, cutoff)
+        )
+
+    @staticmethod
+    def _public(job):
+        public = dict(job)
+        end = job['finished_at'] or time.time()
+        public['queue_ms'] = round(((job['started_at'] or end) - job['created_at']) * 1000)
+        public['run_ms'] = round((end - job['started_at']) * 1000) if job['started_at'] else None
+        return public
+
+    def get(self, job_id):
+        """
+        Get a job's current state
+
+        Args:
+            job_id (str): Job identifier from submit()
+
+        Returns:
+            dict: Job with id, kind, status, result, error and timings, or None if unknown
+        """
+        conn = self._connect()
+        try:
+            row = conn.execute(f"SELECT {', '.join(JOB_COLUMNS)} FROM ai_jobs WHERE id = ?", (job_id,)).fetchone()
+        finally:
+            conn.close()
+        if row is None:
+            return None
+        job = dict(row)
+        job['result'] = json.loads(job['result']) if job['result'] is not None else None
+        return self._public(job)
+
+    def stats(self):
+        """Counts of jobs per state (all processes) plus this process's executor size"""
+        conn = self._connect()
+        try:
+            with conn:
+                self._prune(conn)
+            rows = conn.execute("SELECT status, COUNT(*) FROM ai_jobs GROUP BY status").fetchall()
+        finally:
+            conn.close()
+        counts = {state: 0 for state in JOB_STATES}
+        counts.update({status: count for status, count in rows})
+        counts['max_workers'] = self.max_workers
+        return counts
+
+
+# Singleton instance
+_ai_job_service = None
+_ai_job_lock = threading.Lock()
+
+def get_ai_job_service():
+    """Get or create the AI job service instance"""
+    global _ai_job_service
+    if _ai_job_service is None:
+        with _ai_job_lock:
+            if _ai_job_service is None:
+                _ai_job_service = AIJobService(
+                    max_workers=int(os.getenv('AI_JOB_WORKERS', 16)),
+                    ttl=int(os.getenv('AI_JOB_TTL', 600))
+                )
+    return _ai_job_service
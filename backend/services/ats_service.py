@@ -0,0 +1,461 @@
+"""
+ATS Service - local, deterministic resume scoring
+
+Scores a resume the way an applicant tracking system would, with no LLM
+call. Both texts are tokenized into single terms and adjacent-word phrases.
+Job-description terms are weighted by TF-IDF (NumPy). The score combines:
+- keyword coverage: the share of the job's key terms found in the resume
+- cosine similarity of the two TF-IDF vectors
+- structural checks: sections, contact details, quantified results,
+  action verbs and length
+
+The same inputs always give the same result, and an analysis takes a few
+milliseconds. A resume's term counts and checks are cached by the hash of
+its text.
+"""
+
+import re
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from services.resume_digest import section_for, resume_hash
+
+TOKEN_RE = re.compile(r"[a-z][a-z0-9]*(?:\+\+|#|(?:[./-][a-z0-9]+)+)?")
+PHRASE_BREAK_RE = re.compile(r'[\n,;:|()!?•●]|\.(?:\s|$)')
+SEGMENT_RE = re.compile(r'[\n;•●]|\.(?:\s|$)')
+
+STOPWORDS = frozenset("""
+a about above after again against all also am an and any are as at be because been before being below
+between both but by can could did do does doing down during each etc few for from further had has have
+having he her here hers herself him himself his how i if in into is it its itself just least less let like
+may me might more most must my myself no nor not now of off on once only or other our ours ourselves out
+over own per same shall she should so some such than that the their theirs them themselves then there
+these they this those through to too under until up upon very via was we were what when where which while
+who whom why will with within without would you your yours yourself yourselves
+ability able across applicant apply based candidate candidates career company day demonstrated desired
+environment excellent experience experienced familiar familiarity good great help ideal including
+job join knowledge looking new opportunity plus position preferred proven related required requirement
+requirements responsibilities responsible role skills strong team teams understanding using well work
+working year years
+""".split())
+
+# Terms that are worth flagging as missing even if the job mentions them once
+SKILL_LEXICON = frozenset("""
+agile airflow android angular ansible api apis aws azure bash bigquery c c# c++ cassandra ci/cd css
+django docker elasticsearch excel express fastapi figma firebase flask gcp git github go golang
+graphql hadoop html java javascript jenkins jira jquery kafka keras kotlin kubernetes linux matlab
+microservices mongodb mysql next.js nginx node.js nosql numpy opencv pandas php postgresql powerbi
+pytorch python r react react.js redis rest scala scikit-learn selenium snowflake spark spring sql
+swift tableau tensorflow terraform typescript unix vue vue.js
+""".split()) | frozenset({
+    'machine learning', 'deep learning', 'data analysis', 'data structures', 'system design',
+    'computer vision', 'natural language', 'unit testing', 'rest api', 'cloud computing',
+    'power bi', 'spring boot', 'data science', 'web development', 'full stack'
+})
+
+ACTION_VERBS = frozenset("""
+achieved analyzed architected automated built collaborated created cut debugged decreased delivered
+deployed designed developed drove engineered enhanced established handled implemented improved increased
+integrated launched led maintained managed mentored migrated optimized organized owned planned produced
+published reduced refactored researched resolved scaled shipped simplified spearheaded streamlined
+tested trained
+""".split())
+
+EMAIL_RE = re.compile(r'[\w.+-]+@[\w-]+\.[\w.]+')
+PHONE_RE = re.compile(r'(?:\+?\d[\s().-]?){10,}')
+LINK_RE = re.compile(r'linkedin|github|portfolio|https?://', re.IGNORECASE)
+METRIC_RE = re.compile(r'\d+(?:\.\d+)?\s*(?:%|x\b|\+|k\b|ms\b)|[$₹€£]\s?\d')
+
+# Sections an ATS expects; experience is satisfied by projects for students
+ESSENTIAL_SECTIONS = ('skills', 'experience', 'education')
+
+KEYWORD_LIMIT = 12
+
+# Pages read from a resume PDF for scoring
+MAX_RESUME_PAGES = 20
+
+
+def tokenize(text):
+    """
+    Split text into terms: single words plus adjacent two-word phrases
+
+    Args:
+        text (str): Resume or job description text
+
+    Returns:
+        list: Terms (stopwords removed; phrases never span a stopword,
+        punctuation or line break)
+    """
+    terms = []
+    for line in PHRASE_BREAK_RE.split(text.lower()):
+        previous = None
+        for token in TOKEN_RE.findall(line):
+            token = token.rstrip('.-/')
+            if token in STOPWORDS or (len(token) == 1 and token not in ('c', 'r')):
+                previous = None
+                continue
+            terms.append(token)
+            if previous:
+                terms.append(f"{previous} {token}")
+            previous = token
+    return terms
+
+
+def _segments(text):
+    """Lines/sentences used as documents for IDF"""
+    # Only split where tokenize() breaks phrases too, so segment terms are a subset
+    return [s for s in SEGMENT_RE.split(text) if s.strip()]
+
+
+def _section_checks(resume_text):
+    sections = set()
+    for raw in resume_text.splitlines():
+        section = section_for(raw)
+        if section:
+            sections.add(section)
+
+    lines = [l.strip() for l in resume_text.splitlines() if l.strip()]
+    action_lines = sum(
+        1 for l in lines
+        if (re.sub(r'^[^a-zA-Z]+', '', l).split() or [''])[0].lower() in ACTION_VERBS
+    )
+    word_count = len(resume_text.split())
+    return {
+        'sections': sorted(sections),
+        'has_email': bool(EMAIL_RE.search(resume_text)),
+        'has_phone': bool(PHONE_RE.search(resume_text)),
+        'has_links': bool(LINK_RE.search(resume_text)),
+        'quantified_results': len(METRIC_RE.findall(resume_text)),
+        'action_verb_bullets': action_lines,
+        'word_count': word_count
+    }
+
+
+def structure_score(checks):
+    """
+    Score resume structure from 0 to 1
+
+    Args:
+        checks (dict): Output of the section checks
+
+    Returns:
+        float: Weighted share of checks passed
+    """
+    sections = set(checks['sections'])
+    if 'projects' in sections:
+        sections.add('experience')
+    parts = [
+        (0.30, sum(s in sections for s in ESSENTIAL_SECTIONS) / len(ESSENTIAL_SECTIONS)),
+        (0.15, (checks['has_email'] + checks['has_phone']) / 2),
+        (0.05, float(checks['has_links'])),
+        (0.20, min(1.0, checks['quantified_results'] / 3)),
+        (0.20, min(1.0, checks['action_verb_bullets'] / 5)),
+        (0.10, 1.0 if 250 <= checks['word_count'] <= 1000 else 0.5),
+    ]
+    return sum(weight * value for weight, value in parts)
+
+
+class ATSAnalyzer:
+    """Keyword/TF-IDF resume scorer with cached resume profiles"""
+
+    def __init__(self, cache_size=64, job_cache_size=1000):
+        """
+        Args:
+            cache_size (int): Resume profiles kept in memory
+            job_cache_size (int): Tokenized job descriptions kept in memory
+        """
+        self.cache_size = cache_size
+        self.job_cache_size = job_cache_size
+        self._profiles = OrderedDict()
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def profile(self, resume_text):
+        """
+        Tokenize and check a resume once; later calls hit the cache
+
+        Args:
+            resume_text (str): Text extracted from the resume
+
+        Returns:
+            dict: resume_hash, term counts, segments and structural checks
+        """
+        key = resume_hash(resume_text)
+        with self._lock:
+            cached = self._profiles.get(key)
+            if cached is not None:
+                self._profiles.move_to_end(key)
+                return cached
+
+        checks = _section_checks(resume_text)
+        profile = {
+            'resume_hash': key,
+            'counts': Counter(tokenize(resume_text)),
+            'segments': [set(tokenize(s)) for s in _segments(resume_text)],
+            'checks': checks,
+            'structure': structure_score(checks)
+        }
+        with self._lock:
+            self._profiles[key] = profile
+            while len(self._profiles) > self.cache_size:
+                self._profiles.popitem(last=False)
+        return profile
+
+    def cached_profile(self, key):
+        """Profile for a resume hash if it is still cached, else None"""
+        with self._lock:
+            return self._profiles.get(key)
+
+    def _job_terms(self, job_description):
+        """Term counts and segment term sets for a job description (cached)"""
+        key = resume_hash(job_description)
+        with self._lock:
+            cached = self._jobs.get(key)
+            if cached is not None:
+                self._jobs.move_to_end(key)
+                return cached
+        terms = (Counter(tokenize(job_description)), [set(tokenize(s)) for s in _segments(job_description)])
+        with self._lock:
+            self._jobs[key] = terms
+            while len(self._jobs) > self.job_cache_size:
+                self._jobs.popitem(last=False)
+        return terms
+
+    def _score_jobs(self, profile, job_descriptions, keyword_limit=KEYWORD_LIMIT):
+        """
+        Score one resume against many job descriptions in one vectorized pass
+
+        All texts share one vocabulary; the job TF-IDF matrix (jobs x terms)
+        is scored against the resume vector with matrix products.
+
+        Args:
+            profile (dict): Resume profile from profile()
+            job_descriptions (list): Job description texts
+            keyword_limit (int): Matched/missing keywords kept per job
+
+        Returns:
+            list: Per job (same order) a dict with similarity, keyword_coverage,
+            matched_keywords and missing_keywords, or None for an empty description
+        """
+        import numpy as np
+
+        jobs = [self._job_terms(text) for text in job_descriptions]
+        resume_counts = profile['counts']
+
+        vocab = sorted(set(resume_counts).union(*(counts for counts, _ in jobs)))
+        index = {term: i for i, term in enumerate(vocab)}
+        size = len(vocab)
+
+        # Document frequency over every resume and job segment gives term specificity
+        segments = list(profile['segments'])
+        for _, job_segments in jobs:
+            segments.extend(job_segments)
+        df = np.bincount([index[t] for segment in segments for t in segment], minlength=size)
+        idf = np.log((1 + len(segments)) / (1 + df)) + 1
+
+        def row(counts):
+            cols = np.fromiter((index[t] for t in counts), dtype=np.int64, count=len(counts))
+            tf = np.fromiter((counts[t] for t in counts), dtype=np.float64, count=len(counts))
+            return cols, tf
+
+        # Sublinear term frequencies, weighted by IDF
+        resume_cols, resume_tf = row(resume_counts)
+        resume_vec = np.zeros(size)
+        resume_vec[resume_cols] = 1 + np.log(resume_tf)
+        resume_vec *= idf
+        present = np.zeros(size, dtype=bool)
+        present[resume_cols] = True
+
+        job_matrix = np.zeros((len(jobs), size))
+        job_raw = np.zeros((len(jobs), size))
+        for i, (counts, _) in enumerate(jobs):
+            if counts:
+                cols, tf = row(counts)
+                job_raw[i, cols] = tf
+                job_matrix[i, cols] = 1 + np.log(tf)
+        job_matrix *= idf
+
+        norms = np.linalg.norm(job_matrix, axis=1) * np.linalg.norm(resume_vec)
+        dots = job_matrix @ resume_vec
+        similarity = np.divide(dots, norms, out=np.zeros(len(jobs)), where=norms > 0)
+
+        # Key terms: known skills (double weight), or anything a job repeats
+        skill = np.fromiter((t in SKILL_LEXICON for t in vocab), dtype=bool, count=size)
+        keyword_weights = job_matrix * ((job_raw >= 2) | (skill & (job_raw > 0))) * np.where(skill, 2.0, 1.0)
+        totals = keyword_weights.sum(axis=1)
+        covered = keyword_weights @ present
+        coverage = np.divide(covered, totals, out=np.zeros(len(jobs)), where=totals > 0)
+
+        results = []
+        for i, (counts, _) in enumerate(jobs):
+            if not counts:
+                results.append(None)
+                continue
+            weights = keyword_weights[i]
+            order = np.flatnonzero(weights)
+            order = order[np.argsort(-weights[order], kind='stable')]
+            missing = [vocab[j] for j in order if not present[j]]
+            matched = [vocab[j] for j in order if present[j]]
+            # Drop single words already covered by a listed phrase ("learning" under "machine learning")
+            missing = [t for t in missing if not any(t != m and t in m.split() for m in missing)]
+            matched = [t for t in matched if not any(t != m and t in m.split() for m in matched)]
+            results.append({
+                'similarity': round(float(similarity[i]), 3),
+                'keyword_coverage': round(float(coverage[i]), 3),
+                'matched_keywords': matched[:keyword_limit],
+                'missing_keywords': missing[:keyword_limit]
+            })
+        return results
+
+    @staticmethod
+    def _match_score(match, structure):
+        """0-100 score; keyword coverage dominates, as it does in real ATS filters"""
+        similarity_score = min(1.0, match['similarity'] / 0.35)
+        return 100 * (0.55 * match['keyword_coverage'] + 0.25 * similarity_score + 0.20 * structure)
+
+    def analyze(self, resume_text, job_description=None):
+        """
+        Analyze a resume, optionally against a job description
+
+        Args:
+            resume_text (str): Text extracted from the resume
+            job_description (str, optional): Target job description
+
+        Returns:
+            dict: score (0-100), missing/matched keywords, strengths, weaknesses,
+            suggestions, summary, the underlying checks and timing
+        """
+        start = time.perf_counter()
+        profile = self.profile(resume_text)
+        checks = profile['checks']
+        match = self._score_jobs(profile, [job_description])[0] if job_description else None
+
+        if match:
+            score = self._match_score(match, profile['structure'])
+        else:
+            score = 100 * profile['structure']
+
+        result = {
+            'score': int(round(score)),
+            'missing_keywords': match['missing_keywords'] if match else [],
+            'matched_keywords': match['matched_keywords'] if match else [],
+            'keyword_coverage': match['keyword_coverage'] if match else None,
+            'similarity': match['similarity'] if match else None,
+            'structure_score': round(profile['structure'], 3),
+            'checks': checks,
+            'resume_hash': profile['resume_hash']
+        }
+        result.update(self._feedback(checks, match))
+        result['elapsed_ms'] = round((time.perf_counter() - start) * 1000, 2)
+        return result
+
+    def rank(self, profile, jobs, limit=None):
+        """
+        Rank job descriptions by how well a resume fits them
+
+        Args:
+            profile (dict): Resume profile from profile() or cached_profile()
+            jobs (list): Job descriptions as strings or dicts with 'text' plus
+                optional 'id' and 'title'
+            limit (int, optional): Keep only the best N
+
+        Returns:
+            dict: resume_hash, ranked results (id, title, score, coverage,
+            similarity, top matched/missing keywords) and timing
+        """
+        start = time.perf_counter()
+        jobs = [job if isinstance(job, dict) else {'text': job} for job in jobs]
+        matches = self._score_jobs(profile, [job.get('text') or '' for job in jobs], keyword_limit=5)
+
+        ranked = []
+        for position, (job, match) in enumerate(zip(jobs, matches)):
+            if match is None:
+                continue
+            ranked.append({
+                'id': job.get('id', position),
+                'title': job.get('title'),
+                'score': int(round(self._match_score(match, profile['structure']))),
+                **match
+            })
+        ranked.sort(key=lambda r: -r['score'])
+
+        return {
+            'resume_hash': profile['resume_hash'],
+            'results': ranked[:limit] if limit else ranked,
+            'count': len(ranked),
+            'elapsed_ms': round((time.perf_counter() - start) * 1000, 2)
+        }
+
+    @staticmethod
+    def _feedback(checks, match):
+        """Plain-language strengths, weaknesses and suggestions from the checks"""
+        strengths, weaknesses, suggestions = [], [], []
+        sections = set(checks['sections'])
+
+        if match:
+            pct = round(match['keyword_coverage'] * 100)
+            if pct >= 70:
+                strengths.append(f"Covers {pct}% of the job's key terms")
+            else:
+                weaknesses.append(f"Covers only {pct}% of the job's key terms")
+            if match['missing_keywords']:
+                suggestions.append(
+                    "Add the missing keywords you genuinely have experience with: "
+                    + ', '.join(match['missing_keywords'][:5])
+                )
+
+        present = [s for s in ESSENTIAL_SECTIONS if s in sections or (s == 'experience' and 'projects' in sections)]
+        absent = [s for s in ESSENTIAL_SECTIONS if s not in present]
+        if present:
+            strengths.append(f"Clear {', '.join(present)} section{'s' if len(present) > 1 else ''}")
+        if absent:
+            weaknesses.append(f"No recognizable {', '.join(absent)} heading")
+            suggestions.append(f"Add standard section headings ({', '.join(s.capitalize() for s in absent)}) so parsers can find them.")
+
+        if checks['quantified_results'] >= 3:
+            strengths.append(f"{checks['quantified_results']} quantified results")
+        else:
+            weaknesses.append("Few quantified results")
+            suggestions.append("Quantify your impact with numbers (e.g. 'cut load time by 40%').")
+
+        if checks['action_verb_bullets'] >= 5:
+            strengths.append("Bullets lead with action verbs")
+        else:
+            suggestions.append("Start bullet points with action verbs such as Built, Designed or Improved.")
+
+        if not (checks['has_email'] and checks['has_phone']):
+            weaknesses.append("Contact details incomplete (email and phone)")
+        if not checks['has_links']:
+            suggestions.append("Include a link to your GitHub, LinkedIn or portfolio in the header.")
+
+        if checks['word_count'] < 250:
+            weaknesses.append(f"Short resume ({checks['word_count']} words)")
+        elif checks['word_count'] > 1000:
+            weaknesses.append(f"Long resume ({checks['word_count']} words); ATS readers skim")
+
+        if match:
+            summary = (f"Matches {round(match['keyword_coverage'] * 100)}% of the job's key terms "
+                       f"with {match['similarity']:.2f} content similarity.")
+        else:
+            summary = "Structural review only; add a job description to check keyword match."
+        if weaknesses:
+            summary += f" Main gap: {weaknesses[0].lower()}."
+
+        return {
+            'strengths': strengths,
+            'weaknesses': weaknesses,
+            'suggestions': suggestions,
+            'summary': summary
+        }
+
+
+# Singleton instance
+_ats_analyzer = None
+
+def get_ats_analyzer():
+    """Get or create the ATS analyzer instance"""
+    global _ats_analyzer
+    if _ats_analyzer is None:
+        _ats_analyzer = ATSAnalyzer()
+    return _ats_analyzer
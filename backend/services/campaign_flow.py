@@ -0,0 +1,290 @@
+"""
+Campaign Flow - the per-recipient steps of a campaign run
+
+CampaignRunner sends a campaign and CampaignSimulator projects one. Both
+walk the recipients through the same decisions: which recipient is next
+(due retries, then the domain rotation), the duplicate and suppression
+checks, the send window, the email content (template or AI), waiting for a
+sender account and retrying transient failures. Those decisions live here
+so a dry run cannot drift from a real one. The caller supplies only what
+differs: the clock, the transport and where outcomes are recorded.
+"""
+
+import time
+
+from services.tracking_service import get_tracking_service
+from services.suppression_service import get_suppression_service
+from services.retry_queue import RetryQueue
+from services.template_service import compile_template, render_email, build_context, escape_braces
+from services.send_window import SendWindow
+from services.domain_dispatcher import DomainDispatcher, recipient_domain
+
+# Waits longer than this hand the campaign to the scheduler instead of
+# keeping the runner alive (next send window, daily quota reset)
+SCHEDULE_AFTER = 300
+
+# Mailbox providers: contacts on these domains don't share an employer
+FREE_MAIL_DOMAINS = {
+    'gmail.com', 'googlemail.com', 'yahoo.com', 'outlook.com', 'hotmail.com',
+    'live.com', 'icloud.com', 'aol.com', 'protonmail.com', 'proton.me', 'zoho.com',
+}
+
+# Outcomes of RecipientFlow.screen()
+DUPLICATE = 'duplicate'
+SUPPRESSED = 'suppressed'
+DEFERRED = 'deferred'
+
+# Why nobody can be sent to right now, as reported by next_wait()
+WAIT_SEND_WINDOW = 'Outside the send window'
+WAIT_RETRY = 'Waiting to retry failed sends'
+WAIT_DOMAIN_LIMIT = 'Remaining domains are rate-limited'
+
+
+def company_key(recipient):
+    """
+    Group recipients by company name, or by email domain if it is missing.
+    Free-mail addresses get a group of their own.
+    """
+    company = (recipient.get('company') or '').strip().lower()
+    if company:
+        return f'company:{company}'
+    domain = recipient['email'].rsplit('@', 1)[-1].lower()
+    if domain in FREE_MAIL_DOMAINS:
+        return f'email:{recipient["email"].lower()}'
+    return f'domain:{domain}'
+
+
+def company_from_domain(email):
+    """Best-effort company name from an email domain ('jobs.acme.com' -> 'Acme')"""
+    domain = email.rsplit('@', 1)[-1].lower()
+    if domain in FREE_MAIL_DOMAINS:
+        return ''
+    parts = domain.split('.')
+    return (parts[-2] if len(parts) >= 2 else parts[0]).capitalize()
+
+
+def compile_draft(text):
+    """
+    Compile a company-level AI draft into a per-recipient template
+
+    Only the name placeholder is filled in; any other braces in the model's
+    output are kept as written, so the draft cannot fail to compile.
+    """
+    from services.gemini_service import NAME_PLACEHOLDER
+
+    return compile_template(escape_braces(text, keep=(NAME_PLACEHOLDER,)))
+
+
+class RecipientFlow:
+    """Orders recipients and makes every per-recipient decision of a campaign"""
+
+    def __init__(self, config, params, clock=time.time, generator=None, resume_text=None,
+                 is_contacted=None, suppression_service=None, log=None):
+        """
+        Args:
+            config (dict): Settings (SEND_*, DOMAIN_*)
+            params (dict): Campaign parameters as accepted by /send_emails
+            clock (callable): Time source (a virtual clock in dry runs)
+            generator (GeminiEmailGenerator, optional): AI content; None sends the template
+            resume_text (str, optional): Resume text for the prompts' digest
+            is_contacted (callable, optional): address -> bool duplicate check
+                (TrackingService.is_email_sent by default)
+            suppression_service (SuppressionService, optional): Suppression lists to check
+            log (callable, optional): Receives progress messages
+        """
+        self.clock = clock
+        self.generator = generator
+        self.resume_text = resume_text
+        self.ai_mode = params.get('ai_mode', 'recipient')
+        self.subject_template = compile_template(params.get('subject'))
+        self.body_template = compile_template(params.get('body'))
+        self.send_window = SendWindow.from_params(params.get('send_window'))
+        self.is_contacted = is_contacted or get_tracking_service().is_email_sent
+        self.suppression_service = suppression_service or get_suppression_service()
+        self.log = log or (lambda message: None)
+        # Company-level AI drafts, keyed by company_key()
+        self.company_drafts = {}
+
+        self.retry_queue = RetryQueue(
+            max_attempts=config['SEND_MAX_ATTEMPTS'],
+            base_delay=config['SEND_RETRY_BASE_DELAY'],
+            max_delay=config['SEND_RETRY_MAX_DELAY'],
+            clock=clock
+        )
+        # New recipients are interleaved by domain, each domain rate-limited
+        self.dispatcher = DomainDispatcher(
+            min_interval=config['DOMAIN_MIN_INTERVAL'],
+            max_per_hour=config['DOMAIN_MAX_PER_HOUR'],
+            unthrottled=FREE_MAIL_DOMAINS,
+            clock=clock
+        )
+
+    def add(self, recipient):
+        """Queue a recipient (a dict with 'email' and 'idx') for its first attempt"""
+        self.dispatcher.add(recipient, recipient_domain(recipient['email']))
+
+    def next_recipient(self):
+        """
+        Due retries go first, then the next domain in the rotation
+
+        Returns:
+            dict: Recipient to handle now, or None if all are waiting
+        """
+        recipient = self.retry_queue.pop_due()
+        if recipient is not None and recipient.get('attempt', 0) == 0:
+            # Its send window opened: back in line behind its domain
+            self.add(recipient)
+            recipient = None
+        if recipient is None:
+            recipient = self.dispatcher.next_ready()
+        return recipient
+
+    def next_wait(self):
+        """
+        Time until a waiting recipient is ready, and why it is waiting
+
+        Returns:
+            tuple: (seconds, reason), or (None, None) if no recipients are left
+        """
+        retry_wait = self.retry_queue.next_due_in()
+        domain_wait = self.dispatcher.seconds_until_ready()
+        if retry_wait is None and domain_wait is None:
+            return None, None
+        if domain_wait is None or (retry_wait is not None and retry_wait <= domain_wait):
+            # Recorded where the recipient was deferred or scheduled for a retry
+            return retry_wait, self.retry_queue.next_reason() or WAIT_RETRY
+        return domain_wait, WAIT_DOMAIN_LIMIT
+
+    def screen(self, recipient):
+        """
+        Checks before a first attempt: duplicates, suppressions, send window
+
+        A recipient outside its send window is deferred until it opens.
+
+        Returns:
+            tuple: (DUPLICATE, None), (SUPPRESSED, list name) or (DEFERRED, opens_at);
+            None if the recipient may be sent to now
+        """
+        if recipient.get('attempt', 0):
+            return None
+        address = recipient['email']
+        if self.is_contacted(address):
+            return DUPLICATE, None
+        suppressed_by = self.suppression_service.match(address)
+        if suppressed_by:
+            return SUPPRESSED, suppressed_by
+        if self.send_window:
+            now = self.clock()
+            opens_at = self.send_window.next_open(now, recipient)
+            if opens_at > now:
+                self.defer(recipient, opens_at, WAIT_SEND_WINDOW)
+                return DEFERRED, opens_at
+        return None
+
+    def render(self, recipient):
+        """The campaign template personalized for the recipient"""
+        return render_email(self.subject_template, self.body_template, recipient)
+
+    def content(self, recipient):
+        """
+        Subject and body to send
+
+        Retries reuse the content generated for the first attempt. Otherwise
+        the template is personalized locally and AI (if enabled) replaces it.
+
+        Returns:
+            tuple: (subject, body)
+        """
+        if recipient.get('attempt', 0):
+            return recipient['_subject'], recipient['_body']
+
+        email_subject, email_body = self.render(recipient)
+        if self.generator is None:
+            return email_subject, email_body
+
+        recipient_name = recipient.get('name', 'Hiring Manager')
+        company = recipient.get('company', '')
+        try:
+            if self.ai_mode == 'company':
+                return self.company_draft(recipient)
+            email_subject = self.generator.generate_subject(recipient_name, company)
+            email_body = self.generator.generate_email(recipient_name, company, resume_text=self.resume_text)
+            self.log(f'🤖 AI content generated for {recipient_name}')
+        except Exception:
+            self.log(f'⚠️ AI generation failed for {recipient_name}, using template')
+        return email_subject, email_body
+
+    def company_draft(self, recipient):
+        """
+        Render the shared AI draft for the recipient's company, generating it
+        on first use
+
+        Returns:
+            tuple: (subject, body)
+        """
+        key = company_key(recipient)
+        draft = self.company_drafts.get(key)
+        if draft is None:
+            company = recipient.get('company') or company_from_domain(recipient['email'])
+            subject = self.generator.generate_subject(company=company)
+            body = compile_draft(self.generator.generate_company_email(company, resume_text=self.resume_text))
+            draft = self.company_drafts[key] = (subject, body)
+            self.log(f'🤖 AI draft generated for {company or recipient["email"]} '
+                     f'({len(self.company_drafts)} Gemini drafts so far)')
+
+        subject, body_template = draft
+        return subject, body_template.render(build_context(recipient))
+
+    def acquire_sender(self, sender_pool, sleep, cancelled=None):
+        """
+        Wait until an account in the pool may send
+
+        Args:
+            sender_pool (SenderPool): Accounts to send from
+            sleep (callable): Waits the given number of seconds (real or virtual)
+            cancelled (callable, optional): Stop waiting when it returns True
+
+        Returns:
+            SenderAccount: Account to send with, or None if cancelled or out of
+            quota for longer than SCHEDULE_AFTER
+        """
+        while not (cancelled and cancelled()):
+            account = sender_pool.acquire()
+            if account is not None:
+                return account
+
+            wait = sender_pool.seconds_until_available()
+            if wait is None:
+                # Every account used its daily quota; wait only for a slot that frees up soon
+                wait = sender_pool.seconds_until_quota()
+                if wait is None or wait > SCHEDULE_AFTER:
+                    return None
+            sleep(wait)
+        return None
+
+    def record_send(self, recipient):
+        """Count a send against the recipient's domain limits"""
+        self.dispatcher.record_send(recipient_domain(recipient['email']))
+
+    def schedule_retry(self, recipient, result, email_subject, email_body):
+        """
+        Queue a failed send again if the error is transient and attempts remain
+
+        Args:
+            recipient (dict): Recipient whose send failed
+            result (SendResult): Outcome of the send
+            email_subject (str): Subject to reuse
+            email_body (str): Body to reuse
+
+        Returns:
+            float: Seconds until the retry, or None if the recipient has failed
+        """
+        if not getattr(result, 'retryable', False):
+            return None
+        attempt = recipient.get('attempt', 0) + 1
+        retry = dict(recipient, attempt=attempt, _subject=email_subject, _body=email_body)
+        return self.retry_queue.schedule(retry, attempt, getattr(result, 'retry_after', None), WAIT_RETRY)
+
+    def defer(self, recipient, until, reason):
+        """Hold a recipient back until the given time, then check it again"""
+        self.retry_queue.defer(recipient, until, reason)
@@ -0,0 +1,340 @@
+"""
+Campaign Runner - sends one checkpointed campaign to completion
+
+The runner owns no web state: it reads the campaign and its credentials from
+the campaign store and writes progress, logs and heartbeats back to it. The
+same runner is used by the in-process thread (development) and by the
+standalone worker process (`python worker.py`).
+"""
+
+import time
+from datetime import datetime
+
+from services.file_service import FileService
+from services.gmail_service import get_gmail_service
+from services.gemini_service import get_gemini_service
+from services.tracking_service import get_tracking_service
+from services.suppression_service import get_suppression_service
+from services.campaign_service import get_campaign_service
+from services.sender_pool import SenderPool
+from services.credential_manager import get_credential_manager
+from services.gemini_governor import gemini_priority, PRIORITY_BACKGROUND
+from services.campaign_scheduler import get_campaign_scheduler
+from services.campaign_flow import RecipientFlow, SCHEDULE_AFTER, DUPLICATE, SUPPRESSED
+
+HEARTBEAT_INTERVAL = 5
+
+
+class CampaignRunner:
+    """Runs a single campaign, checkpointing every recipient"""
+
+    def __init__(self, campaign_id, config, campaign_service=None, worker_id=None):
+        """
+        Args:
+            campaign_id (str): Campaign to run (must already be claimed as running)
+            config (dict): Settings (MAX_EMAILS_PER_HOUR, MAX_EMAILS_PER_DAY, SENDER_*)
+            campaign_service (CampaignService, optional): Store to use
+            worker_id (str, optional): Identity the campaign was claimed with; the
+                run stops if another runner claims it
+        """
+        self.campaign_id = campaign_id
+        self.config = config
+        self.worker_id = worker_id
+        self.campaign_service = campaign_service or get_campaign_service()
+        self._last_heartbeat = 0
+
+    def log(self, message):
+        """Append a progress log line visible to every process"""
+        self.campaign_service.add_log(self.campaign_id, message)
+
+    def heartbeat(self, force=False):
+        """Tell the store this runner is alive (throttled)"""
+        now = time.time()
+        if force or now - self._last_heartbeat >= HEARTBEAT_INTERVAL:
+            self.campaign_service.heartbeat(self.campaign_id)
+            self._last_heartbeat = now
+
+    def stop_reason(self):
+        """
+        Why this runner must stop sending, if it must
+
+        Cancellation is requested by setting the stored status. Any other
+        status than 'running' (e.g. flagged interrupted after missed
+        heartbeats), or a claim by another runner after a resume, means this
+        runner no longer owns the campaign.
+
+        Returns:
+            str: 'cancelled', 'lost', or None to keep sending
+        """
+        status, owner = self.campaign_service.get_run_state(self.campaign_id)
+        if status == 'running' and (self.worker_id is None or owner == self.worker_id):
+            return None
+        return 'cancelled' if status == 'cancelled' else 'lost'
+
+    def pause(self, wait):
+        """Sleep in short steps so heartbeats continue and cancellation stays responsive"""
+        self.heartbeat()
+        time.sleep(min(max(wait, 0.05), 1.0))
+
+    def run(self):
+        """
+        Send the campaign's pending recipients.
+
+        Progress is checkpointed per recipient in the campaign store, so running
+        the same campaign again continues where the last run stopped.
+        Recipients are sharded across every account stored with the campaign,
+        each with its own quota, and taken round-robin across recipient
+        domains so no domain receives a burst. Transient send failures are deferred to a
+        retry queue and interleaved with new sends once due, as are recipients
+        outside the campaign's send window. When the next send is more than
+        SCHEDULE_AFTER away (daily quota used, window closed) the campaign is
+        scheduled to continue then and the runner exits.
+        """
+        # Campaign drafts queue behind interactive AI requests for Gemini quota
+        with gemini_priority(PRIORITY_BACKGROUND):
+            self._run()
+
+    def _run(self):
+        campaign_id = self.campaign_id
+        campaign_service = self.campaign_service
+        self.heartbeat(force=True)
+
+        try:
+            campaign = campaign_service.get_campaign(campaign_id)
+            params = campaign['params']
+            resume_file = params.get('resume_file')
+            max_emails = params.get('max_emails', 30)
+            use_ai = params.get('use_ai', False)
+
+            tracking_service = get_tracking_service()
+            suppression_service = get_suppression_service()
+            # Lists imported by another process since the filter was loaded
+            suppression_service.refresh()
+
+            if not campaign['loaded']:
+                # Extract emails from CSV (only on the first run)
+                file_service = FileService()
+                recipients = file_service.extract_emails_from_csv(params['csv_file'], max_emails)
+
+                if not recipients:
+                    self.log('❌ No valid emails found in CSV file')
+                    campaign_service.set_status(campaign_id, 'error', 'No valid emails found in CSV file')
+                    return
+
+                campaign_service.load_recipients(campaign_id, recipients)
+                self.log(f'📧 Found {len(recipients)} recipients')
+            else:
+                uncertain = campaign_service.recover_in_flight(campaign_id, tracking_service)
+                for address in uncertain:
+                    self.log(f'⚠️ {address} was in flight when the last run stopped, not resending')
+                self.log(f'🔁 Resuming campaign {campaign_id}')
+
+            # Get services
+            gmail_service = get_gmail_service()
+            gemini_service = None
+
+            resume_text = None
+
+            if use_ai:
+                try:
+                    gemini_service = get_gemini_service()
+                    self.log('🤖 AI personalization enabled')
+                    # Extracted once; prompts carry its compact cached digest
+                    if resume_file:
+                        resume_text = gemini_service.extract_resume_text(resume_file)
+                except Exception:
+                    self.log('⚠️ AI not available, using template')
+
+            # Send emails with per-account rate limiting
+            sender_pool = SenderPool(
+                hourly_quota=self.config['MAX_EMAILS_PER_HOUR'],
+                daily_quota=self.config['MAX_EMAILS_PER_DAY'],
+                strategy=self.config['SENDER_POOL_STRATEGY'],
+                max_consecutive_errors=self.config['SENDER_MAX_CONSECUTIVE_ERRORS'],
+                cooldown_seconds=self.config['SENDER_COOLDOWN_SECONDS'],
+                # Quotas are claimed in campaigns.db and shared with other runners
+                ledger=campaign_service
+            )
+            # Senders share one live, proactively refreshed credential per account
+            credential_manager = get_credential_manager()
+            accounts = campaign_service.get_accounts(campaign_id)
+            # Sends from earlier runs and campaigns still count against today's quota
+            history = campaign_service.recent_account_sends(list(accounts))
+            for account_id, credentials in accounts.items():
+                credential_manager.register(account_id, credentials, replace=False)
+                live_credentials = credential_manager.get(account_id)
+                sender_pool.add_account(account_id, live_credentials or credentials, history[account_id])
+            self.log(f'👥 Sending from {len(sender_pool)} Gmail account(s)')
+
+            flow = RecipientFlow(
+                self.config, params,
+                generator=gemini_service,
+                resume_text=resume_text,
+                is_contacted=tracking_service.is_email_sent,
+                suppression_service=suppression_service,
+                log=self.log
+            )
+
+            cancelled = False
+            # Set when the campaign was flagged or claimed elsewhere; its status is no longer ours
+            lost = False
+            quota_exhausted = False
+            # Set when the campaign should continue later (Unix time, reason)
+            resume_at = None
+            tracking_error = None
+            emails_sent_count = campaign_service.get_campaign(campaign_id)['counts'].get('sent', 0)
+
+            for recipient in campaign_service.get_pending_recipients(campaign_id):
+                flow.add(recipient)
+            if len(flow.dispatcher):
+                self.log(f'🌐 {len(flow.dispatcher)} recipients across {flow.dispatcher.stats()["domains"]} domains, '
+                         f'sent in rotation')
+
+            while True:
+                self.heartbeat()
+
+                # Check if cancelled or taken over
+                stop = self.stop_reason()
+                if stop is not None:
+                    cancelled, lost = stop == 'cancelled', stop == 'lost'
+                    self.log('🛑 Campaign cancelled by user' if cancelled
+                             else '⚠️ Campaign is no longer running on this runner, stopping')
+                    break
+
+                # Check for max emails limit in this campaign
+                if emails_sent_count >= max_emails:
+                    self.log(f'⏹️ Reached limit of {max_emails} emails for this run')
+                    break
+
+                recipient = flow.next_recipient()
+                if recipient is None:
+                    wait, reason = flow.next_wait()
+                    if wait is None:
+                        break
+                    if wait > SCHEDULE_AFTER:
+                        # Deferred recipients are still pending in the store
+                        resume_at = (time.time() + wait, reason)
+                        break
+                    # Only deferred or throttled recipients left: wait for the earliest one
+                    time.sleep(min(max(wait, 0.05), 1.0))
+                    continue
+
+                idx = recipient['idx']
+
+                account = None
+                try:
+                    recipient_email = recipient['email']
+
+                    screened = flow.screen(recipient)
+                    if screened is not None:
+                        outcome, detail = screened
+                        if outcome == DUPLICATE:
+                            # Don't increment current/sent count, just skip
+                            campaign_service.mark_recipient(campaign_id, idx, 'skipped')
+                        elif outcome == SUPPRESSED:
+                            # Unsubscribes, competitors, ...
+                            campaign_service.mark_recipient(campaign_id, idx, 'skipped', f'Suppressed ({detail})')
+                        # Deferred recipients come back when their send window opens
+                        continue
+
+                    email_subject, email_body = flow.content(recipient)
+
+                    # Wait for an account with quota left
+                    account = flow.acquire_sender(sender_pool, self.pause, lambda: self.stop_reason() is not None)
+                    if account is None:
+                        stop = self.stop_reason()
+                        if stop is not None:
+                            cancelled, lost = stop == 'cancelled', stop == 'lost'
+                            self.log('🛑 Campaign cancelled by user' if cancelled
+                                     else '⚠️ Campaign is no longer running on this runner, stopping')
+                        else:
+                            reset_in = sender_pool.seconds_until_quota()
+                            if reset_in is not None:
+                                resume_at = (time.time() + reset_in, 'Daily quota used on every account')
+                            else:
+                                quota_exhausted = True
+                                self.log('⏸️ Daily quota used on every account, pausing campaign')
+                        break
+
+                    # Checkpoint before handing the message to Gmail
+                    if not campaign_service.claim_recipient(campaign_id, idx, email_subject):
+                        sender_pool.release(account)
+                        continue
+                    flow.record_send(recipient)
+
+                    # Send email
+                    self.log(f'📤 Sending to {recipient_email} (account {account.account_id})...')
+
+                    result = gmail_service.send_email(
+                        account.credentials,
+                        recipient_email,
+                        email_subject,
+                        email_body,
+                        resume_file
+                    )
+
+                    if result:
+                        sender_pool.record_success(account)
+                        account = None
+                        # LOG SUCCESS TO DB
+                        try:
+                            tracking_service.log_email(recipient_email, 'sent', email_subject, campaign_id)
+                        except Exception as e:
+                            # Delivered but missing from the dedup table: stop
+                            # rather than keep sending without a record
+                            campaign_service.mark_recipient(campaign_id, idx, 'sent')
+                            tracking_error = f'Could not record the send to {recipient_email}: {e}'
+                            break
+                        campaign_service.mark_recipient(campaign_id, idx, 'sent')
+
+                        emails_sent_count += 1
+                        self.log(f'✅ Email sent to {recipient_email}')
+                        continue
+
+                    sender_pool.record_failure(account, getattr(result, 'retry_after', None))
+                    error = getattr(result, 'error', None) or 'Gmail API send failed'
+
+                    delay = flow.schedule_retry(recipient, result, email_subject, email_body)
+                    if delay is not None:
+                        campaign_service.release_recipient(campaign_id, idx, error)
+                        self.log(f'🔁 Temporary failure for {recipient_email}, retrying in {delay:.0f}s')
+                        continue
+
+                    # LOG FAILURE TO DB
+                    tracking_service.log_email(recipient_email, 'failed', email_subject, campaign_id)
+                    campaign_service.mark_recipient(campaign_id, idx, 'failed', error)
+
+                    self.log(f'❌ Failed to send to {recipient_email}')
+
+                except Exception as e:
+                    if account is not None:
+                        sender_pool.release(account)
+                    campaign_service.mark_recipient(campaign_id, idx, 'failed', str(e))
+                    self.log(f'❌ Error sending to {recipient.get("email", "unknown")}: {str(e)}')
+
+            if lost:
+                # Leave the status to whoever flagged or resumed the campaign
+                return
+
+            # Campaign complete
+            if tracking_error is not None:
+                self.log(f'❌ {tracking_error}')
+                campaign_service.set_status(campaign_id, 'error', tracking_error)
+            elif cancelled:
+                campaign_service.set_status(campaign_id, 'cancelled')
+            elif resume_at is not None:
+                run_at, reason = resume_at
+                campaign_service.schedule(campaign_id, run_at)
+                get_campaign_scheduler().schedule(campaign_id, run_at)
+                self.log(f'🗓️ {reason}, continuing at {datetime.fromtimestamp(run_at):%Y-%m-%d %H:%M}')
+            elif quota_exhausted:
+                campaign_service.set_status(campaign_id, 'paused')
+            else:
+                counts = campaign_service.get_campaign(campaign_id)['counts']
+                campaign_service.set_status(campaign_id, 'completed')
+                self.log(f'✨ Campaign completed: {counts.get("sent", 0)} sent, {counts.get("failed", 0)} failed')
+
+        except Exception as e:
+            self.log(f'❌ Campaign error: {str(e)}')
+            campaign_service.set_status(campaign_id, 'error', str(e))
+            print(f"Email worker error: {e}")
@@ -0,0 +1,170 @@
+"""
+Campaign Scheduler - continues multi-day campaigns when their next slot opens
+
+A runner that runs out of daily quota, or whose remaining recipients are
+all outside their send window, stores the campaign as `scheduled` with a
+`next_run_at` time and exits instead of holding a thread for hours. The
+scheduler keeps these campaigns in a priority queue ordered by due time.
+A single thread waits until exactly the earliest due time, not in fixed
+polling steps. When a campaign is due it is moved back to the queue and
+handed to the process's dispatch function.
+
+Every process that runs campaigns (the web app with CAMPAIGN_RUNNER=thread,
+or each `worker.py`) runs a scheduler. The move back to the queue is an atomic
+update in campaigns.db, so a campaign is released once, however many
+schedulers know about it. The queue is reloaded from the database
+periodically to pick up campaigns scheduled by other processes.
+"""
+
+import heapq
+import itertools
+import threading
+import time
+from datetime import datetime
+
+# Seconds between reloads of scheduled campaigns from the database
+RELOAD_INTERVAL = 300
+
+
+class CampaignScheduler:
+    """Min-heap of scheduled campaigns served by one precise timer thread"""
+
+    def __init__(self, campaign_service, reload_interval=RELOAD_INTERVAL, busy_delay=60):
+        """
+        Args:
+            campaign_service (CampaignService): Campaign store
+            reload_interval (float): Seconds between reloads from the database
+            busy_delay (float): Retry delay when the dispatcher cannot take a
+                due campaign yet (e.g. another campaign is running)
+        """
+        self.campaign_service = campaign_service
+        self.reload_interval = reload_interval
+        self.busy_delay = busy_delay
+        self.dispatch = None
+        self._heap = []
+        self._due = {}  # campaign_id -> run_at of its current heap entry
+        self._counter = itertools.count()
+        self._cond = threading.Condition()
+        self._thread = None
+        self._stopping = False
+
+    def schedule(self, campaign_id, run_at):
+        """
+        Add or move a campaign in the queue
+
+        Args:
+            campaign_id (str): Campaign identifier
+            run_at (float): Unix time it becomes due
+        """
+        with self._cond:
+            # Earlier entries for the campaign become stale and are skipped
+            self._due[campaign_id] = run_at
+            heapq.heappush(self._heap, (run_at, next(self._counter), campaign_id))
+            self._cond.notify()
+
+    def reload(self):
+        """Sync the queue with the campaigns stored as scheduled"""
+        stored = dict(self.campaign_service.get_scheduled())
+        with self._cond:
+            for campaign_id, run_at in stored.items():
+                if self._due.get(campaign_id) != run_at:
+                    self._due[campaign_id] = run_at
+                    heapq.heappush(self._heap, (run_at, next(self._counter), campaign_id))
+            for campaign_id in [c for c in self._due if c not in stored]:
+                del self._due[campaign_id]
+            self._cond.notify()
+
+    def _next_due(self, until):
+        """
+        Pop the next due campaign, waiting precisely until it is due
+
+        Returns:
+            str: Campaign ID, or None once `until` passes or the scheduler stops
+        """
+        with self._cond:
+            while not self._stopping:
+                now = time.time()
+                # Drop entries superseded by a later schedule() call
+                while self._heap and self._due.get(self._heap[0][2]) != self._heap[0][0]:
+                    heapq.heappop(self._heap)
+                if self._heap and self._heap[0][0] <= now:
+                    _, _, campaign_id = heapq.heappop(self._heap)
+                    del self._due[campaign_id]
+                    return campaign_id
+                if now >= until:
+                    return None
+                wake_at = min(self._heap[0][0], until) if self._heap else until
+                self._cond.wait(timeout=wake_at - now)
+            return None
+
+    def _run_due(self, campaign_id):
+        if not self.campaign_service.release_scheduled(campaign_id):
+            # Cancelled, resumed by hand or released by another process
+            return
+        if self.dispatch(campaign_id) is False:
+            run_at = time.time() + self.busy_delay
+            self.campaign_service.schedule(campaign_id, run_at)
+            self.schedule(campaign_id, run_at)
+        else:
+            print(f"🗓️ Scheduled campaign {campaign_id} started")
+
+    def _loop(self):
+        next_reload = time.time() + self.reload_interval
+        while not self._stopping:
+            campaign_id = self._next_due(next_reload)
+            try:
+                if campaign_id is not None:
+                    self._run_due(campaign_id)
+                elif not self._stopping:
+                    self.reload()
+                    next_reload = time.time() + self.reload_interval
+            except Exception as e:
+                print(f"Campaign scheduler error: {e}")
+
+    def start(self, dispatch):
+        """
+        Load scheduled campaigns and start the timer thread (idempotent)
+
+        Args:
+            dispatch (callable): Called with a campaign ID once it is queued
+                again; returning False means "not now" and retries after
+                `busy_delay`
+        """
+        with self._cond:
+            self.dispatch = dispatch
+            if self._thread is not None:
+                return
+            self._stopping = False
+            self._thread = threading.Thread(target=self._loop, name='campaign-scheduler', daemon=True)
+        self.reload()
+        self._thread.start()
+
+    def stop(self):
+        """Stop the timer thread"""
+        with self._cond:
+            self._stopping = True
+            self._thread = None
+            self._cond.notify()
+
+    def pending(self):
+        """Scheduled campaigns in due order, for status endpoints"""
+        with self._cond:
+            due = sorted((run_at, campaign_id) for campaign_id, run_at in self._due.items())
+        return [{'campaign_id': campaign_id,
+                 'next_run_at': datetime.fromtimestamp(run_at).isoformat(timespec='seconds')}
+                for run_at, campaign_id in due]
+
+
+# Singleton instance
+_campaign_scheduler = None
+_campaign_scheduler_lock = threading.Lock()
+
+def get_campaign_scheduler():
+    """Get or create the campaign scheduler instance"""
+    global _campaign_scheduler
+    if _campaign_scheduler is None:
+        with _campaign_scheduler_lock:
+            if _campaign_scheduler is None:
+                from services.campaign_service import get_campaign_service
+                _campaign_scheduler = CampaignScheduler(get_campaign_service())
+    return _campaign_scheduler
@@ -0,0 +1,855 @@
+"""
+Campaign Service for durable, resumable email campaigns using SQLite
+
+Every campaign is checkpointed: its parameters, its cursor position and the
+state of each recipient are written to disk as the worker progresses, so a
+campaign interrupted by a crash or restart can be resumed exactly where it
+stopped without re-reading the CSV.
+
+The database doubles as the queue between the web tier and campaign runner
+processes: the web tier enqueues campaigns, a runner claims them, and both
+sides read progress and logs from here.
+"""
+
+import sqlite3
+import os
+import json
+import time
+import uuid
+import logging
+from datetime import datetime
+
+# Recipient states
+PENDING = 'pending'
+SENDING = 'sending'
+SENT = 'sent'
+FAILED = 'failed'
+SKIPPED = 'skipped'
+UNCERTAIN = 'uncertain'
+
+# Waiting for its next send window or for daily quota; started by the scheduler
+SCHEDULED = 'scheduled'
+
+# Campaign statuses that may be picked up again by resume
+RESUMABLE_STATUSES = ('interrupted', 'cancelled', 'error', 'paused', SCHEDULED)
+
+# Campaign statuses that hold a runner slot
+ACTIVE_STATUSES = ('queued', 'running')
+
+
+class CampaignService:
+    """Service to checkpoint campaign progress and per-recipient state"""
+
+    DB_NAME = 'campaigns.db'
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path or os.path.join(os.path.dirname(os.path.dirname(__file__)), self.DB_NAME)
+        self._init_db()
+
+    def _connect(self):
+        """Open a connection that tolerates concurrent writers"""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _init_db(self):
+        """Initialize database with required tables"""
+        try:
+            conn = self._connect()
+            cursor = conn.cursor()
+
+            # WAL lets the progress endpoint read while the worker writes
+            cursor.execute('PRAGMA journal_mode=WAL')
+
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS campaigns (
+                    id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    params TEXT NOT NULL,
+                    loaded INTEGER DEFAULT 0,
+                    cursor INTEGER DEFAULT -1,
+                    created_at TIMESTAMP,
+                    updated_at TIMESTAMP,
+                    last_error TEXT,
+                    accounts TEXT,
+                    worker_id TEXT,
+                    heartbeat_at REAL,
+                    next_run_at REAL
+                )
+            ''')
+
+            # Databases created before the runner queue (and the scheduler) existed
+            columns = {row[1] for row in cursor.execute("PRAGMA table_info(campaigns)")}
+            for column, column_type in (('accounts', 'TEXT'), ('worker_id', 'TEXT'), ('heartbeat_at', 'REAL'),
+                                        ('next_run_at', 'REAL')):
+                if column not in columns:
+                    cursor.execute(f"ALTER TABLE campaigns ADD COLUMN {column} {column_type}")
+
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS campaign_recipients (
+                    campaign_id TEXT NOT NULL,
+                    idx INTEGER NOT NULL,
+                    email TEXT NOT NULL,
+                    data TEXT,
+                    state TEXT NOT NULL DEFAULT 'pending',
+                    subject TEXT,
+                    error TEXT,
+                    updated_at TIMESTAMP,
+                    PRIMARY KEY (campaign_id, idx)
+                )
+            ''')
+
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_recipient_state
+                ON campaign_recipients(campaign_id, state)
+            ''')
+
+            # Sends per Gmail account, so daily quotas hold across runs and days
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS account_sends (
+                    account_id TEXT NOT NULL,
+                    sent_at REAL NOT NULL
+                )
+            ''')
+
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_account_sends ON account_sends(account_id, sent_at)
+            ''')
+
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS campaign_logs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    campaign_id TEXT NOT NULL,
+                    message TEXT NOT NULL,
+                    created_at TIMESTAMP
+                )
+            ''')
+
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_log_campaign ON campaign_logs(campaign_id)
+            ''')
+
+            conn.commit()
+            conn.close()
+        except Exception as e:
+            logging.error(f"Campaign database initialization error: {e}")
+
+    def create_campaign(self, params, accounts=None, status='queued'):
+        """
+        Create a new campaign record
+
+        Args:
+            params (dict): Campaign parameters (csv_file, resume_file, subject, body, ...)
+            accounts (dict, optional): Account ID -> credentials the runner sends with
+            status (str): Initial status
+
+        Returns:
+            str: New campaign ID
+        """
+        campaign_id = uuid.uuid4().hex[:12]
+        now = datetime.now()
+
+        conn = self._connect()
+        try:
+            conn.execute(
+                '''
+                INSERT INTO campaigns (id, status, params, accounts, created_at, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ''',
+                (campaign_id, status, json.dumps(params), json.dumps(accounts or {}), now, now)
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+        return campaign_id
+
+    def load_recipients(self, campaign_id, recipients):
+        """
+        Store the parsed recipient list once, so later runs never re-parse the CSV
+
+        Args:
+            campaign_id (str): Campaign identifier
+            recipients (list): Recipient dictionaries from FileService
+        """
+        now = datetime.now()
+        rows = [
+            (campaign_id, idx, recipient['email'].lower(), json.dumps(recipient), PENDING, now)
+            for idx, recipient in enumerate(recipients)
+        ]
+
+        conn = self._connect()
+        try:
+            conn.executemany(
+                '''
+                INSERT OR IGNORE INTO campaign_recipients
+                    (campaign_id, idx, email, data, state, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ''',
+                rows
+            )
+            conn.execute(
+                "UPDATE campaigns SET loaded = 1, updated_at = ? WHERE id = ?",
+                (now, campaign_id)
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+    def get_campaign(self, campaign_id):
+        """
+        Get a campaign with its per-state recipient counts
+
+        Args:
+            campaign_id (str): Campaign identifier
+
+        Returns:
+            dict: Campaign data or None if not found
+        """
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT * FROM campaigns WHERE id = ?", (campaign_id,)).fetchone()
+            if row is None:
+                return None
+
+            counts = {
+                state: count for state, count in conn.execute(
+                    '''
+                    SELECT state, COUNT(*) FROM campaign_recipients
+                    WHERE campaign_id = ? GROUP BY state
+                    ''',
+                    (campaign_id,)
+                )
+            }
+        finally:
+            conn.close()
+
+        campaign = dict(row)
+        # Credentials never leave the store through this method
+        campaign.pop('accounts', None)
+        campaign['params'] = json.loads(campaign['params'])
+        campaign['loaded'] = bool(campaign['loaded'])
+        campaign['counts'] = counts
+        campaign['total'] = sum(counts.values())
+        return campaign
+
+    def list_campaigns(self, limit=20):
+        """
+        List most recent campaigns
+
+        Args:
+            limit (int): Maximum number of campaigns to return
+
+        Returns:
+            list: Campaign summaries, newest first
+        """
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                '''
+                SELECT id, status, cursor, created_at, updated_at, last_error
+                FROM campaigns ORDER BY created_at DESC LIMIT ?
+                ''',
+                (limit,)
+            ).fetchall()
+        finally:
+            conn.close()
+        return [dict(row) for row in rows]
+
+    def get_pending_recipients(self, campaign_id):
+        """
+        Get recipients still waiting to be processed, in file order
+
+        Args:
+            campaign_id (str): Campaign identifier
+
+        Returns:
+            list: Recipient dictionaries with their 'idx' position
+        """
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                '''
+                SELECT idx, data FROM campaign_recipients
+                WHERE campaign_id = ? AND state = ? ORDER BY idx
+                ''',
+                (campaign_id, PENDING)
+            ).fetchall()
+        finally:
+            conn.close()
+
+        recipients = []
+        for row in rows:
+            recipient = json.loads(row['data'])
+            recipient['idx'] = row['idx']
+            recipients.append(recipient)
+        return recipients
+
+    def claim_recipient(self, campaign_id, idx, subject=None):
+        """
+        Durably mark a recipient as in flight before the message is sent.
+
+        Only a pending recipient can be claimed, so a recipient is handed to the
+        Gmail API at most once even if the campaign is resumed.
+
+        Args:
+            campaign_id (str): Campaign identifier
+            idx (int): Recipient position in the campaign
+            subject (str, optional): Subject about to be sent
+
+        Returns:
+            bool: True if the recipient was claimed
+        """
+        conn = self._connect()
+        try:
+            cursor = conn.execute(
+                '''
+                UPDATE campaign_recipients SET state = ?, subject = ?, updated_at = ?
+                WHERE campaign_id = ? AND idx = ? AND state = ?
+                ''',
+                (SENDING, subject, datetime.now(), campaign_id, idx, PENDING)
+            )
+            conn.commit()
+            return cursor.rowcount == 1
+        finally:
+            conn.close()
+
+    def mark_recipient(self, campaign_id, idx, state, error=None):
+        """
+        Record the outcome for a recipient and advance the campaign cursor
+
+        Args:
+            campaign_id (str): Campaign identifier
+            idx (int): Recipient position in the campaign
+            state (str): New state (sent/failed/skipped)
+            error (str, optional): Error message for failures
+        """
+        now = datetime.now()
+        conn = self._connect()
+        try:
+            conn.execute(
+                '''
+                UPDATE campaign_recipients SET state = ?, error = ?, updated_at = ?
+                WHERE campaign_id = ? AND idx = ?
+                ''',
+                (state, error, now, campaign_id, idx)
+            )
+            conn.execute(
+                "UPDATE campaigns SET cursor = MAX(cursor, ?), updated_at = ? WHERE id = ?",
+                (idx, now, campaign_id)
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+    def release_recipient(self, campaign_id, idx, error=None):
+        """
+        Return a claimed recipient to pending after a retryable failure.
+
+        The cursor does not move, so a crash before the retry leaves the
+        recipient to be picked up again on resume.
+
+        Args:
+            campaign_id (str): Campaign identifier
+            idx (int): Recipient position in the campaign
+            error (str, optional): Why the attempt failed
+        """
+        conn = self._connect()
+        try:
+            conn.execute(
+                '''
+                UPDATE campaign_recipients SET state = ?, error = ?, updated_at = ?
+                WHERE campaign_id = ? AND idx = ?
+                ''',
+                (PENDING, error, datetime.now(), campaign_id, idx)
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+    def recover_in_flight(self, campaign_id, tracking_service=None):
+        """
+        Settle recipients left in flight by a crashed run.
+
+        A recipient stuck in 'sending' may or may not have been delivered. If the
+        tracking database recorded the send it is marked sent; otherwise it is
+        marked uncertain and is not retried automatically.
+
+        Args:
+            campaign_id (str): Campaign identifier
+            tracking_service (TrackingService, optional): Used to confirm sends
+
+        Returns:
+            list: Email addresses marked uncertain
+        """
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "SELECT idx, email FROM campaign_recipients WHERE campaign_id = ? AND state = ?",
+                (campaign_id, SENDING)
+            ).fetchall()
+        finally:
+            conn.close()
+
+        uncertain = []
+        for row in rows:
+            if tracking_service and tracking_service.is_email_sent(row['email']):
+                self.mark_recipient(campaign_id, row['idx'], SENT)
+            else:
+                self.mark_recipient(campaign_id, row['idx'], UNCERTAIN,
+                                    'Interrupted while sending; not retried to avoid a duplicate')
+                uncertain.append(row['email'])
+        return uncertain
+
+    def get_status(self, campaign_id):
+        """
+        Get just the status of a campaign (cheap enough to poll per recipient)
+
+        Args:
+            campaign_id (str): Campaign identifier
+
+        Returns:
+            str: Campaign status or None if not found
+        """
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT status FROM campaigns WHERE id = ?", (campaign_id,)).fetchone()
+        finally:
+            conn.close()
+        return row['status'] if row else None
+
+    def get_run_state(self, campaign_id):
+        """
+        Get a campaign's status and the runner that claimed it
+
+        Args:
+            campaign_id (str): Campaign identifier
+
+        Returns:
+            tuple: (status, worker_id), (None, None) if not found
+        """
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT status, worker_id FROM campaigns WHERE id = ?", (campaign_id,)).fetchone()
+        finally:
+            conn.close()
+        return (row['status'], row['worker_id']) if row else (None, None)
+
+    def get_accounts(self, campaign_id):
+        """
+        Get the sender credentials stored for a campaign
+
+        Args:
+            campaign_id (str): Campaign identifier
+
+        Returns:
+            dict: Account ID -> credentials dictionary
+        """
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT accounts FROM campaigns WHERE id = ?", (campaign_id,)).fetchone()
+        finally:
+            conn.close()
+        return json.loads(row['accounts']) if row and row['accounts'] else {}
+
+    def has_stored_accounts(self):
+        """Whether any campaign holds sender credentials"""
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT 1 FROM campaigns WHERE accounts IS NOT NULL AND accounts NOT IN ('', '{}') LIMIT 1"
+            ).fetchone()
+        finally:
+            conn.close()
+        return row is not None
+
+    def enqueue(self, campaign_id, accounts=None):
+        """
+        Queue an existing campaign for a runner, optionally with fresh credentials
+
+        Args:
+            campaign_id (str): Campaign identifier
+            accounts (dict, optional): Account ID -> credentials dictionary
+        """
+        conn = self._connect()
+        try:
+            if accounts is not None:
+                conn.execute(
+                    "UPDATE campaigns SET accounts = ? WHERE id = ?",
+                    (json.dumps(accounts), campaign_id)
+                )
+            conn.execute(
+                '''
+                UPDATE campaigns SET status = 'queued', worker_id = NULL, last_error = NULL, updated_at = ?
+                WHERE id = ?
+                ''',
+                (datetime.now(), campaign_id)
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+    def claim_campaign(self, worker_id, campaign_id=None):
+        """
+        Atomically move a queued campaign to running for one runner
+
+        Args:
+            worker_id (str): Identifier of the claiming runner
+            campaign_id (str, optional): Specific campaign; oldest queued if omitted
+
+        Returns:
+            str: Claimed campaign ID or None if nothing was claimed
+        """
+        conn = self._connect()
+        try:
+            if campaign_id is None:
+                row = conn.execute(
+                    "SELECT id FROM campaigns WHERE status = 'queued' ORDER BY created_at LIMIT 1"
+                ).fetchone()
+                if row is None:
+                    return None
+                campaign_id = row['id']
+
+            cursor = conn.execute(
+                '''
+                UPDATE campaigns SET status = 'running', worker_id = ?, heartbeat_at = ?, updated_at = ?
+                WHERE id = ? AND status = 'queued'
+                ''',
+                (worker_id, time.time(), datetime.now(), campaign_id)
+            )
+            conn.commit()
+            return campaign_id if cursor.rowcount == 1 else None
+        finally:
+            conn.close()
+
+    def schedule(self, campaign_id, run_at):
+        """
+        Park a campaign until `run_at` (next send window or quota reset)
+
+        Args:
+            campaign_id (str): Campaign identifier
+            run_at (float): Unix time the campaign should continue
+        """
+        conn = self._connect()
+        try:
+            conn.execute(
+                '''
+                UPDATE campaigns SET status = ?, next_run_at = ?, worker_id = NULL, updated_at = ?
+                WHERE id = ?
+                ''',
+                (SCHEDULED, run_at, datetime.now(), campaign_id)
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+    def get_scheduled(self):
+        """
+        Campaigns waiting for the scheduler
+
+        Returns:
+            list: (campaign_id, next_run_at) tuples, soonest first
+        """
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "SELECT id, next_run_at FROM campaigns WHERE status = ? ORDER BY next_run_at",
+                (SCHEDULED,)
+            ).fetchall()
+        finally:
+            conn.close()
+        return [(row['id'], row['next_run_at'] or 0.0) for row in rows]
+
+    def release_scheduled(self, campaign_id):
+        """
+        Atomically move a due scheduled campaign back to the queue
+
+        Only one scheduler (of possibly several processes) wins, and a campaign
+        that was cancelled or resumed by hand in the meantime is left alone.
+
+        Args:
+            campaign_id (str): Campaign identifier
+
+        Returns:
+            bool: True if the campaign was queued
+        """
+        conn = self._connect()
+        try:
+            cursor = conn.execute(
+                '''
+                UPDATE campaigns SET status = 'queued', worker_id = NULL, updated_at = ?
+                WHERE id = ? AND status = ? AND COALESCE(next_run_at, 0) <= ?
+                ''',
+                (datetime.now(), campaign_id, SCHEDULED, time.time())
+            )
+            conn.commit()
+            return cursor.rowcount == 1
+        finally:
+            conn.close()
+
+    def reserve_account_send(self, account_id, interval, daily_quota):
+        """
+        Claim a send slot on a Gmail account, for every runner in every process
+
+        The pacing interval and daily quota are checked against all recorded
+        sends of the account and the slot is recorded in one transaction, so
+        campaigns sharing an account share its quota.
+
+        Args:
+            account_id (str): Account identifier
+            interval (float): Minimum seconds between two sends of the account
+            daily_quota (int): Sends allowed per rolling 24 hours
+
+        Returns:
+            int: Reservation ID (release it if the send fails), or None if the
+            account is paced or out of quota right now
+        """
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            sent, last = conn.execute(
+                "SELECT COUNT(*), MAX(sent_at) FROM account_sends WHERE account_id = ? AND sent_at > ?",
+                (account_id, now - 86400)
+            ).fetchone()
+            if sent >= daily_quota or (last is not None and last + interval > now):
+                conn.rollback()
+                return None
+            cursor = conn.execute(
+                "INSERT INTO account_sends (account_id, sent_at) VALUES (?, ?)", (account_id, now)
+            )
+            conn.commit()
+            return cursor.lastrowid
+        finally:
+            conn.close()
+
+    def release_account_send(self, reservation_id):
+        """Give back a send slot whose message was not delivered"""
+        try:
+            conn = self._connect()
+            conn.execute("DELETE FROM account_sends WHERE rowid = ?", (reservation_id,))
+            conn.commit()
+            conn.close()
+        except Exception as e:
+            logging.error(f"Error releasing account send: {e}")
+
+    def recent_account_sends(self, account_ids, window=86400):
+        """
+        Send timestamps per account within the quota window
+
+        Older entries are deleted on the way.
+
+        Args:
+            account_ids (list): Accounts to look up
+            window (float): Seconds to look back
+
+        Returns:
+            dict: Account ID -> list of Unix send times, oldest first
+        """
+        since = time.time() - window
+        history = {account_id: [] for account_id in account_ids}
+        conn = self._connect()
+        try:
+            conn.execute("DELETE FROM account_sends WHERE sent_at < ?", (since,))
+            conn.commit()
+            for row in conn.execute(
+                "SELECT account_id, sent_at FROM account_sends WHERE sent_at >= ? ORDER BY sent_at",
+                (since,)
+            ):
+                if row['account_id'] in history:
+                    history[row['account_id']].append(row['sent_at'])
+        finally:
+            conn.close()
+        return history
+
+    def heartbeat(self, campaign_id):
+        """Record that the runner owning a campaign is still alive"""
+        try:
+            conn = self._connect()
+            conn.execute("UPDATE campaigns SET heartbeat_at = ? WHERE id = ?", (time.time(), campaign_id))
+            conn.commit()
+            conn.close()
+        except Exception as e:
+            logging.error(f"Error recording campaign heartbeat: {e}")
+
+    def has_active_campaign(self):
+        """Check whether any campaign is queued or running"""
+        placeholders = ','.join('?' * len(ACTIVE_STATUSES))
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                f"SELECT 1 FROM campaigns WHERE status IN ({placeholders}) LIMIT 1", ACTIVE_STATUSES
+            ).fetchone()
+        finally:
+            conn.close()
+        return row is not None
+
+    def referenced_files(self, statuses=ACTIVE_STATUSES + RESUMABLE_STATUSES):
+        """
+        Files (CSV lists, resumes) that campaigns in the given states still need
+
+        Args:
+            statuses (tuple): Campaign statuses to include
+
+        Returns:
+            set: Absolute paths referenced by those campaigns' parameters
+        """
+        placeholders = ','.join('?' * len(statuses))
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                f"SELECT params FROM campaigns WHERE status IN ({placeholders})", statuses
+            ).fetchall()
+        finally:
+            conn.close()
+
+        paths = set()
+        for row in rows:
+            params = json.loads(row['params'])
+            for key in ('csv_file', 'resume_file'):
+                if params.get(key):
+                    paths.add(os.path.abspath(params[key]))
+        return paths
+
+    def add_log(self, campaign_id, message):
+        """
+        Append a progress log line for a campaign
+
+        Args:
+            campaign_id (str): Campaign identifier
+            message (str): Log message
+        """
+        try:
+            conn = self._connect()
+            conn.execute(
+                "INSERT INTO campaign_logs (campaign_id, message, created_at) VALUES (?, ?, ?)",
+                (campaign_id, message, datetime.now())
+            )
+            conn.commit()
+            conn.close()
+        except Exception as e:
+            logging.error(f"Error writing campaign log: {e}")
+
+    def get_logs(self, campaign_id, limit=200):
+        """
+        Get the most recent log lines for a campaign, oldest first
+
+        Args:
+            campaign_id (str): Campaign identifier
+            limit (int): Maximum number of lines
+
+        Returns:
+            list: Log messages
+        """
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                '''
+                SELECT message FROM campaign_logs WHERE campaign_id = ?
+                ORDER BY id DESC LIMIT ?
+                ''',
+                (campaign_id, limit)
+            ).fetchall()
+        finally:
+            conn.close()
+        return [row['message'] for row in reversed(rows)]
+
+    def latest_campaign_id(self):
+        """Get the ID of the most recently created campaign"""
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT id FROM campaigns ORDER BY created_at DESC LIMIT 1").fetchone()
+        finally:
+            conn.close()
+        return row['id'] if row else None
+
+    def get_progress(self, campaign_id):
+        """
+        Build the progress payload served by /progress from the shared store
+
+        Args:
+            campaign_id (str): Campaign identifier
+
+        Returns:
+            dict: Progress in the shape the frontend polls, or None if not found
+        """
+        campaign = self.get_campaign(campaign_id)
+        if campaign is None:
+            return None
+
+        counts = campaign['counts']
+        sent = counts.get(SENT, 0)
+        failed = counts.get(FAILED, 0)
+        return {
+            'status': campaign['status'],
+            'campaign_id': campaign_id,
+            'current': sent + failed,
+            'total': campaign['total'],
+            'sent': sent,
+            'failed': failed,
+            'logs': self.get_logs(campaign_id),
+            'cancelled': campaign['status'] == 'cancelled',
+            'next_run_at': campaign['next_run_at'] if campaign['status'] == SCHEDULED else None
+        }
+
+    def set_status(self, campaign_id, status, error=None):
+        """
+        Update campaign status
+
+        Args:
+            campaign_id (str): Campaign identifier
+            status (str): New status
+            error (str, optional): Error message to record
+        """
+        try:
+            conn = self._connect()
+            conn.execute(
+                "UPDATE campaigns SET status = ?, last_error = ?, updated_at = ? WHERE id = ?",
+                (status, error, datetime.now(), campaign_id)
+            )
+            conn.commit()
+            conn.close()
+        except Exception as e:
+            logging.error(f"Error updating campaign status: {e}")
+
+    def mark_interrupted(self, stale_after=None):
+        """
+        Flag running campaigns whose runner died as interrupted
+
+        Args:
+            stale_after (float, optional): Seconds without a heartbeat before a
+                runner is considered dead; every running campaign if omitted
+
+        Returns:
+            int: Number of campaigns flagged
+        """
+        try:
+            conn = self._connect()
+            if stale_after is None:
+                cursor = conn.execute(
+                    "UPDATE campaigns SET status = 'interrupted', updated_at = ? WHERE status = 'running'",
+                    (datetime.now(),)
+                )
+            else:
+                cursor = conn.execute(
+                    '''
+                    UPDATE campaigns SET status = 'interrupted', updated_at = ?
+                    WHERE status = 'running' AND COALESCE(heartbeat_at, 0) < ?
+                    ''',
+                    (datetime.now(), time.time() - stale_after)
+                )
+            conn.commit()
+            conn.close()
+            return cursor.rowcount
+        except Exception as e:
+            logging.error(f"Error flagging interrupted campaigns: {e}")
+            return 0
+
+# Singleton
+_campaign_service = None
+
+def get_campaign_service():
+    global _campaign_service
+    if _campaign_service is None:
+        _campaign_service = CampaignService()
+    return _campaign_service
@@ -0,0 +1,353 @@
+"""
+Campaign Simulator - dry runs of a campaign on a virtual clock
+
+A dry run goes through the same steps as CampaignRunner: CSV ingestion and
+validation, then RecipientFlow (campaign_flow.py) for the duplicate and
+suppression checks, send windows, template personalization and
+(optionally) AI generation, per-domain interleaving and limits, waiting for
+a sender and retry backoff. The sender pool applies the same pacing and
+daily quotas (including today's earlier sends). Where the real campaign
+would be scheduled for a later day, the simulation continues at that time.
+Nothing is sent or written, and nothing sleeps. Gmail is replaced by a
+simulated transport and Gemini by a simulated model. Both advance a virtual
+clock by a typical call latency. The sender pool, retry queue and a private
+Gemini budget wait on that clock, so the clock's final reading is the
+projected wall-clock time of the campaign.
+"""
+
+import os
+import random
+import time
+from datetime import datetime, timedelta
+
+from services.file_service import FileService
+from services.tracking_service import get_tracking_service
+from services.sender_pool import SenderPool
+from services.gmail_service import SendResult
+from services.gemini_governor import GeminiGovernor, get_gemini_governor
+from services.circuit_breaker import CircuitBreaker
+from services.model_providers import ModelProvider
+from services.template_service import build_context
+from services.campaign_flow import RecipientFlow, company_from_domain, compile_draft, DUPLICATE, SUPPRESSED
+from services.domain_dispatcher import recipient_domain
+from services.campaign_service import get_campaign_service
+
+# Typical latencies charged to the virtual clock, in seconds
+SEND_LATENCY = 1.0
+AI_LATENCY = 3.0
+
+SIMULATED_AI_TEXT = '[AI-generated text]'
+
+
+class VirtualClock:
+    """Time source that only moves when told to"""
+
+    def __init__(self, start=None):
+        self.start = start if start is not None else time.time()
+        self.now = self.start
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += max(0.0, seconds)
+
+    @property
+    def elapsed(self):
+        return self.now - self.start
+
+
+class SimulatedTransport:
+    """Stands in for GmailService.send_email"""
+
+    def __init__(self, clock, latency=SEND_LATENCY, failure_rate=0.0, seed=None):
+        """
+        Args:
+            clock (VirtualClock): Clock charged with each call's latency
+            latency (float): Seconds per send
+            failure_rate (float): Share of sends that fail with a retryable error
+            seed (int, optional): Seed for reproducible failures
+        """
+        self.clock = clock
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.calls = 0
+        self.sent_at = []
+        self._random = random.Random(seed)
+
+    def send_email(self, credentials_dict, to_email, subject, body, resume_path=None, from_name=None):
+        self.calls += 1
+        self.clock.sleep(self.latency)
+        if self.failure_rate and self._random.random() < self.failure_rate:
+            return SendResult(False, retryable=True, error='Simulated transient failure')
+        self.sent_at.append(self.clock())
+        return SendResult(True, message_id=f'simulated-{self.calls}')
+
+
+class SimulatedModel(ModelProvider):
+    """Stands in for Gemini: answers instantly, charging the virtual clock"""
+
+    name = 'simulated'
+
+    def __init__(self, clock, latency=AI_LATENCY):
+        self.clock = clock
+        self.latency = latency
+
+    def generate(self, prompt, cancel=None):
+        self.clock.sleep(self.latency)
+        return SIMULATED_AI_TEXT
+
+
+class VirtualGovernor(GeminiGovernor):
+    """Gemini RPM/TPM budget that waits on the virtual clock instead of blocking"""
+
+    def __init__(self, clock, rpm, tpm, window=60.0):
+        super().__init__(rpm, tpm, window)
+        self.clock = clock
+        self.requests = 0
+        self.tokens = 0
+        self.waited = 0.0
+
+    def acquire(self, tokens, priority=None, timeout=None):
+        now = self.clock()
+        self._expire(now)
+        wait = self._time_until_fits(tokens, now)
+        if wait > 0:
+            self.clock.sleep(wait)
+            self.waited += wait
+            now = self.clock()
+            self._expire(now)
+        entry = [now, tokens]
+        self._admitted.append(entry)
+        self.requests += 1
+        self.tokens += tokens
+        return entry
+
+    def try_acquire(self, tokens):
+        return None
+
+    def settle(self, entry, tokens):
+        # The simulated reply is short; keep the reserved output estimate
+        pass
+
+
+def format_duration(seconds):
+    """'2d 3h 4m', '5m 12s', ... for a number of seconds"""
+    seconds = int(round(seconds))
+    days, rest = divmod(seconds, 86400)
+    hours, rest = divmod(rest, 3600)
+    minutes, secs = divmod(rest, 60)
+    if days:
+        return f'{days}d {hours}h {minutes}m'
+    if hours:
+        return f'{hours}h {minutes}m'
+    return f'{minutes}m {secs}s'
+
+
+class CampaignSimulator:
+    """Projects a campaign's duration and quota use without sending anything"""
+
+    def __init__(self, config, accounts=None, send_latency=SEND_LATENCY, ai_latency=AI_LATENCY,
+                 failure_rate=0.0, seed=None):
+        """
+        Args:
+            config (dict): Settings (MAX_EMAILS_PER_HOUR, MAX_EMAILS_PER_DAY, SENDER_*, SEND_*)
+            accounts (list, optional): IDs of the Gmail accounts the campaign would
+                send from (one unused account if empty)
+            send_latency (float): Seconds charged per Gmail send
+            ai_latency (float): Seconds charged per Gemini call
+            failure_rate (float): Share of sends that fail transiently and are retried
+            seed (int, optional): Seed for reproducible send failures
+        """
+        self.config = config
+        self.accounts = list(accounts or ())
+        self.send_latency = send_latency
+        self.ai_latency = ai_latency
+        self.failure_rate = failure_rate
+        self.seed = seed
+
+    def _simulated_generator(self, clock):
+        """GeminiEmailGenerator wired to the simulated model and a private budget"""
+        from services.gemini_service import GeminiEmailGenerator
+
+        shared = get_gemini_governor()
+        generator = GeminiEmailGenerator(provider=SimulatedModel(clock, self.ai_latency))
+        generator.governor = VirtualGovernor(clock, shared.rpm, shared.tpm, shared.window)
+        generator.breaker = CircuitBreaker('simulation')
+        return generator
+
+    def _ai_sample(self, recipient, ai_mode, resume_text):
+        """One real Gemini draft for the sample recipient"""
+        from services.gemini_service import get_gemini_service
+
+        gemini_service = get_gemini_service()
+        if ai_mode == 'company':
+            company = recipient.get('company') or company_from_domain(recipient['email'])
+            subject = gemini_service.generate_subject(company=company)
+            body = compile_draft(gemini_service.generate_company_email(company, resume_text=resume_text))
+            return subject, body.render(build_context(recipient))
+        name = recipient.get('name', 'Hiring Manager')
+        company = recipient.get('company', '')
+        return (gemini_service.generate_subject(name, company),
+                gemini_service.generate_email(name, company, resume_text=resume_text))
+
+    def simulate(self, params, ai_sample=False):
+        """
+        Dry-run a campaign
+
+        Args:
+            params (dict): Campaign parameters as accepted by /send_emails
+            ai_sample (bool): Generate the sample email with the real model (one
+                subject and one body request); otherwise the sample is the
+                personalized template
+
+        Returns:
+            dict: Send counts, projected duration, Gmail/Gemini usage and a sample
+        """
+        started = time.perf_counter()
+        clock = VirtualClock()
+        max_emails = params.get('max_emails', 30)
+        ai_mode = params.get('ai_mode', 'recipient')
+        resume_file = params.get('resume_file')
+
+        recipients = FileService().extract_emails_from_csv(params['csv_file'], max_emails)
+        if not recipients:
+            raise ValueError('No valid emails found in CSV file')
+
+        # Without a key the real runner falls back to the template
+        use_ai = bool(params.get('use_ai')) and bool(os.getenv('GEMINI_API_KEY'))
+        generator = self._simulated_generator(clock) if use_ai else None
+        resume_text = None
+        if use_ai and resume_file:
+            resume_text = generator.extract_resume_text(resume_file)
+
+        transport = SimulatedTransport(clock, self.send_latency, self.failure_rate, self.seed)
+        sender_pool = SenderPool(
+            hourly_quota=self.config['MAX_EMAILS_PER_HOUR'],
+            daily_quota=self.config['MAX_EMAILS_PER_DAY'],
+            strategy=self.config['SENDER_POOL_STRATEGY'],
+            max_consecutive_errors=self.config['SENDER_MAX_CONSECUTIVE_ERRORS'],
+            cooldown_seconds=self.config['SENDER_COOLDOWN_SECONDS'],
+            clock=clock
+        )
+        # Sends already made today count against the quota, as in a real run
+        history = get_campaign_service().recent_account_sends(self.accounts)
+        for account_id in self.accounts or ['account-1']:
+            sender_pool.add_account(account_id, None, history.get(account_id))
+
+        # Nothing is logged, so sends earlier in the dry run are remembered here
+        tracking_service = get_tracking_service()
+        contacted = set()
+        flow = RecipientFlow(
+            self.config, params,
+            clock=clock,
+            generator=generator,
+            resume_text=resume_text,
+            is_contacted=lambda address: address.lower() in contacted or tracking_service.is_email_sent(address)
+        )
+        send_window = flow.send_window
+        sample = None
+        counts = {'sent': 0, 'skipped_duplicates': 0, 'skipped_suppressed': 0, 'failed': 0, 'retries': 0}
+        quota_exhausted = False
+        quota_waits = 0
+        for idx, recipient in enumerate(recipients):
+            flow.add(dict(recipient, idx=idx))
+
+        while counts['sent'] < max_emails:
+            recipient = flow.next_recipient()
+            if recipient is None:
+                wait, _ = flow.next_wait()
+                if wait is None:
+                    break
+                clock.sleep(max(wait, 0.001))
+                continue
+
+            screened = flow.screen(recipient)
+            if screened is not None:
+                outcome, _ = screened
+                if outcome == DUPLICATE:
+                    counts['skipped_duplicates'] += 1
+                elif outcome == SUPPRESSED:
+                    counts['skipped_suppressed'] += 1
+                continue
+
+            if sample is None:
+                email_subject, email_body = flow.render(recipient)
+                sample = {'to': recipient['email'], 'subject': email_subject,
+                          'body': email_body, 'ai_generated': False}
+                if use_ai and ai_sample:
+                    sample['subject'], sample['body'] = self._ai_sample(recipient, ai_mode, resume_text)
+                    sample['ai_generated'] = True
+            email_subject, email_body = flow.content(recipient)
+
+            # Wait (virtually) for an account with quota left
+            account = flow.acquire_sender(sender_pool, lambda wait: clock.sleep(max(wait, 0.001)))
+            if account is None:
+                reset_in = sender_pool.seconds_until_quota()
+                if reset_in is None:
+                    quota_exhausted = True
+                    break
+                # The real campaign is scheduled for the quota reset and
+                # checks the recipient's send window again then
+                quota_waits += 1
+                clock.sleep(reset_in)
+                flow.defer(recipient, clock(), 'Daily quota used on every account')
+                continue
+
+            flow.record_send(recipient)
+            result = transport.send_email(account.credentials, recipient['email'], email_subject,
+                                          email_body, resume_file)
+            if result:
+                sender_pool.record_success(account)
+                contacted.add(recipient['email'].lower())
+                counts['sent'] += 1
+                continue
+
+            sender_pool.record_failure(account, result.retry_after)
+            if flow.schedule_retry(recipient, result, email_subject, email_body) is not None:
+                counts['retries'] += 1
+            else:
+                counts['failed'] += 1
+
+        if generator is not None:
+            generator.close()
+
+        elapsed = clock.elapsed
+        report = {
+            'recipients': len(recipients),
+            'would_send': counts['sent'],
+            'skipped_duplicates': counts['skipped_duplicates'],
+            'skipped_suppressed': counts['skipped_suppressed'],
+            'failed': counts['failed'],
+            'retries': counts['retries'],
+            'paused_on_quota': quota_exhausted,
+            'quota_waits': quota_waits,
+            'sending_days': len({datetime.fromtimestamp(t).date() for t in transport.sent_at}),
+            'send_window': send_window.to_dict() if send_window else None,
+            'domains': len({recipient_domain(r['email']) for r in recipients}),
+            'domain_throttled_turns': flow.dispatcher.throttled,
+            'estimated_seconds': round(elapsed, 1),
+            'estimated_duration': format_duration(elapsed),
+            'estimated_finish': (datetime.now() + timedelta(seconds=elapsed)).isoformat(timespec='seconds'),
+            'gmail': {
+                'accounts': len(sender_pool),
+                'send_calls': transport.calls,
+                'hourly_quota_per_account': self.config['MAX_EMAILS_PER_HOUR'],
+                'daily_quota_per_account': self.config['MAX_EMAILS_PER_DAY'],
+                'per_account': {a['account_id']: a['total_sent'] for a in sender_pool.stats()}
+            },
+            'gemini': {
+                'enabled': use_ai,
+                'mode': ai_mode if use_ai else None,
+                'requests': generator.governor.requests if generator else 0,
+                'estimated_tokens': generator.governor.tokens if generator else 0,
+                'budget_wait_seconds': round(generator.governor.waited, 1) if generator else 0.0,
+                'sample_requests': 2 if sample and sample['ai_generated'] else 0
+            },
+            'sample': sample,
+            'simulated_in_ms': round((time.perf_counter() - started) * 1000, 1)
+        }
+        if quota_exhausted:
+            report['unsent'] = (len(recipients) - counts['sent'] - counts['skipped_duplicates']
+                                - counts['skipped_suppressed'] - counts['failed'])
+        return report
@@ -0,0 +1,156 @@
+"""
+Circuit Breaker for calls to an unreliable dependency (Gemini)
+
+When Gemini is down, every AI campaign recipient still makes two calls,
+waits for each to fail, and only then falls back to the template. The
+breaker watches recent outcomes, and once the error rate crosses the
+threshold it opens. While open, calls are refused immediately, so callers
+use their fallback without waiting. After `open_seconds` it lets a few
+probe calls through (half-open). A successful probe closes it again, and
+a failed one re-opens it.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+
+STATE_CLOSED = 'closed'
+STATE_OPEN = 'open'
+STATE_HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the dependency while the breaker is open"""
+
+
+class CircuitBreaker:
+    """Error-rate circuit breaker over a sliding time window"""
+
+    def __init__(self, name, failure_rate=0.5, min_calls=4, window=60.0,
+                 open_seconds=30.0, half_open_probes=1):
+        """
+        Args:
+            name (str): Name shown in logs and /health
+            failure_rate (float): Share of failed calls in the window that opens the breaker
+            min_calls (int): Calls needed in the window before the rate is trusted
+            window (float): Seconds of outcomes considered
+            open_seconds (float): How long to refuse calls before probing
+            half_open_probes (int): Concurrent probe calls allowed while half-open
+        """
+        self.name = name
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.window = window
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+        self.state = STATE_CLOSED
+        self._outcomes = deque()  # (timestamp, ok)
+        self._opened_at = None
+        self._probes = 0
+        self._short_circuited = 0
+        self._trips = 0
+        self._last_error = None
+        self._lock = threading.Lock()
+
+    def _expire(self, now):
+        while self._outcomes and self._outcomes[0][0] <= now - self.window:
+            self._outcomes.popleft()
+
+    def _open(self, now):
+        self.state = STATE_OPEN
+        self._opened_at = now
+        self._probes = 0
+        self._trips += 1
+        print(f"Circuit '{self.name}' opened: {self._last_error}")
+
+    def allow(self):
+        """
+        Check whether a call may go ahead
+
+        Returns:
+            bool: False while open (the caller should use its fallback)
+        """
+        with self._lock:
+            now = time.time()
+            if self.state == STATE_OPEN:
+                if now - self._opened_at < self.open_seconds:
+                    self._short_circuited += 1
+                    return False
+                self.state = STATE_HALF_OPEN
+                self._probes = 0
+            if self.state == STATE_HALF_OPEN:
+                if self._probes >= self.half_open_probes:
+                    self._short_circuited += 1
+                    return False
+                self._probes += 1
+            return True
+
+    def cancel(self):
+        """Give back an allowed call that never reached the dependency"""
+        with self._lock:
+            if self.state == STATE_HALF_OPEN and self._probes > 0:
+                self._probes -= 1
+
+    def record_success(self):
+        """Record a successful call"""
+        with self._lock:
+            now = time.time()
+            if self.state == STATE_HALF_OPEN:
+                print(f"Circuit '{self.name}' closed after a successful probe")
+                self.state = STATE_CLOSED
+                self._outcomes.clear()
+            self._outcomes.append((now, True))
+            self._expire(now)
+
+    def record_failure(self, error=None):
+        """Record a failed or timed-out call"""
+        with self._lock:
+            now = time.time()
+            self._last_error = str(error) if error else 'failure'
+            if self.state == STATE_HALF_OPEN:
+                self._open(now)
+                return
+            self._outcomes.append((now, False))
+            self._expire(now)
+            failures = sum(1 for _, ok in self._outcomes if not ok)
+            if (self.state == STATE_CLOSED and len(self._outcomes) >= self.min_calls
+                    and failures / len(self._outcomes) >= self.failure_rate):
+                self._open(now)
+
+    def stats(self):
+        """State and recent outcomes, for /health"""
+        with self._lock:
+            now = time.time()
+            self._expire(now)
+            failures = sum(1 for _, ok in self._outcomes if not ok)
+            report = {
+                'state': self.state,
+                'calls_in_window': len(self._outcomes),
+                'failures_in_window': failures,
+                'trips': self._trips,
+                'short_circuited': self._short_circuited,
+                'last_error': self._last_error
+            }
+            if self.state == STATE_OPEN:
+                report['retry_in_s'] = round(max(0.0, self._opened_at + self.open_seconds - now), 1)
+            return report
+
+
+# Singleton instance
+_gemini_breaker = None
+_gemini_breaker_lock = threading.Lock()
+
+def get_gemini_breaker():
+    """Get or create the breaker guarding Gemini calls"""
+    global _gemini_breaker
+    if _gemini_breaker is None:
+        with _gemini_breaker_lock:
+            if _gemini_breaker is None:
+                _gemini_breaker = CircuitBreaker(
+                    'gemini',
+                    failure_rate=float(os.getenv('GEMINI_BREAKER_FAILURE_RATE', 0.5)),
+                    min_calls=int(os.getenv('GEMINI_BREAKER_MIN_CALLS', 4)),
+                    open_seconds=float(os.getenv('GEMINI_BREAKER_OPEN_SECONDS', 30))
+                )
+    return _gemini_breaker
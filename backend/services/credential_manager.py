@@ -0,0 +1,262 @@
+"""
+Credential Manager - one live, proactively refreshed OAuth credential per account
+
+Rebuilding `google.oauth2.credentials.Credentials` from a dict on every send
+throws the refreshed access token away, so each call may pay for another
+token refresh. The manager keeps a single Credentials object per account,
+refreshes it on a background timer before it expires, persists the rotated
+token, and hands the same object to every concurrent sender.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import logging
+from datetime import datetime, timedelta
+
+
+class CredentialManager:
+    """Process-wide cache of live Gmail credentials"""
+
+    # Shared with the campaign store so web and worker processes see the same tokens
+    DB_NAME = 'campaigns.db'
+
+    def __init__(self, db_path=None, refresh_ahead=300, check_interval=60):
+        """
+        Args:
+            db_path (str, optional): SQLite file holding persisted tokens
+            refresh_ahead (int): Refresh tokens this many seconds before expiry
+            check_interval (int): Seconds between background expiry checks
+        """
+        self.db_path = db_path or os.path.join(os.path.dirname(os.path.dirname(__file__)), self.DB_NAME)
+        self.refresh_ahead = refresh_ahead
+        self.check_interval = check_interval
+        self._live = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+        self._timer = None
+        self._init_db()
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def _init_db(self):
+        """Initialize database with required tables"""
+        try:
+            conn = self._connect()
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS gmail_accounts (
+                    account_id TEXT PRIMARY KEY,
+                    credentials TEXT NOT NULL,
+                    updated_at TIMESTAMP
+                )
+            ''')
+            conn.commit()
+            conn.close()
+        except Exception as e:
+            logging.error(f"Credential database initialization error: {e}")
+
+    def _load(self, account_id):
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT credentials FROM gmail_accounts WHERE account_id = ?", (account_id,)
+            ).fetchone()
+        finally:
+            conn.close()
+        return json.loads(row[0]) if row else None
+
+    def _save(self, account_id, credentials_dict):
+        conn = self._connect()
+        try:
+            conn.execute(
+                '''
+                INSERT INTO gmail_accounts (account_id, credentials, updated_at) VALUES (?, ?, ?)
+                ON CONFLICT(account_id) DO UPDATE SET credentials = excluded.credentials,
+                                                      updated_at = excluded.updated_at
+                ''',
+                (account_id, json.dumps(credentials_dict), datetime.now())
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _to_dict(credentials):
+        """Serialize a Credentials object, including the rotated token and expiry"""
+        return {
+            'token': credentials.token,
+            'refresh_token': credentials.refresh_token,
+            'token_uri': credentials.token_uri,
+            'client_id': credentials.client_id,
+            'client_secret': credentials.client_secret,
+            'scopes': list(credentials.scopes) if credentials.scopes else [],
+            'expiry': credentials.expiry.isoformat() if credentials.expiry else None
+        }
+
+    @staticmethod
+    def _from_dict(credentials_dict):
+        from google.oauth2.credentials import Credentials
+
+        expiry = credentials_dict.get('expiry')
+        return Credentials(
+            token=credentials_dict.get('token'),
+            refresh_token=credentials_dict.get('refresh_token'),
+            token_uri=credentials_dict.get('token_uri'),
+            client_id=credentials_dict.get('client_id'),
+            client_secret=credentials_dict.get('client_secret'),
+            scopes=credentials_dict.get('scopes'),
+            # google-auth compares expiry as naive UTC
+            expiry=datetime.fromisoformat(expiry) if expiry else None
+        )
+
+    def _account_lock(self, account_id):
+        with self._lock:
+            return self._locks.setdefault(account_id, threading.Lock())
+
+    def register(self, account_id, credentials_dict, replace=True):
+        """
+        Store credentials for an account (e.g. after the OAuth callback)
+
+        Args:
+            account_id (str): Account identifier
+            credentials_dict (dict): OAuth credentials as dictionary
+            replace (bool): Overwrite a persisted token; False keeps the stored
+                one, which may be fresher than a campaign's snapshot
+        """
+        with self._account_lock(account_id):
+            if not replace and (account_id in self._live or self._load(account_id)):
+                return
+            self._save(account_id, credentials_dict)
+            self._live.pop(account_id, None)
+
+    def stored(self, account_id):
+        """
+        Persisted credentials of an account (with the latest rotated token)
+
+        Returns:
+            dict: Credentials dictionary, or None if the account is unknown
+        """
+        return self._load(account_id)
+
+    def has_accounts(self):
+        """Whether any account's credentials are persisted"""
+        conn = self._connect()
+        try:
+            return conn.execute("SELECT 1 FROM gmail_accounts LIMIT 1").fetchone() is not None
+        finally:
+            conn.close()
+
+    def forget(self, account_id):
+        """Drop an account's live and persisted credentials"""
+        with self._account_lock(account_id):
+            self._live.pop(account_id, None)
+            conn = self._connect()
+            try:
+                conn.execute("DELETE FROM gmail_accounts WHERE account_id = ?", (account_id,))
+                conn.commit()
+            finally:
+                conn.close()
+
+    def get(self, account_id):
+        """
+        Get the shared live credentials for an account, refreshing if needed
+
+        Args:
+            account_id (str): Account identifier
+
+        Returns:
+            Credentials: Live credentials object, or None if the account is unknown
+        """
+        self.start()
+        credentials = self._live.get(account_id)
+        if credentials is None:
+            with self._account_lock(account_id):
+                credentials = self._live.get(account_id)
+                if credentials is None:
+                    stored = self._load(account_id)
+                    if stored is None:
+                        return None
+                    credentials = self._from_dict(stored)
+                    self._live[account_id] = credentials
+
+        # Normally the background timer got here first; this is the fallback
+        if self._needs_refresh(credentials):
+            self.refresh(account_id)
+        return credentials
+
+    def _needs_refresh(self, credentials):
+        if not credentials.refresh_token:
+            return False
+        if credentials.token is None or credentials.expiry is None:
+            return True
+        return credentials.expiry - timedelta(seconds=self.refresh_ahead) <= datetime.utcnow()
+
+    def refresh(self, account_id):
+        """
+        Refresh an account's token now and persist the rotated token
+
+        Args:
+            account_id (str): Account identifier
+
+        Returns:
+            bool: True if the credentials are fresh afterwards
+        """
+        credentials = self._live.get(account_id)
+        if credentials is None:
+            return False
+
+        with self._account_lock(account_id):
+            # Another caller may have refreshed while we waited for the lock
+            if not self._needs_refresh(credentials):
+                return True
+            try:
+                from google.auth.transport.requests import Request
+                credentials.refresh(Request())
+                self._save(account_id, self._to_dict(credentials))
+                return True
+            except Exception as e:
+                print(f"Token refresh failed for account {account_id}: {e}")
+                return False
+
+    def refresh_expiring(self):
+        """Refresh every live credential that is close to expiry"""
+        for account_id, credentials in list(self._live.items()):
+            if self._needs_refresh(credentials):
+                self.refresh(account_id)
+
+    def _tick(self):
+        try:
+            self.refresh_expiring()
+        finally:
+            self._schedule()
+
+    def _schedule(self):
+        self._timer = threading.Timer(self.check_interval, self._tick)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def start(self):
+        """Start the background refresh timer (idempotent)"""
+        with self._lock:
+            if self._timer is None:
+                self._schedule()
+
+    def stop(self):
+        """Stop the background refresh timer"""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+
+# Singleton instance
+_credential_manager = None
+
+def get_credential_manager():
+    """Get or create the credential manager instance"""
+    global _credential_manager
+    if _credential_manager is None:
+        _credential_manager = CredentialManager()
+    return _credential_manager
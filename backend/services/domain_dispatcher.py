@@ -0,0 +1,134 @@
+"""
+Domain Dispatcher - interleaves recipients by domain and throttles each domain
+
+CSV files are often sorted by name or company, so sending in file order can
+fire dozens of messages at one corporate mail server back to back. Receiving
+servers throttle or defer that pattern. The dispatcher puts recipients in
+one bucket per domain and hands them out round-robin across the buckets.
+Each domain gets a minimum gap between sends and an hourly cap. Overall
+pacing is still set by the sender pool, so as long as other domains have
+recipients left the campaign sends at its normal rate. A throttled domain
+just waits for its next turn.
+
+Large mailbox providers (gmail.com, outlook.com, ...) host unrelated
+people, so they are interleaved but not throttled.
+"""
+
+import time
+from collections import OrderedDict, deque
+
+
+def recipient_domain(email):
+    """Lower-cased domain of an address"""
+    return email.rsplit('@', 1)[-1].strip().lower()
+
+
+class DomainBucket:
+    """Recipients and recent send times for one domain"""
+
+    def __init__(self, domain):
+        self.domain = domain
+        self.items = deque()
+        self.sent_times = deque()
+
+
+class DomainDispatcher:
+    """Round-robin queue over per-domain buckets with per-domain rate limits"""
+
+    def __init__(self, min_interval=60, max_per_hour=20, unthrottled=(), clock=time.time):
+        """
+        Args:
+            min_interval (float): Seconds between two sends to the same domain
+            max_per_hour (int): Sends per domain in any rolling hour (0 = no cap)
+            unthrottled (iterable): Domains that are interleaved but not limited
+            clock (callable): Time source (a virtual clock in dry runs)
+        """
+        self.min_interval = min_interval
+        self.max_per_hour = max_per_hour
+        self.unthrottled = set(unthrottled)
+        self.clock = clock
+        self._buckets = {}
+        # Domains with queued items, in round-robin order
+        self._rotation = OrderedDict()
+        self._size = 0
+        self.throttled = 0
+
+    def __len__(self):
+        return self._size
+
+    def _bucket(self, domain):
+        bucket = self._buckets.get(domain)
+        if bucket is None:
+            bucket = self._buckets[domain] = DomainBucket(domain)
+        return bucket
+
+    def add(self, item, domain):
+        """
+        Queue an item behind the other items of its domain
+
+        Args:
+            item: Recipient (or anything the caller sends)
+            domain (str): Recipient domain
+        """
+        self._bucket(domain).items.append(item)
+        self._rotation.setdefault(domain, None)
+        self._size += 1
+
+    def _ready_at(self, bucket, now):
+        """Earliest time the domain may receive another message"""
+        if bucket.domain in self.unthrottled or not bucket.sent_times:
+            return now
+        while bucket.sent_times and bucket.sent_times[0] <= now - 3600:
+            bucket.sent_times.popleft()
+        ready = bucket.sent_times[-1] + self.min_interval if bucket.sent_times else now
+        if self.max_per_hour and len(bucket.sent_times) >= self.max_per_hour:
+            ready = max(ready, bucket.sent_times[-self.max_per_hour] + 3600)
+        return ready
+
+    def next_ready(self):
+        """
+        Take the next item whose domain may receive mail now
+
+        Domains take turns: the domain served is moved to the back of the
+        rotation, and throttled domains are skipped until they are ready.
+
+        Returns:
+            The item, or None if every queued domain is throttled (or nothing is queued)
+        """
+        now = self.clock()
+        for domain in list(self._rotation):
+            bucket = self._buckets[domain]
+            if self._ready_at(bucket, now) > now:
+                self.throttled += 1
+                continue
+            item = bucket.items.popleft()
+            self._size -= 1
+            del self._rotation[domain]
+            if bucket.items:
+                self._rotation[domain] = None
+            return item
+        return None
+
+    def seconds_until_ready(self):
+        """
+        Time until some queued domain may receive mail
+
+        Returns:
+            float: Seconds (0 if one is ready), or None if nothing is queued
+        """
+        if not self._rotation:
+            return None
+        now = self.clock()
+        return max(0.0, min(self._ready_at(self._buckets[d], now) for d in self._rotation) - now)
+
+    def record_send(self, domain):
+        """Count a message handed to Gmail against its domain's limits"""
+        self._bucket(domain).sent_times.append(self.clock())
+
+    def stats(self):
+        """Queued items and domains, and how often a domain had to wait its turn"""
+        return {
+            'queued': self._size,
+            'domains': len(self._rotation),
+            'throttled_turns': self.throttled
+        }
@@ -3,10 +3,80 @@ File handling utilities for resume and email list uploads
 """
 
 import os
-from werkzeug.utils import secure_filename
-import pandas as pd
+import copy
+import time
+import threading
+import multiprocessing
+from collections import OrderedDict
 import csv
 
+from services.upload_store import get_upload_store, content_hash_for_path
+
+# Pages handed to one extraction task
+PDF_PAGE_CHUNK = 4
+PDF_EXTRACT_TIMEOUT = float(os.getenv('PDF_EXTRACT_TIMEOUT', 20))
+PDF_EXTRACT_WORKERS = int(os.getenv('PDF_EXTRACT_WORKERS', min(4, os.cpu_count() or 1)))
+
+_pdf_pool = None
+_pdf_pool_lock = threading.Lock()
+
+# Parsed CSVs and extracted PDF text, keyed by upload content hash
+PARSE_CACHE_SIZE = 32
+_parse_cache = OrderedDict()
+_parse_cache_lock = threading.Lock()
+
+
+def _cached(kind, path, args, compute):
+    """
+    Memoize a parse of a stored upload by its content hash
+    
+    Paths outside the upload store are parsed every time. Empty results
+    (errors) are not cached.
+    """
+    content_hash = content_hash_for_path(path)
+    if content_hash is None:
+        return compute()
+    
+    # Reads count as use for upload retention
+    get_upload_store().touch(path)
+    key = (kind, content_hash) + args
+    with _parse_cache_lock:
+        if key in _parse_cache:
+            _parse_cache.move_to_end(key)
+            return copy.deepcopy(_parse_cache[key])
+    
+    result = compute()
+    if result:
+        with _parse_cache_lock:
+            _parse_cache[key] = copy.deepcopy(result)
+            while len(_parse_cache) > PARSE_CACHE_SIZE:
+                _parse_cache.popitem(last=False)
+    return result
+
+
+def _get_pdf_pool():
+    """
+    Shared extraction pool, created on first use
+    
+    Workers come from a forkserver (spawn where that is unavailable), not
+    from forking this multi-threaded process, so they never inherit a lock
+    held by another thread. The task function lives in services.pdf_worker;
+    like any spawned process, a worker also imports the main module as
+    '__mp_main__', so entry points must not start services on import.
+    """
+    global _pdf_pool
+    if _pdf_pool is None:
+        with _pdf_pool_lock:
+            if _pdf_pool is None:
+                if 'forkserver' in multiprocessing.get_all_start_methods():
+                    context = multiprocessing.get_context('forkserver')
+                    context.set_forkserver_preload(['services.pdf_worker'])
+                else:
+                    context = multiprocessing.get_context('spawn')
+                _pdf_pool = context.Pool(PDF_EXTRACT_WORKERS)
+    return _pdf_pool
+
+
 class FileService:
     """Service for handling file uploads and processing"""
     
@@ -23,6 +93,9 @@ class FileService:
         """
         Save uploaded file securely
         
+        The file is stored once per content (see UploadStore), so uploading
+        the same file again returns the same path.
+        
         Args:
             file: File object from request
             upload_folder (str): Directory to save file
@@ -31,16 +104,7 @@ class FileService:
             str: Path to saved file or None if error
         """
         if file and FileService.allowed_file(file.filename):
-            filename = secure_filename(file.filename)
-            # Add timestamp to avoid conflicts
-            import time
-            timestamp = str(int(time.time()))
-            name, ext = os.path.splitext(filename)
-            filename = f"{name}_{timestamp}{ext}"
-            
-            filepath = os.path.join(upload_folder, filename)
-            file.save(filepath)
-            return filepath
+            return get_upload_store(upload_folder).save(file)['path']
         return None
     
     @staticmethod
@@ -48,6 +112,8 @@ class FileService:
         """
         Extract email addresses from CSV file
         
+        Results for files in the upload store are cached by content hash.
+        
         Args:
             csv_path (str): Path to CSV file
             max_count (int): Maximum number of emails to extract
@@ -55,9 +121,15 @@ class FileService:
         Returns:
             list: List of dictionaries with email data
         """
+        return _cached('csv', csv_path, (max_count,),
+                       lambda: FileService._read_emails_from_csv(csv_path, max_count))
+    
+    @staticmethod
+    def _read_emails_from_csv(csv_path, max_count):
         emails = []
         try:
-            # Try pandas first for better CSV handling
+            # Try pandas first for better CSV handling (imported on first use)
+            import pandas as pd
             df = pd.read_csv(csv_path, encoding='utf-8')
             
             # Look for email column (case-insensitive)
@@ -92,7 +164,9 @@ class FileService:
                     email_data = {
                         'email': email,
                         'name': str(row[name_col]).strip() if name_col and pd.notna(row[name_col]) else 'Hiring Manager',
-                        'company': str(row[company_col]).strip() if company_col and pd.notna(row[company_col]) else ''
+                        'company': str(row[company_col]).strip() if company_col and pd.notna(row[company_col]) else '',
+                        # Every column, for template placeholders
+                        'fields': {str(col): str(row[col]).strip() for col in df.columns if pd.notna(row[col])}
                     }
                     emails.append(email_data)
             
@@ -102,7 +176,7 @@ class FileService:
             try:
                 with open(csv_path, 'r', encoding='utf-8') as file:
                     reader = csv.reader(file)
-                    next(reader)  # Skip header
+                    header = next(reader)
                     for idx, row in enumerate(reader):
                         if idx >= max_count:
                             break
@@ -112,7 +186,8 @@ class FileService:
                                 emails.append({
                                     'email': email,
                                     'name': row[1].strip() if len(row) > 1 and row[1].strip() else 'Hiring Manager',
-                                    'company': ''
+                                    'company': '',
+                                    'fields': {col: value.strip() for col, value in zip(header, row) if value.strip()}
                                 })
             except Exception as e2:
                 print(f"Error reading CSV with basic reader: {e2}")
@@ -120,6 +195,77 @@ class FileService:
         
         return emails
     
+    @staticmethod
+    def extract_pdf_text(pdf_path, max_chars=None, max_pages=None, timeout=None):
+        """
+        Extract text from a PDF (e.g. a resume)
+        
+        Pages are read in chunks in a worker process pool. With a budget,
+        extraction stops as soon as the budget is met. Without one, the
+        chunks after the first run in parallel. A PDF that takes longer than
+        the timeout is abandoned; its worker gives up on it a moment later.
+        
+        Results for files in the upload store are cached by content hash.
+        
+        Args:
+            pdf_path (str): Path to PDF file
+            max_chars (int, optional): Stop once this many characters are extracted
+            max_pages (int, optional): Read at most this many pages
+            timeout (float, optional): Seconds before giving up (PDF_EXTRACT_TIMEOUT)
+            
+        Returns:
+            str: Extracted text (at most max_chars) or None if error
+        """
+        return _cached('pdf', pdf_path, (max_chars, max_pages),
+                       lambda: FileService._read_pdf_text(pdf_path, max_chars, max_pages, timeout))
+    
+    @staticmethod
+    def _read_pdf_text(pdf_path, max_chars, max_pages, timeout):
+        timeout = timeout or PDF_EXTRACT_TIMEOUT
+        deadline = time.time() + timeout
+        pool = _get_pdf_pool()
+        from services.pdf_worker import extract_pages
+        
+        def run(start, stop, budget):
+            # The worker stops on its own shortly after we stop waiting
+            time_limit = max(0.0, deadline - time.time()) + 1
+            return pool.apply_async(extract_pages, (pdf_path, start, stop, budget, time_limit))
+        
+        def result(task):
+            return task.get(max(0.0, deadline - time.time()))
+        
+        try:
+            # The first chunk also tells us how many pages there are
+            first_stop = min(max_pages or PDF_PAGE_CHUNK, PDF_PAGE_CHUNK)
+            parts, total_pages = result(run(0, first_stop, max_chars))
+            chars = sum(len(p) + 1 for p in parts)
+            last_page = min(total_pages, max_pages or total_pages)
+            chunks = [(start, min(start + PDF_PAGE_CHUNK, last_page))
+                      for start in range(first_stop, last_page, PDF_PAGE_CHUNK)]
+            
+            if max_chars is not None:
+                # Budgeted: one chunk at a time so we can stop early
+                for start, stop in chunks:
+                    if chars >= max_chars:
+                        break
+                    more, _ = result(run(start, stop, max_chars - chars))
+                    parts.extend(more)
+                    chars += sum(len(p) + 1 for p in more)
+            else:
+                # Full extraction: every remaining chunk at once, joined in page order
+                for task in [run(start, stop, None) for start, stop in chunks]:
+                    parts.extend(result(task)[0])
+            
+            text = '\n'.join(parts).strip()
+            return text[:max_chars] if max_chars is not None else text
+        except multiprocessing.TimeoutError:
+            # Only this request's tasks are abandoned; the pool keeps serving others
+            print(f"PDF extraction timed out after {timeout:.0f}s: {pdf_path}")
+            return None
+        except Exception as e:
+            print(f"Error extracting resume text: {e}")
+            return None
+    
     @staticmethod
     def get_file_info(filepath):
         """
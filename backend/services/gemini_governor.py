@@ -0,0 +1,366 @@
+"""
+Gemini Governor - requests/tokens-per-minute budget shared by every process
+
+Interactive AI routes, AI jobs and campaign runners all call Gemini. Without
+coordination a burst from one of them trips the provider's rate limit, and
+every caller falls back to the canned template. Every model call therefore
+acquires a slot here first. The governor keeps a sliding one-minute window
+of admitted requests and their estimated tokens. It admits a caller only
+when both the RPM and the TPM budget have room.
+
+Waiters are served in priority order and FIFO within a priority. Interactive
+requests (the default) go before background campaign work. A background
+waiter that has queued longer than `aging` seconds is treated as interactive,
+so campaigns cannot be starved.
+
+The web process and campaign workers (CAMPAIGN_RUNNER=external) call the
+same API key, so the window itself lives in a `gemini_admissions` table in
+campaigns.db. A slot is taken in a write transaction that first checks the
+budget, so all processes together stay within GEMINI_RPM and GEMINI_TPM.
+The priority queue is per process; across processes, slots go to whoever
+asks first once the window has room.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+PRIORITY_INTERACTIVE = 'interactive'
+PRIORITY_BACKGROUND = 'background'
+PRIORITIES = (PRIORITY_INTERACTIVE, PRIORITY_BACKGROUND)
+
+_local = threading.local()
+
+
+def current_priority():
+    """Priority of Gemini calls made by the current thread"""
+    return getattr(_local, 'priority', PRIORITY_INTERACTIVE)
+
+
+@contextmanager
+def gemini_priority(priority):
+    """
+    Run Gemini calls made by this thread at the given priority
+
+    Args:
+        priority (str): 'interactive' or 'background'
+    """
+    previous = current_priority()
+    _local.priority = priority
+    try:
+        yield
+    finally:
+        _local.priority = previous
+
+
+class GovernorTimeout(Exception):
+    """Raised when a caller waited longer than its timeout for a slot"""
+
+
+class SharedBudget:
+    """Admitted Gemini calls of every process, kept in SQLite"""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        conn = self._connect()
+        try:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS gemini_admissions (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    admitted_at REAL NOT NULL,
+                    tokens INTEGER NOT NULL
+                )
+            ''')
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_gemini_admissions_at ON gemini_admissions(admitted_at)")
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+
+    def reserve(self, tokens, now, window, time_until_fits):
+        """
+        Record a call if it fits the budget right now
+
+        Args:
+            tokens (int): Estimated tokens for the call
+            now (float): Current time
+            window (float): Window length in seconds
+            time_until_fits (callable): (admitted, tokens, now) -> seconds to wait,
+                where admitted is the window's [admitted_at, tokens] entries
+
+        Returns:
+            tuple: (row id or None, seconds to wait when not admitted)
+        """
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DELETE FROM gemini_admissions WHERE admitted_at <= ?", (now - window,))
+            admitted = [list(row) for row in conn.execute(
+                "SELECT admitted_at, tokens FROM gemini_admissions ORDER BY admitted_at, id"
+            )]
+            wait = time_until_fits(admitted, tokens, now)
+            if wait > 0:
+                conn.execute("COMMIT")
+                return None, wait
+            row_id = conn.execute(
+                "INSERT INTO gemini_admissions (admitted_at, tokens) VALUES (?, ?)", (now, tokens)
+            ).lastrowid
+            conn.execute("COMMIT")
+            return row_id, 0.0
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def settle(self, row_id, tokens):
+        conn = self._connect()
+        try:
+            conn.execute("UPDATE gemini_admissions SET tokens = ? WHERE id = ?", (tokens, row_id))
+        finally:
+            conn.close()
+
+    def usage(self, now, window):
+        """Requests and tokens in the current window"""
+        conn = self._connect()
+        try:
+            return conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(tokens), 0) FROM gemini_admissions WHERE admitted_at > ?",
+                (now - window,)
+            ).fetchone()
+        finally:
+            conn.close()
+
+
+class GeminiGovernor:
+    """Sliding-window RPM/TPM limiter with a priority wait queue"""
+
+    def __init__(self, rpm=60, tpm=32000, window=60.0, aging=30.0, shared=None):
+        """
+        Args:
+            rpm (int): Requests admitted per window
+            tpm (int): Estimated tokens (prompt + expected output) admitted per window
+            window (float): Window length in seconds
+            aging (float): Seconds after which a background waiter counts as interactive
+            shared (SharedBudget, optional): Window shared with other processes;
+                without it the window is kept in memory for this process only
+        """
+        self.rpm = rpm
+        self.tpm = tpm
+        self.window = window
+        self.aging = aging
+        self.shared = shared
+        self._admitted = deque()  # [admitted_at, tokens], when not shared
+        self._waiters = []
+        self._seq = 0
+        self._reserving = None  # Caller whose shared reservation is in flight
+        self._cond = threading.Condition()
+        self._stats = {p: {'admitted': 0, 'timeouts': 0, 'wait_total': 0.0, 'wait_max': 0.0}
+                       for p in PRIORITIES}
+
+    def _expire(self, now):
+        while self._admitted and self._admitted[0][0] <= now - self.window:
+            self._admitted.popleft()
+
+    def _rank(self, waiter, now):
+        if waiter['priority'] == PRIORITY_INTERACTIVE or now - waiter['since'] >= self.aging:
+            return 0
+        return 1
+
+    def _head(self, now):
+        return min(self._waiters, key=lambda w: (self._rank(w, now), w['seq']))
+
+    def _time_until_fits(self, tokens, now, admitted=None):
+        """Seconds until a request of `tokens` fits in both budgets (0 if now)"""
+        admitted = self._admitted if admitted is None else admitted
+        wait = 0.0
+        if len(admitted) >= self.rpm:
+            oldest = admitted[len(admitted) - self.rpm][0]
+            wait = max(wait, oldest + self.window - now)
+
+        used = sum(entry[1] for entry in admitted)
+        # A single request larger than the whole budget waits for an empty window
+        excess = used + min(tokens, self.tpm) - self.tpm
+        if excess > 0:
+            for admitted_at, entry_tokens in admitted:
+                excess -= entry_tokens
+                if excess <= 0:
+                    wait = max(wait, admitted_at + self.window - now)
+                    break
+        return wait
+
+    def _reserve(self, tokens, now):
+        """Admit a call if it fits now; returns (entry or None, seconds to wait)"""
+        if self.shared is not None:
+            row_id, wait = self.shared.reserve(
+                tokens, now, self.window,
+                lambda admitted, tokens, now: self._time_until_fits(tokens, now, admitted)
+            )
+            return ([now, tokens, row_id] if row_id is not None else None), wait
+        self._expire(now)
+        wait = self._time_until_fits(tokens, now)
+        if wait > 0:
+            return None, wait
+        entry = [now, tokens]
+        self._admitted.append(entry)
+        return entry, 0.0
+
+    def _reserve_released(self, caller, tokens, now):
+        """
+        _reserve for a caller holding the condition
+
+        The shared reservation is a database transaction that may wait for
+        other processes, so it runs with the condition released; `caller` is
+        marked as reserving meanwhile and nobody else in this process starts
+        one. The local window is only touched under the condition.
+        """
+        if self.shared is None:
+            return self._reserve(tokens, now)
+        self._reserving = caller
+        self._cond.release()
+        try:
+            return self._reserve(tokens, now)
+        finally:
+            self._cond.acquire()
+            self._reserving = None
+            self._cond.notify_all()
+
+    def acquire(self, tokens, priority=None, timeout=None):
+        """
+        Block until the call fits in the budget, then record it
+
+        Args:
+            tokens (int): Estimated tokens for the call
+            priority (str, optional): Defaults to the thread's gemini_priority()
+            timeout (float, optional): Give up after this many seconds
+
+        Returns:
+            list: The admitted [timestamp, tokens] entry, for settle()
+
+        Raises:
+            GovernorTimeout: If no slot became free within the timeout
+        """
+        priority = priority or current_priority()
+        start = time.time()
+        deadline = start + timeout if timeout else None
+
+        with self._cond:
+            self._seq += 1
+            waiter = {'seq': self._seq, 'priority': priority, 'since': start}
+            self._waiters.append(waiter)
+            try:
+                while True:
+                    now = time.time()
+                    delay = None
+                    if self._reserving is None and self._head(now) is waiter:
+                        entry, delay = self._reserve_released(waiter, tokens, now)
+                        if entry is not None:
+                            break
+                        now = time.time()
+                    if deadline is not None and now >= deadline:
+                        self._stats[priority]['timeouts'] += 1
+                        raise GovernorTimeout(f"Waited {now - start:.1f}s for Gemini quota")
+                    # Wake at least every second so aging can reorder the queue
+                    wake = min(delay if delay is not None else 1.0, 1.0)
+                    if deadline is not None:
+                        wake = min(wake, deadline - now)
+                    self._cond.wait(wake)
+            finally:
+                self._waiters.remove(waiter)
+                self._cond.notify_all()
+
+            waited = time.time() - start
+            stats = self._stats[priority]
+            stats['admitted'] += 1
+            stats['wait_total'] += waited
+            stats['wait_max'] = max(stats['wait_max'], waited)
+            return entry
+
+    def try_acquire(self, tokens):
+        """
+        Take a slot only if one is free right now and nobody is queued
+
+        Args:
+            tokens (int): Estimated tokens for the call
+
+        Returns:
+            list: The admitted entry, or None without waiting
+        """
+        with self._cond:
+            if self._waiters or self._reserving is not None:
+                return None
+            entry, _ = self._reserve_released(object(), tokens, time.time())
+            return entry
+
+    def settle(self, entry, tokens):
+        """
+        Replace an admitted call's token estimate with a better one
+
+        Args:
+            entry (list): Value returned by acquire()
+            tokens (int): Tokens actually used (prompt + output)
+        """
+        if self.shared is not None:
+            self.shared.settle(entry[2], tokens)
+        with self._cond:
+            entry[1] = tokens
+            self._cond.notify_all()
+
+    def stats(self):
+        """
+        Current budget usage, queue depth and wait times
+
+        Returns:
+            dict: Window usage, limits, and per-priority queue/admitted/wait figures
+        """
+        now = time.time()
+        if self.shared is not None:
+            requests, tokens = self.shared.usage(now, self.window)
+        with self._cond:
+            self._expire(now)
+            if self.shared is None:
+                requests, tokens = len(self._admitted), sum(entry[1] for entry in self._admitted)
+            report = {
+                'rpm_limit': self.rpm,
+                'tpm_limit': self.tpm,
+                'shared': self.shared is not None,
+                'requests_in_window': requests,
+                'tokens_in_window': tokens,
+                'queue_depth': len(self._waiters)
+            }
+            for priority, stats in self._stats.items():
+                waiting = [w for w in self._waiters if w['priority'] == priority]
+                report[priority] = {
+                    'queued': len(waiting),
+                    'oldest_wait_s': round(max((now - w['since'] for w in waiting), default=0.0), 2),
+                    'admitted': stats['admitted'],
+                    'timeouts': stats['timeouts'],
+                    'avg_wait_s': round(stats['wait_total'] / stats['admitted'], 3) if stats['admitted'] else 0.0,
+                    'max_wait_s': round(stats['wait_max'], 3)
+                }
+            return report
+
+
+# Singleton instance
+_governor = None
+_governor_lock = threading.Lock()
+
+def get_gemini_governor():
+    """Get or create the Gemini governor, whose window is shared through campaigns.db"""
+    global _governor
+    if _governor is None:
+        with _governor_lock:
+            if _governor is None:
+                default_db = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'campaigns.db')
+                _governor = GeminiGovernor(
+                    rpm=int(os.getenv('GEMINI_RPM', 60)),
+                    tpm=int(os.getenv('GEMINI_TPM', 32000)),
+                    shared=SharedBudget(os.getenv('GEMINI_BUDGET_DB', default_db))
+                )
+    return _governor
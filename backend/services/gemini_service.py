@@ -3,27 +3,124 @@ Gemini AI Service for Email Generation
 Generates personalized email content using Google's Gemini AI
 """
 
-import google.generativeai as genai
 import os
+import queue
+import threading
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
 from dotenv import load_dotenv
-import PyPDF2
-import random
+
+from services.resume_digest import get_digest_service, estimate_tokens
+from services.gemini_governor import get_gemini_governor, GovernorTimeout
+from services.circuit_breaker import get_gemini_breaker, CircuitOpenError
+from services.model_providers import GeminiProvider, HedgedModel
+from services.ats_service import get_ats_analyzer
+from services.file_service import FileService
 
 load_dotenv(override=True)
 
+# Stands in for the recipient's name in company-level drafts; filled in
+# locally by the template engine for each recipient
+NAME_PLACEHOLDER = '{name}'
+
+# Output tokens reserved in the governor's budget before the real size is known
+EMAIL_OUTPUT_TOKENS = 400
+SUBJECT_OUTPUT_TOKENS = 20
+
+# Resume text read for prompts; the digest only needs the first few pages
+RESUME_TEXT_BUDGET = 12000
+
 class GeminiEmailGenerator:
     """Service for generating personalized emails using Gemini AI"""
     
-    def __init__(self):
-        """Initialize Gemini AI with API key"""
-        api_key = os.getenv('GEMINI_API_KEY')
-        if not api_key:
-            raise ValueError("GEMINI_API_KEY not found in environment variables")
-        
-        genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel('gemini-pro')
+    def __init__(self, provider=None):
+        """
+        Initialize Gemini AI with API key
+        
+        Args:
+            provider (ModelProvider, optional): Model backend to use instead of
+                Gemini (e.g. a FakeProvider in load tests)
+        """
+        if provider is None:
+            api_key = os.getenv('GEMINI_API_KEY')
+            if not api_key:
+                raise ValueError("GEMINI_API_KEY not found in environment variables")
+            provider = self._build_provider(api_key)
+        self.provider = provider
+        self.governor = get_gemini_governor()
+        self.breaker = get_gemini_breaker()
+        # How long a call may queue for RPM/TPM budget before falling back
+        self.queue_timeout = float(os.getenv('GEMINI_QUEUE_TIMEOUT', 120))
+        # How long a single model call may take before it counts as failed
+        self.timeout = float(os.getenv('GEMINI_TIMEOUT', 30))
+        self._executor = ThreadPoolExecutor(max_workers=int(os.getenv('GEMINI_MAX_CONCURRENCY', 16)),
+                                            thread_name_prefix='gemini')
+    
+    def _build_provider(self, api_key):
+        """Gemini provider, wrapped in a HedgedModel when GEMINI_HEDGE is on"""
+        primary = GeminiProvider(os.getenv('GEMINI_MODEL', 'gemini-pro'), api_key=api_key)
+        if os.getenv('GEMINI_HEDGE', 'False') != 'True':
+            return primary
+        
+        hedge_model = os.getenv('GEMINI_HEDGE_MODEL')
+        hedge = GeminiProvider(hedge_model) if hedge_model and hedge_model != primary.name else primary
+        # A hedge is an extra request, so it only goes out if the shared budget has room
+        return HedgedModel(
+            primary, hedge,
+            percentile=float(os.getenv('GEMINI_HEDGE_PERCENTILE', 95)),
+            can_hedge=lambda prompt: get_gemini_governor().try_acquire(
+                estimate_tokens(prompt) + EMAIL_OUTPUT_TOKENS) is not None
+        )
     
-    def generate_email(self, recipient_name='Hiring Manager', company='', job_role=None, experience_level=None, resume_text=None):
+    def _admit(self, tokens):
+        """
+        Pass the circuit breaker and the shared RPM/TPM budget
+        
+        Returns:
+            list: Governor entry for settle()
+        
+        Raises:
+            CircuitOpenError: If Gemini is failing and the breaker is open
+            GovernorTimeout: If no budget became free in time
+        """
+        if not self.breaker.allow():
+            raise CircuitOpenError("Gemini circuit is open, using fallback")
+        try:
+            return self.governor.acquire(tokens, timeout=self.queue_timeout)
+        except GovernorTimeout:
+            self.breaker.cancel()
+            raise
+    
+    def _generate(self, prompt, output_tokens):
+        """
+        Call the model through the breaker, the shared budget and a timeout
+        
+        Args:
+            prompt (str): Prompt text
+            output_tokens (int): Expected response size, reserved up front
+            
+        Returns:
+            str: Response text
+        """
+        prompt_tokens = estimate_tokens(prompt)
+        entry = self._admit(prompt_tokens + output_tokens)
+        cancel = threading.Event()
+        future = self._executor.submit(self.provider.generate, prompt, cancel)
+        try:
+            text = future.result(timeout=self.timeout)
+        except FutureTimeout:
+            cancel.set()
+            self.breaker.record_failure(f"timed out after {self.timeout:.0f}s")
+            raise TimeoutError(f"Gemini did not answer within {self.timeout:.0f}s")
+        except Exception as e:
+            self.breaker.record_failure(e)
+            raise
+        self.breaker.record_success()
+        self.governor.settle(entry, prompt_tokens + estimate_tokens(text))
+        return text
+    
+    def generate_email(self, recipient_name='Hiring Manager', company='', job_role=None, experience_level=None, resume_text=None, report=None):
         """
         Generate personalized email body using Gemini AI
         
@@ -33,15 +130,46 @@ class GeminiEmailGenerator:
             job_role (str, optional): Specific job role
             experience_level (str, optional): Experience level (e.g. Entry, Senior)
             resume_text (str, optional): Text extracted from resume for context
+            report (dict, optional): Filled with the prompt's token counts
             
         Returns:
             str: Generated email body
         """
+        prompt = self.build_email_prompt(recipient_name, company, job_role, experience_level, resume_text, report)
+        
+        try:
+            return self._generate(prompt, EMAIL_OUTPUT_TOKENS).strip()
+        except Exception as e:
+            print(f"Error generating email body: {e}")
+            # Return a fallback template
+            return self._get_fallback_email(recipient_name, company, job_role)
+    
+    def build_email_prompt(self, recipient_name='Hiring Manager', company='', job_role=None, experience_level=None, resume_text=None, report=None):
+        """
+        Build the email generation prompt
+        
+        The resume is represented by its cached digest (skills, experience,
+        projects, education) rather than raw text, which keeps prompts short
+        and never cuts a section off mid-way.
+        
+        Args:
+            recipient_name (str): Name of the recipient
+            company (str): Company name
+            job_role (str, optional): Specific job role
+            experience_level (str, optional): Experience level (e.g. Entry, Senior)
+            resume_text (str, optional): Text extracted from resume for context
+            report (dict, optional): Filled with the prompt's token counts
+            
+        Returns:
+            str: Prompt text
+        """
         
-        # Build context from resume if available
+        # Build context from resume digest if available
         resume_context = ""
+        digest = None
         if resume_text:
-            resume_context = f"\n\nCandidate Background (from resume):\n{resume_text[:2000]}"
+            digest = get_digest_service().get_digest(resume_text)
+            resume_context = f"\n\nCandidate Background (resume digest):\n{digest['text']}"
         
         # Determine the user's intent (Internship vs Job)
         position_type = "Job Opportunity"
@@ -55,6 +183,12 @@ class GeminiEmailGenerator:
             custom_instructions += f"- Tailor the content specifically for the role of '{job_role}'.\n"
         if experience_level:
             custom_instructions += f"- Emphasize the following experience/highlights: {experience_level}\n"
+        if recipient_name == NAME_PLACEHOLDER:
+            custom_instructions += (
+                f"- This draft is shared by several contacts at {company if company else 'the company'}. "
+                f"Write the literal placeholder {NAME_PLACEHOLDER} wherever the recipient's name belongs "
+                f"(e.g. 'Dear {NAME_PLACEHOLDER},') and do not mention any other person's name.\n"
+            )
             
         prompt = f"""Generate a professional, personalized cold email for a {position_type} application.
         
@@ -90,13 +224,126 @@ IMPORTANT: Return ONLY the email body text. Do NOT include:
 
 Just return the email content from greeting to closing."""
         
+        prompt_tokens = estimate_tokens(prompt)
+        if report is not None:
+            report['prompt_tokens'] = prompt_tokens
+            if digest:
+                report['resume_hash'] = digest['resume_hash']
+                report['resume_tokens'] = estimate_tokens(digest['text'])
+                # What the old raw-text excerpt would have cost
+                report['raw_resume_tokens'] = estimate_tokens(resume_text[:2000])
+        logging.debug(f"Email prompt: ~{prompt_tokens} tokens" + (f" (resume digest ~{estimate_tokens(digest['text'])})" if digest else ""))
+        return prompt
+    
+    def stream_email(self, recipient_name='Hiring Manager', company='', job_role=None, experience_level=None, resume_text=None):
+        """
+        Stream the email body as Gemini produces it
+        
+        Args:
+            recipient_name (str): Name of the recipient
+            company (str): Company name
+            job_role (str, optional): Specific job role
+            experience_level (str, optional): Experience level (e.g. Entry, Senior)
+            resume_text (str, optional): Text extracted from resume for context
+            
+        Yields:
+            tuple: ('chunk', text) for each streamed piece, or a single
+            ('fallback', body) with the template email if generation fails.
+            A fallback after some chunks replaces the partial text.
+        """
+        prompt = self.build_email_prompt(recipient_name, company, job_role, experience_level, resume_text)
+        prompt_tokens = estimate_tokens(prompt)
+        
         try:
-            response = self.model.generate_content(prompt)
-            return response.text.strip()
+            entry = self._admit(prompt_tokens + EMAIL_OUTPUT_TOKENS)
         except Exception as e:
-            print(f"Error generating email body: {e}")
-            # Return a fallback template
-            return self._get_fallback_email(recipient_name, company, job_role)
+            print(f"Error streaming email body: {e}")
+            yield 'fallback', self._get_fallback_email(recipient_name, company, job_role)
+            return
+        
+        cancel = threading.Event()
+        output_tokens = 0
+        outcome_recorded = False
+        try:
+            try:
+                for text in self._stream_chunks(prompt, cancel):
+                    if text:
+                        output_tokens += estimate_tokens(text)
+                        yield 'chunk', text
+            except Exception as e:
+                outcome_recorded = True
+                self.breaker.record_failure(e)
+                raise
+            outcome_recorded = True
+            self.breaker.record_success()
+        except Exception as e:
+            print(f"Error streaming email body: {e}")
+            yield 'fallback', self._get_fallback_email(recipient_name, company, job_role)
+        finally:
+            # Also runs when the client disconnects mid-stream (GeneratorExit):
+            # stop reading, hand back a half-open probe slot and settle the budget
+            cancel.set()
+            if not outcome_recorded:
+                self.breaker.cancel()
+            self.governor.settle(entry, prompt_tokens + output_tokens)
+    
+    def _stream_chunks(self, prompt, cancel):
+        """
+        Read the provider's stream on the executor under the GEMINI_TIMEOUT deadline
+        
+        Args:
+            prompt (str): Prompt text
+            cancel (threading.Event): Set when the caller stops reading
+            
+        Yields:
+            str: Text chunks
+            
+        Raises:
+            TimeoutError: If the stream does not finish within the timeout
+        """
+        chunks = queue.Queue()
+        
+        def pump():
+            try:
+                for text in self.provider.stream(prompt):
+                    if cancel.is_set():
+                        break
+                    chunks.put(('chunk', text))
+                chunks.put(('end', None))
+            except Exception as e:
+                chunks.put(('error', e))
+        
+        self._executor.submit(pump)
+        deadline = time.monotonic() + self.timeout
+        while True:
+            try:
+                kind, value = chunks.get(timeout=max(deadline - time.monotonic(), 0))
+            except queue.Empty:
+                cancel.set()
+                raise TimeoutError(f"Gemini stream did not finish within {self.timeout:.0f}s")
+            if kind == 'end':
+                return
+            if kind == 'error':
+                raise value
+            yield value
+    
+    def generate_company_email(self, company='', job_role=None, experience_level=None, resume_text=None):
+        """
+        Generate one email body for every contact at a company
+        
+        The body contains the {name} placeholder instead of a recipient name,
+        so it can be rendered per recipient without another Gemini call.
+        
+        Args:
+            company (str): Company name
+            job_role (str, optional): Specific job role
+            experience_level (str, optional): Experience level (e.g. Entry, Senior)
+            resume_text (str, optional): Text extracted from resume for context
+            
+        Returns:
+            str: Email body template
+        """
+        return self.generate_email(NAME_PLACEHOLDER, company, job_role, experience_level, resume_text)
     
     def generate_subject(self, recipient_name='Hiring Manager', company='', job_role=None):
         """
@@ -125,8 +372,7 @@ Requirements:
 Return ONLY the subject line text, nothing else."""
         
         try:
-            response = self.model.generate_content(prompt)
-            subject = response.text.strip().strip('"').strip("'")
+            subject = self._generate(prompt, SUBJECT_OUTPUT_TOKENS).strip().strip('"').strip("'")
             # Ensure it's not too long
             if len(subject) > 70:
                 subject = subject[:67] + "..."
@@ -138,53 +384,28 @@ Return ONLY the subject line text, nothing else."""
             
     def analyze_resume(self, resume_text, job_description=None):
         """
-        Analyze resume and provide ATS score and feedback (MOCKED)
-        """
-        # Mock Response Data
-        score = random.randint(78, 85)
-        
-        return {
-            "score": score,
-            "missing_keywords": ["Docker", "Kubernetes", "Microservices", "System Design"],
-            "strengths": [
-                "Strong academic background in Computer Science",
-                "Clear and professional formatting",
-                "Relevant full-stack development projects",
-                "Good usage of action verbs (e.g., Developed, implemented)"
-            ],
-            "weaknesses": [
-                "Lack of quantified results (e.g. 'Improved performance by 20%')",
-                "Some technical skills listed but not demonstrated in work experience"
-            ],
-            "suggestions": [
-                "Quantify your impact: Add metrics to your project descriptions to show tangible results.",
-                "Tailor your skills section: Group skills by category (Languages, Frameworks, Tools) for better readability.",
-                "Add a professional summary: Create a summary tailored to the specific role you are targeting.",
-                "Include a link to your GitHub or portfolio in the header."
-            ],
-            "summary": "Solid profile with good technical foundations. Needs more quantitative achievements to reach a top-tier score."
-        }
-
-    def extract_resume_text(self, pdf_path):
+        Analyze resume and provide ATS score and feedback
+        
+        Scored locally by the ATS analyzer; no Gemini call is made.
+        """
+        return get_ats_analyzer().analyze(resume_text, job_description)
+
+    def extract_resume_text(self, pdf_path, max_chars=RESUME_TEXT_BUDGET):
         """
         Extract text from resume PDF
         
         Args:
             pdf_path (str): Path to PDF file
+            max_chars (int, optional): Stop reading once this much text is extracted
             
         Returns:
             str: Extracted text or None if error
         """
-        try:
-            with open(pdf_path, 'rb') as file:
-                reader = PyPDF2.PdfReader(file)
-                text = ''
-                for page in reader.pages:
-                    text += page.extract_text() + '\n'
-                return text.strip()
-        except Exception as e:
-            print(f"Error extracting resume text: {e}")
-            return None
+        return FileService.extract_pdf_text(pdf_path, max_chars=max_chars)
+    
+    def close(self):
+        """Release the call executor (for short-lived generators, e.g. dry runs)"""
+        self._executor.shutdown(wait=False)
     
     def _get_fallback_email(self, recipient_name, company, job_role):
         """Fallback email template if AI generation fails"""
@@ -3,10 +3,6 @@ Gmail API Service for OAuth 2.0 Authentication and Email Sending
 Handles secure email sending using Gmail API instead of SMTP
 """
 
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import Flow
-from googleapiclient.discovery import build
-from googleapiclient.errors import HttpError
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from email.mime.base import MIMEBase
@@ -17,10 +13,92 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+def _google():
+    """
+    Import the Google client libraries on first use.
+    
+    They account for most of the app's import time, so routes that never
+    touch Gmail should not pay for them.
+    """
+    from google.oauth2.credentials import Credentials
+    from google_auth_oauthlib.flow import Flow
+    from googleapiclient.discovery import build
+    from googleapiclient.errors import HttpError
+    return Credentials, Flow, build, HttpError
+
+# HTTP statuses worth retrying later: throttling and server-side errors
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+# 403 reasons that mean "slow down" rather than "not allowed"
+RATE_LIMIT_REASONS = {'rateLimitExceeded', 'userRateLimitExceeded'}
+
+class SendResult:
+    """
+    Outcome of a send attempt.
+    
+    Truthy when the message was accepted, so existing `if success:` callers
+    keep working. Failures say whether they are worth retrying and may carry
+    the server's Retry-After hint.
+    """
+    
+    def __init__(self, success, message_id=None, retryable=False, retry_after=None,
+                 status_code=None, error=None):
+        self.success = success
+        self.message_id = message_id
+        self.retryable = retryable
+        self.retry_after = retry_after
+        self.status_code = status_code
+        self.error = error
+    
+    def __bool__(self):
+        return self.success
+    
+    def __repr__(self):
+        if self.success:
+            return f"SendResult(sent, id={self.message_id})"
+        kind = 'retryable' if self.retryable else 'permanent'
+        return f"SendResult({kind}, status={self.status_code}, retry_after={self.retry_after})"
+
+def classify_http_error(error):
+    """
+    Turn a googleapiclient HttpError into a failed SendResult
+    
+    Args:
+        error (HttpError): Error raised by the Gmail API
+        
+    Returns:
+        SendResult: Retryable for 429/5xx and rate-limit 403s, permanent otherwise
+    """
+    status = getattr(error.resp, 'status', None)
+    status = int(status) if status is not None else None
+    
+    retry_after = None
+    header = error.resp.get('retry-after') if hasattr(error.resp, 'get') else None
+    if header:
+        try:
+            retry_after = float(header)
+        except ValueError:
+            retry_after = None
+    
+    reason = ''
+    try:
+        reason = error.error_details[0].get('reason', '') if error.error_details else ''
+    except (AttributeError, IndexError, TypeError):
+        pass
+    
+    retryable = status in RETRYABLE_STATUSES or (status == 403 and reason in RATE_LIMIT_REASONS)
+    return SendResult(False, retryable=retryable, retry_after=retry_after,
+                      status_code=status, error=str(error))
+
 class GmailService:
     """Service for Gmail OAuth 2.0 and email sending"""
     
-    SCOPES = ['https://www.googleapis.com/auth/gmail.send']
+    # gmail.send cannot read the mailbox address that identifies an account in
+    # the sender pool; the OpenID email claim provides it without a Gmail
+    # read scope
+    SCOPES = ['openid',
+              'https://www.googleapis.com/auth/userinfo.email',
+              'https://www.googleapis.com/auth/gmail.send']
     
     def __init__(self):
         """Initialize Gmail service with OAuth configuration"""
@@ -48,6 +126,7 @@ class GmailService:
         Returns:
             tuple: (auth_url, state) - URL for user to visit and state token
         """
+        _, Flow, _, _ = _google()
         try:
             flow = Flow.from_client_config(
                 self.client_config,
@@ -58,7 +137,7 @@ class GmailService:
             auth_url, state = flow.authorization_url(
                 access_type='offline',
                 include_granted_scopes='true',
-                prompt='consent'
+                prompt='consent select_account'
             )
             
             return auth_url, state
@@ -77,6 +156,7 @@ class GmailService:
         Returns:
             Credentials: Google OAuth credentials
         """
+        _, Flow, _, _ = _google()
         try:
             flow = Flow.from_client_config(
                 self.client_config,
@@ -96,7 +176,8 @@ class GmailService:
         Send email using Gmail API
         
         Args:
-            credentials_dict (dict): OAuth credentials as dictionary
+            credentials_dict (dict or Credentials): OAuth credentials as dictionary,
+                or a live Credentials object from the credential manager
             to_email (str): Recipient email address
             subject (str): Email subject
             body (str): Email body
@@ -104,18 +185,23 @@ class GmailService:
             from_name (str, optional): Sender name for display
             
         Returns:
-            bool: True if sent successfully, False otherwise
+            SendResult: Truthy if sent; otherwise says whether a retry may succeed
         """
+        Credentials, _, build, HttpError = _google()
         try:
-            # Reconstruct credentials from dictionary
-            credentials = Credentials(
-                token=credentials_dict.get('token'),
-                refresh_token=credentials_dict.get('refresh_token'),
-                token_uri=credentials_dict.get('token_uri'),
-                client_id=credentials_dict.get('client_id'),
-                client_secret=credentials_dict.get('client_secret'),
-                scopes=credentials_dict.get('scopes')
-            )
+            if isinstance(credentials_dict, dict):
+                # Reconstruct credentials from dictionary
+                credentials = Credentials(
+                    token=credentials_dict.get('token'),
+                    refresh_token=credentials_dict.get('refresh_token'),
+                    token_uri=credentials_dict.get('token_uri'),
+                    client_id=credentials_dict.get('client_id'),
+                    client_secret=credentials_dict.get('client_secret'),
+                    scopes=credentials_dict.get('scopes')
+                )
+            else:
+                # Shared live credentials: already refreshed ahead of expiry
+                credentials = credentials_dict
             
             # Build Gmail service
             service = build('gmail', 'v1', credentials=credentials)
@@ -154,14 +240,39 @@ class GmailService:
             ).execute()
             
             print(f"Email sent successfully to {to_email}. Message ID: {result.get('id')}")
-            return True
+            return SendResult(True, message_id=result.get('id'))
             
         except HttpError as error:
             print(f"Gmail API error sending to {to_email}: {error}")
-            return False
+            return classify_http_error(error)
+        except (ConnectionError, TimeoutError, OSError) as e:
+            # Network trouble: the request may not have reached Gmail
+            print(f"Network error sending email to {to_email}: {e}")
+            return SendResult(False, retryable=True, error=str(e))
         except Exception as e:
             print(f"Error sending email to {to_email}: {e}")
-            return False
+            return SendResult(False, error=str(e))
+    
+    def get_account_email(self, credentials):
+        """
+        Address of the authenticated mailbox
+        
+        Args:
+            credentials (Credentials): OAuth credentials from the callback
+            
+        Returns:
+            str: Gmail address (the id_token's verified email claim)
+            
+        Raises:
+            ValueError: If the token has no verified email
+        """
+        from google.oauth2 import id_token
+        from google.auth.transport.requests import Request
+        
+        claims = id_token.verify_oauth2_token(credentials.id_token, Request(), self.client_id)
+        if not claims.get('email') or not claims.get('email_verified'):
+            raise ValueError('Google account has no verified email address')
+        return claims['email']
     
     def verify_credentials(self, credentials_dict):
         """
@@ -173,6 +284,7 @@ class GmailService:
         Returns:
             bool: True if credentials are valid
         """
+        Credentials, _, build, _ = _google()
         try:
             credentials = Credentials(
                 token=credentials_dict.get('token'),
@@ -183,9 +295,10 @@ class GmailService:
                 scopes=credentials_dict.get('scopes')
             )
             
-            service = build('gmail', 'v1', credentials=credentials)
-            # Try to get user profile to verify credentials
-            service.users().getProfile(userId='me').execute()
+            service = build('oauth2', 'v2', credentials=credentials)
+            # The granted scopes cannot read the mailbox; the userinfo call
+            # needs a working token all the same
+            service.userinfo().get().execute()
             return True
         except Exception as e:
             print(f"Credentials verification failed: {e}")
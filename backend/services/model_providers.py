@@ -0,0 +1,248 @@
+"""
+Model Providers - pluggable text-generation backends and request hedging
+
+GeminiEmailGenerator talks to a provider rather than to the Gemini SDK
+directly. That lets it swap models, wrap them in a HedgedModel, or run
+against a FakeProvider with a controlled latency distribution in load tests
+and benchmarks.
+
+Hedging: one slow response stalls a campaign worker. HedgedModel sends the
+prompt to the primary provider. If the primary has not answered within the
+deadline (the primary's observed p95 latency), it sends the same prompt to
+a hedge provider (the same model or a lighter one). The first successful
+answer wins and the other request is cancelled.
+"""
+
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+
+class RequestCancelled(Exception):
+    """Raised by a provider call whose cancel event was set"""
+
+
+class ModelProvider:
+    """Interface every text-generation backend implements"""
+
+    name = 'provider'
+
+    def generate(self, prompt, cancel=None):
+        """
+        Generate a completion
+
+        Args:
+            prompt (str): Prompt text
+            cancel (threading.Event, optional): Set when the caller no longer
+                needs the answer (e.g. a hedge won); providers stop as early
+                as they can
+
+        Returns:
+            str: Response text
+        """
+        raise NotImplementedError
+
+    def stream(self, prompt):
+        """
+        Generate a completion piece by piece
+
+        Yields:
+            str: Text chunks
+        """
+        yield self.generate(prompt)
+
+
+class GeminiProvider(ModelProvider):
+    """Google Gemini via the google-generativeai SDK"""
+
+    def __init__(self, model_name='gemini-pro', api_key=None):
+        """
+        Args:
+            model_name (str): Gemini model to call
+            api_key (str, optional): Configures the SDK when given
+        """
+        # Heavy SDK import deferred until a provider is first built
+        import google.generativeai as genai
+        if api_key:
+            genai.configure(api_key=api_key)
+        self.name = model_name
+        self.model = genai.GenerativeModel(model_name)
+
+    def generate(self, prompt, cancel=None):
+        # The SDK call cannot be interrupted; a cancelled request is dropped
+        # before it is sent, or its answer is ignored afterwards
+        if cancel is not None and cancel.is_set():
+            raise RequestCancelled(self.name)
+        return self.model.generate_content(prompt).text
+
+    def stream(self, prompt):
+        for chunk in self.model.generate_content(prompt, stream=True):
+            yield chunk.text
+
+
+class FakeProvider(ModelProvider):
+    """Local stand-in with a configurable latency distribution"""
+
+    def __init__(self, name='fake', latency=1.0, jitter=0.3, tail_rate=0.0, tail_factor=10.0,
+                 failure_rate=0.0, response=None):
+        """
+        Args:
+            name (str): Provider name in stats
+            latency (float): Median seconds per call
+            jitter (float): Log-normal sigma around the median
+            tail_rate (float): Share of calls that are stragglers
+            tail_factor (float): How much slower a straggler is
+            failure_rate (float): Share of calls that raise
+            response (str, optional): Text returned (defaults to an echo of the prompt size)
+        """
+        self.name = name
+        self.latency = latency
+        self.jitter = jitter
+        self.tail_rate = tail_rate
+        self.tail_factor = tail_factor
+        self.failure_rate = failure_rate
+        self.response = response
+        self.calls = 0
+        self.cancelled = 0
+
+    def sample_latency(self):
+        delay = self.latency * (random.lognormvariate(0, self.jitter) if self.jitter else 1.0)
+        if self.tail_rate and random.random() < self.tail_rate:
+            delay *= self.tail_factor
+        return delay
+
+    def generate(self, prompt, cancel=None):
+        self.calls += 1
+        cancel = cancel or threading.Event()
+        if cancel.wait(self.sample_latency()):
+            self.cancelled += 1
+            raise RequestCancelled(self.name)
+        if self.failure_rate and random.random() < self.failure_rate:
+            raise RuntimeError(f"{self.name}: simulated model failure")
+        return self.response or f"[{self.name}] response to a {len(prompt)}-character prompt"
+
+
+class LatencyTracker:
+    """Rolling window of call latencies"""
+
+    def __init__(self, size=200):
+        self._samples = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def add(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def __len__(self):
+        return len(self._samples)
+
+    def percentile(self, pct):
+        """
+        Latency at the given percentile
+
+        Returns:
+            float: Seconds, or None without samples
+        """
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, int(round(pct / 100 * (len(samples) - 1))))]
+
+
+class HedgedModel(ModelProvider):
+    """Primary provider plus a hedge request once the primary runs past its p95"""
+
+    def __init__(self, primary, hedge=None, percentile=95, initial_deadline=8.0, min_samples=20,
+                 max_workers=32, can_hedge=None):
+        """
+        Args:
+            primary (ModelProvider): Provider asked first
+            hedge (ModelProvider, optional): Provider for the backup request (default: primary)
+            percentile (float): Primary latency percentile used as the hedge deadline
+            initial_deadline (float): Deadline in seconds until enough samples exist
+            min_samples (int): Samples needed before the percentile is used
+            max_workers (int): Concurrent provider calls
+            can_hedge (callable, optional): Called with the prompt before hedging;
+                returning False skips the hedge (e.g. when the shared budget is tight)
+        """
+        self.primary = primary
+        self.hedge = hedge or primary
+        self.name = f"hedged({primary.name}->{self.hedge.name})"
+        self.percentile = percentile
+        self.initial_deadline = initial_deadline
+        self.min_samples = min_samples
+        self.can_hedge = can_hedge
+        self.latency = LatencyTracker()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='model-hedge')
+        self._lock = threading.Lock()
+        self._stats = {'calls': 0, 'hedged': 0, 'hedge_wins': 0, 'hedge_skipped': 0}
+
+    def deadline(self):
+        """Seconds to wait for the primary before hedging"""
+        if len(self.latency) < self.min_samples:
+            return self.initial_deadline
+        return self.latency.percentile(self.percentile)
+
+    def _count(self, key):
+        with self._lock:
+            self._stats[key] += 1
+
+    def _timed(self, provider, prompt, cancel, record):
+        start = time.perf_counter()
+        try:
+            return provider.generate(prompt, cancel)
+        finally:
+            # A primary cancelled after losing still adds its elapsed time (a
+            # lower bound), so slow calls are not missing from the percentile
+            if record:
+                self.latency.add(time.perf_counter() - start)
+
+    def generate(self, prompt, cancel=None):
+        self._count('calls')
+        cancels = {'primary': threading.Event(), 'hedge': threading.Event()}
+        futures = {self._executor.submit(self._timed, self.primary, prompt, cancels['primary'], True): 'primary'}
+
+        done, _ = wait(futures, timeout=self.deadline())
+        if not done:
+            if self.can_hedge is None or self.can_hedge(prompt):
+                self._count('hedged')
+                futures[self._executor.submit(self._timed, self.hedge, prompt, cancels['hedge'], False)] = 'hedge'
+            else:
+                self._count('hedge_skipped')
+
+        error = None
+        pending = set(futures)
+        try:
+            while pending:
+                if cancel is not None and cancel.is_set():
+                    raise RequestCancelled(self.name)
+                done, pending = wait(pending, timeout=1.0, return_when=FIRST_COMPLETED)
+                for future in done:
+                    try:
+                        text = future.result()
+                    except Exception as e:
+                        error = e
+                        continue
+                    if futures[future] == 'hedge':
+                        self._count('hedge_wins')
+                    return text
+            raise error
+        finally:
+            # Whoever is still running lost the race
+            for event in cancels.values():
+                event.set()
+
+    def stream(self, prompt):
+        # Streams are consumed as they arrive, so they are not hedged
+        return self.primary.stream(prompt)
+
+    def stats(self):
+        """Hedge counters and the current deadline"""
+        with self._lock:
+            report = dict(self._stats)
+        report['deadline_s'] = round(self.deadline(), 3)
+        report['primary_p50_s'] = self.latency.percentile(50)
+        return report
@@ -0,0 +1,50 @@
+"""
+PDF page extraction for the worker pool in file_service.py
+
+Kept apart from the web app so a forkserver or spawn worker only imports
+this module and PyPDF2, never Flask, the services or their locks.
+"""
+
+import signal
+
+import PyPDF2
+
+
+def _expired(signum, frame):
+    raise TimeoutError('PDF extraction exceeded its time limit')
+
+
+def extract_pages(pdf_path, start, stop, max_chars=None, time_limit=None):
+    """
+    Extract pages [start, stop) of a PDF (runs in a worker process)
+
+    Args:
+        pdf_path (str): Path to PDF file
+        start (int): First page index
+        stop (int): Page index to stop before
+        max_chars (int, optional): Stop once this many characters are extracted
+        time_limit (float, optional): Seconds before the worker gives up on its
+            own, so a task the caller abandoned does not hold the worker
+
+    Returns:
+        tuple: (list of page texts, total page count)
+    """
+    alarm = time_limit and hasattr(signal, 'setitimer')
+    if alarm:
+        signal.signal(signal.SIGALRM, _expired)
+        signal.setitimer(signal.ITIMER_REAL, time_limit)
+    try:
+        reader = PyPDF2.PdfReader(pdf_path)
+        total = len(reader.pages)
+        parts = []
+        chars = 0
+        for index in range(start, min(stop, total)):
+            text = reader.pages[index].extract_text() or ''
+            parts.append(text)
+            chars += len(text) + 1
+            if max_chars is not None and chars >= max_chars:
+                break
+        return parts, total
+    finally:
+        if alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
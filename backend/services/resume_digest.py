@@ -0,0 +1,273 @@
+"""
+Resume Digest Service - compact, cached summaries of resume text for prompts
+
+Pasting `resume_text[:2000]` into every Gemini prompt cuts sections off
+mid-way and re-sends the same two thousand characters on every call. The
+digest is built once per resume (keyed by a hash of its text) by splitting
+the resume into its sections and keeping the parts that matter for a cold
+email: skills, experience, projects and education. It is stored in SQLite
+so every later prompt reuses it.
+"""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+# Bumped when build_digest changes, so digests stored by older code are rebuilt
+DIGEST_VERSION = 2
+
+# Digests kept in memory in front of SQLite
+MEMORY_SIZE = 64
+
+# Heading text (lower-case, single-spaced, without trailing colon) -> digest section
+SECTION_ALIASES = {
+    'skills': 'skills', 'technical skills': 'skills', 'core competencies': 'skills',
+    'technologies': 'skills', 'tools': 'skills', 'skills & tools': 'skills',
+    'key skills': 'skills', 'skill set': 'skills', 'technical competencies': 'skills',
+    'functional competencies': 'skills', 'competencies': 'skills', 'tech stack': 'skills',
+    'experience': 'experience', 'work experience': 'experience',
+    'professional experience': 'experience', 'internship': 'experience',
+    'internships': 'experience', 'employment': 'experience',
+    'projects': 'projects', 'academic projects': 'projects', 'personal projects': 'projects',
+    'education': 'education', 'academic background': 'education', 'qualifications': 'education',
+    'certifications': 'certifications', 'achievements': 'certifications', 'awards': 'certifications',
+    'summary': 'summary', 'objective': 'summary', 'profile': 'summary', 'about me': 'summary',
+}
+
+# How much of each section survives into the digest
+SECTION_LIMITS = {'experience': 4, 'projects': 4, 'education': 2, 'certifications': 3}
+MAX_SKILLS = 25
+MAX_LINE = 120
+
+BULLET_RE = re.compile(r'^[•●▪\-\*–·>]+\s*')
+
+# Line endings that leave a sentence unfinished (the PDF wrapped it)
+OPEN_END_RE = re.compile(r'(?:[,&|\-–/(]|\b(?:and|or|of|the|to|with|using|in|for|on|at|by|from|a|an))$',
+                         re.IGNORECASE)
+
+
+def section_for(line):
+    """
+    Digest section a resume line is the heading of
+
+    PDF extraction often doubles spaces ('PROFESSIONAL  EXPERIENCE:') or
+    detaches the colon ('EDUCATION :'), so whitespace is collapsed first.
+
+    Args:
+        line (str): One line of resume text
+
+    Returns:
+        str: Section name, or None if the line is not a known heading
+    """
+    heading = ' '.join(line.split()).rstrip(': ').lower()
+    if heading and len(heading) <= 40:
+        return SECTION_ALIASES.get(heading)
+    return None
+
+
+def _continues(previous, line):
+    """True if `line` is the wrapped rest of `previous` rather than a new entry"""
+    if BULLET_RE.match(line) or line.endswith(':'):
+        return False
+    return line[0].islower() or line[0] in '(&' or bool(OPEN_END_RE.search(previous))
+
+
+def estimate_tokens(text):
+    """
+    Rough token count for Gemini prompts (about four characters per token)
+
+    Args:
+        text (str): Prompt text
+
+    Returns:
+        int: Estimated tokens
+    """
+    return (len(text) + 3) // 4 if text else 0
+
+
+def resume_hash(resume_text):
+    """Content hash identifying a resume's extracted text"""
+    return hashlib.sha256(resume_text.encode('utf-8')).hexdigest()
+
+
+def _clip(line, limit=MAX_LINE):
+    line = ' '.join(line.split())
+    return line if len(line) <= limit else line[:limit - 3].rsplit(' ', 1)[0] + '...'
+
+
+def build_digest(resume_text):
+    """
+    Split resume text into sections and keep the essentials of each
+
+    Args:
+        resume_text (str): Text extracted from the resume PDF
+
+    Returns:
+        dict: Digest with name, summary, skills, experience, projects, education, certifications
+    """
+    sections = {}
+    current = 'header'
+    for raw in resume_text.splitlines():
+        line = ' '.join(raw.split())
+        if not line:
+            continue
+        section = section_for(line)
+        if section:
+            current = section
+            continue
+        lines = sections.setdefault(current, [])
+        if lines and _continues(lines[-1], line):
+            # A word hyphenated across the line break is rejoined whole
+            joiner = '' if lines[-1].endswith('-') and line[0].islower() else ' '
+            lines[-1] = f'{lines[-1]}{joiner}{line}'
+        else:
+            lines.append(line)
+
+    digest = {'name': _clip(sections.get('header', [''])[0], 60)}
+
+    # Skills: split lists like "Languages: Python, Java | SQL" into unique items
+    skills = []
+    for line in sections.get('skills', []):
+        # Drop the list's label and parenthesized notes ("MySQL (Schema design, ...)")
+        line = re.sub(r'\([^)]*\)', '', line.split(':', 1)[-1])
+        for item in re.split(r'[,|;•·/]', line):
+            item = BULLET_RE.sub('', item).strip()
+            if item and len(item) <= 40 and item.lower() not in {s.lower() for s in skills}:
+                skills.append(item)
+    digest['skills'] = skills[:MAX_SKILLS]
+
+    # Entry sections: prefer title lines (not bullets) and fall back to bullets
+    for section, limit in SECTION_LIMITS.items():
+        lines = sections.get(section, [])
+        titles = [l for l in lines if not BULLET_RE.match(l)]
+        chosen = titles or [BULLET_RE.sub('', l) for l in lines]
+        digest[section] = [_clip(l) for l in chosen[:limit]]
+
+    summary = ' '.join(sections.get('summary', []))
+    if not summary and len(sections) <= 1:
+        # No recognizable headings: keep the opening, cut at a sentence end
+        text = ' '.join(resume_text.split())[:600]
+        summary = text.rsplit('. ', 1)[0] + '.' if '. ' in text else text
+    digest['summary'] = _clip(summary, 300) if summary else ''
+    return digest
+
+
+def render_digest(digest):
+    """
+    Format a digest as compact prompt text
+
+    Args:
+        digest (dict): Digest from build_digest()
+
+    Returns:
+        str: Prompt-ready candidate background
+    """
+    lines = []
+    if digest.get('name'):
+        lines.append(f"Candidate: {digest['name']}")
+    if digest.get('summary'):
+        lines.append(f"Summary: {digest['summary']}")
+    if digest.get('skills'):
+        lines.append(f"Skills: {', '.join(digest['skills'])}")
+    for section in ('experience', 'projects', 'education', 'certifications'):
+        if digest.get(section):
+            lines.append(f"{section.capitalize()}: {'; '.join(digest[section])}")
+    return '\n'.join(lines)
+
+
+class ResumeDigestService:
+    """Builds each resume's digest once and serves it from SQLite afterwards"""
+
+    DB_NAME = 'cache.db'
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path or os.path.join(os.path.dirname(os.path.dirname(__file__)), self.DB_NAME)
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._init_db()
+
+    def _init_db(self):
+        """Initialize database with required tables"""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS resume_digests (
+                    resume_hash TEXT PRIMARY KEY,
+                    digest TEXT NOT NULL,
+                    source_chars INTEGER,
+                    created_at TIMESTAMP
+                )
+            ''')
+            conn.commit()
+            conn.close()
+        except Exception as e:
+            logging.error(f"Digest database initialization error: {e}")
+
+    def get_digest(self, resume_text):
+        """
+        Get the digest for a resume, building and storing it on first use
+
+        Args:
+            resume_text (str): Text extracted from the resume PDF
+
+        Returns:
+            dict: Digest plus 'resume_hash' and rendered 'text'
+        """
+        key = resume_hash(resume_text)
+        # Rows are keyed by version too, so an improved parser is not masked by old digests
+        stored_key = f'{key}:v{DIGEST_VERSION}'
+        with self._lock:
+            cached = self._memory.get(key)
+            if cached is not None:
+                self._memory.move_to_end(key)
+                return cached
+
+            digest = None
+            try:
+                conn = sqlite3.connect(self.db_path)
+                row = conn.execute(
+                    "SELECT digest FROM resume_digests WHERE resume_hash = ?", (stored_key,)
+                ).fetchone()
+                conn.close()
+                if row:
+                    digest = json.loads(row[0])
+            except Exception as e:
+                logging.error(f"Error reading resume digest: {e}")
+
+            if digest is None:
+                digest = build_digest(resume_text)
+                try:
+                    conn = sqlite3.connect(self.db_path)
+                    conn.execute(
+                        '''
+                        INSERT OR REPLACE INTO resume_digests (resume_hash, digest, source_chars, created_at)
+                        VALUES (?, ?, ?, ?)
+                        ''',
+                        (stored_key, json.dumps(digest), len(resume_text), datetime.now())
+                    )
+                    conn.commit()
+                    conn.close()
+                except Exception as e:
+                    logging.error(f"Error storing resume digest: {e}")
+
+            digest = dict(digest, resume_hash=key, text=render_digest(digest))
+            self._memory[key] = digest
+            while len(self._memory) > MEMORY_SIZE:
+                self._memory.popitem(last=False)
+            return digest
+
+
+# Singleton
+_digest_service = None
+
+def get_digest_service():
+    global _digest_service
+    if _digest_service is None:
+        _digest_service = ResumeDigestService()
+    return _digest_service
@@ -0,0 +1,108 @@
+"""
+Retry Queue for deferred resends with jittered exponential backoff
+
+Transient send failures (throttling, 5xx, network errors) are parked here
+instead of being logged as permanent failures. The campaign runner keeps
+sending new recipients and picks items back up once they are due, so a
+throttled recipient never blocks the main loop.
+"""
+
+import heapq
+import itertools
+import random
+import time
+
+
+class RetryQueue:
+    """Min-heap of items ordered by the time they become due"""
+
+    def __init__(self, max_attempts=5, base_delay=30, max_delay=3600, clock=time.time):
+        """
+        Args:
+            max_attempts (int): Total send attempts per item, including the first
+            base_delay (float): Backoff ceiling for the first retry, in seconds
+            max_delay (float): Upper bound for any single backoff
+            clock (callable): Time source (a virtual clock in dry runs)
+        """
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.clock = clock
+        self._heap = []
+        self._counter = itertools.count()
+
+    def __len__(self):
+        return len(self._heap)
+
+    def backoff(self, attempt, retry_after=None):
+        """
+        Delay before the next attempt ("full jitter" exponential backoff)
+
+        Args:
+            attempt (int): Number of attempts made so far (1 after the first failure)
+            retry_after (float, optional): Server hint; the delay never undercuts it
+
+        Returns:
+            float: Seconds to wait
+        """
+        ceiling = min(self.max_delay, self.base_delay * (2 ** (attempt - 1)))
+        delay = random.uniform(0, ceiling)
+        if retry_after:
+            delay = max(delay, retry_after)
+        return delay
+
+    def schedule(self, item, attempt, retry_after=None, reason=None):
+        """
+        Park an item for a later attempt
+
+        Args:
+            item: Anything the caller needs to retry (e.g. recipient + content)
+            attempt (int): Number of attempts made so far
+            retry_after (float, optional): Server-provided back-off in seconds
+            reason (str, optional): Why the item waits, reported by next_reason()
+
+        Returns:
+            float: Seconds until the retry, or None if attempts are exhausted
+        """
+        if attempt >= self.max_attempts:
+            return None
+        delay = self.backoff(attempt, retry_after)
+        heapq.heappush(self._heap, (self.clock() + delay, next(self._counter), item, reason))
+        return delay
+
+    def defer(self, item, due_at, reason=None):
+        """
+        Park an item until a fixed time (e.g. the next send window)
+
+        Args:
+            item: Anything the caller needs later
+            due_at (float): Unix time the item becomes due
+            reason (str, optional): Why the item waits, reported by next_reason()
+        """
+        heapq.heappush(self._heap, (due_at, next(self._counter), item, reason))
+
+    def pop_due(self):
+        """
+        Take the earliest item whose retry time has passed
+
+        Returns:
+            The item, or None if nothing is due yet
+        """
+        if self._heap and self._heap[0][0] <= self.clock():
+            return heapq.heappop(self._heap)[2]
+        return None
+
+    def next_due_in(self):
+        """
+        Seconds until the earliest item is due
+
+        Returns:
+            float: Seconds (0 if already due), or None if the queue is empty
+        """
+        if not self._heap:
+            return None
+        return max(0.0, self._heap[0][0] - self.clock())
+
+    def next_reason(self):
+        """Reason given when the earliest item was parked (None if empty or not given)"""
+        return self._heap[0][3] if self._heap else None
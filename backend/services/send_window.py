@@ -0,0 +1,140 @@
+"""
+Send Windows - the hours and weekdays a campaign may send in
+
+A window is given per campaign, e.g.
+
+    {"start": "09:00", "end": "17:00", "days": "mon-fri", "timezone": "Europe/Berlin"}
+
+and is applied in each recipient's own time zone when the CSV has a
+`timezone` (or `time_zone`/`tz`) column holding an IANA name, so mail
+arrives during the recipient's business hours. Recipients without one use
+the window's time zone.
+"""
+
+from datetime import datetime, time as dt_time, timedelta
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+DAY_NAMES = ('mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun')
+TIMEZONE_FIELDS = ('timezone', 'time_zone', 'tz')
+
+
+def parse_days(days):
+    """
+    Weekday numbers (Monday = 0) from 'mon-fri', 'mon,wed,fri' or a list
+
+    Raises:
+        ValueError: If a day name is unknown
+    """
+    if days is None:
+        return set(range(5))
+    if isinstance(days, str):
+        result = set()
+        for part in days.lower().replace(' ', '').split(','):
+            first, _, last = part.partition('-')
+            if first not in DAY_NAMES or (last and last not in DAY_NAMES):
+                raise ValueError(f"Unknown day in send window: '{part}'")
+            start = DAY_NAMES.index(first)
+            stop = DAY_NAMES.index(last) if last else start
+            # 'fri-mon' wraps around the weekend
+            result.update((start + i) % 7 for i in range((stop - start) % 7 + 1))
+        return result
+    result = {int(day) for day in days}
+    if not result or not result <= set(range(7)):
+        raise ValueError('Send window days must be weekday numbers 0 (Monday) to 6')
+    return result
+
+
+def parse_time(value):
+    """'09:30' -> datetime.time"""
+    try:
+        hours, minutes = str(value).split(':')
+        return dt_time(int(hours), int(minutes))
+    except ValueError:
+        raise ValueError(f"Send window times must look like '09:00', got '{value}'")
+
+
+class SendWindow:
+    """Daily sending hours on selected weekdays, in a time zone"""
+
+    def __init__(self, start='09:00', end='17:00', days=None, timezone='UTC'):
+        """
+        Args:
+            start (str): Opening time, 'HH:MM'
+            end (str): Closing time, 'HH:MM' (after start)
+            days: Weekdays, e.g. 'mon-fri' (default) or [0, 1, 2, 3, 4]
+            timezone (str): IANA time zone for recipients without their own
+
+        Raises:
+            ValueError: If the window is malformed
+        """
+        self.start = parse_time(start)
+        self.end = parse_time(end)
+        if self.end <= self.start:
+            raise ValueError('Send window must end after it starts')
+        self.days = parse_days(days)
+        try:
+            self.timezone = ZoneInfo(timezone)
+        except (ZoneInfoNotFoundError, ValueError):
+            raise ValueError(f"Unknown time zone: '{timezone}'")
+        self._zones = {}
+
+    @classmethod
+    def from_params(cls, spec):
+        """
+        Build a window from campaign parameters
+
+        Returns:
+            SendWindow: The window, or None if the campaign has none
+        """
+        if not spec:
+            return None
+        return cls(spec.get('start', '09:00'), spec.get('end', '17:00'),
+                   spec.get('days'), spec.get('timezone', 'UTC'))
+
+    def zone_for(self, recipient=None):
+        """The recipient's time zone if the CSV gives a valid one, else the window's"""
+        fields = (recipient or {}).get('fields') or {}
+        for key, value in fields.items():
+            if key.strip().lower() in TIMEZONE_FIELDS and value:
+                if value not in self._zones:
+                    try:
+                        self._zones[value] = ZoneInfo(value.strip())
+                    except (ZoneInfoNotFoundError, ValueError):
+                        self._zones[value] = None
+                if self._zones[value] is not None:
+                    return self._zones[value]
+        return self.timezone
+
+    def next_open(self, timestamp, recipient=None):
+        """
+        Earliest time at or after `timestamp` that is inside the window
+
+        Args:
+            timestamp (float): Unix time
+            recipient (dict, optional): Recipient whose time zone applies
+
+        Returns:
+            float: `timestamp` itself if the window is open, else when it next opens
+        """
+        zone = self.zone_for(recipient)
+        local = datetime.fromtimestamp(timestamp, zone)
+        for offset in range(8):
+            day = local.date() + timedelta(days=offset)
+            if day.weekday() not in self.days:
+                continue
+            opens = datetime.combine(day, self.start, zone)
+            closes = datetime.combine(day, self.end, zone)
+            if opens <= local < closes:
+                return timestamp
+            if local < opens:
+                return opens.timestamp()
+        # Unreachable: at least one weekday is always selected
+        return timestamp
+
+    def to_dict(self):
+        return {
+            'start': self.start.strftime('%H:%M'),
+            'end': self.end.strftime('%H:%M'),
+            'days': sorted(self.days),
+            'timezone': str(self.timezone)
+        }
@@ -0,0 +1,249 @@
+"""
+Sender Pool for spreading a campaign across several Gmail accounts
+
+Each connected account keeps its own hourly pacing and daily quota, so the
+aggregate sending rate grows with the number of accounts. With a ledger
+(the campaign store) every send slot is also claimed in the database, so
+campaigns running at the same time, in one worker or several, share each
+account's quota instead of each getting the full amount. Accounts that keep
+failing are taken out of rotation for a cooldown period and re-added
+automatically afterwards.
+"""
+
+import threading
+import time
+from collections import deque
+
+ROUND_ROBIN = 'round_robin'
+LEAST_LOADED = 'least_loaded'
+
+
+def account_id_for(email_address):
+    """
+    Identifier of a Gmail account in the sender pool
+
+    Keyed on the mailbox address rather than a token: every re-consent issues
+    a new refresh token, but quotas belong to the mailbox.
+
+    Args:
+        email_address (str): Authenticated address (GmailService.get_account_email)
+
+    Returns:
+        str: Account identifier
+    """
+    return email_address.strip().lower()
+
+
+class SenderAccount:
+    """Quota and health bookkeeping for one Gmail account"""
+
+    def __init__(self, account_id, credentials):
+        self.account_id = account_id
+        self.credentials = credentials
+        self.sent_times = deque()
+        self.next_send_at = 0.0
+        self.consecutive_errors = 0
+        self.disabled_until = 0.0
+        self.total_sent = 0
+        self.total_failed = 0
+        # Ledger reservation for the send in progress
+        self.reservation = None
+
+    def to_dict(self, now=None):
+        now = now or time.time()
+        return {
+            'account_id': self.account_id,
+            'sent_last_day': len(self.sent_times),
+            'total_sent': self.total_sent,
+            'total_failed': self.total_failed,
+            'disabled_for': max(0, round(self.disabled_until - now)),
+        }
+
+
+class SenderPool:
+    """Thread-safe pool that picks the next account allowed to send"""
+
+    def __init__(self, hourly_quota=150, daily_quota=500, strategy=ROUND_ROBIN,
+                 max_consecutive_errors=3, cooldown_seconds=600, clock=time.time, ledger=None):
+        """
+        Args:
+            hourly_quota (int): Messages per hour per account (sets the pacing)
+            daily_quota (int): Messages per rolling 24 hours per account
+            strategy (str): 'round_robin' or 'least_loaded'
+            max_consecutive_errors (int): Failures before an account is rested
+            cooldown_seconds (int): How long a failing account is rested
+            clock (callable): Time source (a virtual clock in dry runs)
+            ledger (CampaignService, optional): Shared record of account sends;
+                slots are claimed there so other runners see them
+        """
+        self.interval = 3600.0 / max(hourly_quota, 1)
+        self.daily_quota = daily_quota
+        self.strategy = strategy
+        self.max_consecutive_errors = max_consecutive_errors
+        self.cooldown_seconds = cooldown_seconds
+        self.clock = clock
+        self.ledger = ledger
+        self._accounts = []
+        self._next_index = 0
+        self._lock = threading.Lock()
+
+    def add_account(self, account_id, credentials, sent_times=None):
+        """
+        Add an account to the rotation (no-op if already present)
+
+        Args:
+            account_id (str): Account identifier
+            credentials (dict): OAuth credentials as dictionary
+            sent_times (list, optional): Earlier send timestamps, so the daily
+                quota carries over from previous runs
+        """
+        with self._lock:
+            if any(a.account_id == account_id for a in self._accounts):
+                return
+            account = SenderAccount(account_id, credentials)
+            account.sent_times.extend(sorted(sent_times or ()))
+            self._accounts.append(account)
+
+    def remove_account(self, account_id):
+        """Remove an account from the rotation permanently"""
+        with self._lock:
+            self._accounts = [a for a in self._accounts if a.account_id != account_id]
+
+    def __len__(self):
+        return len(self._accounts)
+
+    def _prune(self, account, now):
+        """Drop send timestamps that fell out of the 24 hour window"""
+        while account.sent_times and account.sent_times[0] <= now - 86400:
+            account.sent_times.popleft()
+
+    def _is_ready(self, account, now):
+        return (account.disabled_until <= now
+                and account.next_send_at <= now
+                and len(account.sent_times) < self.daily_quota)
+
+    def acquire(self):
+        """
+        Reserve the next account that may send right now
+
+        Returns:
+            SenderAccount: Account to send with, or None if none is ready
+        """
+        now = self.clock()
+        with self._lock:
+            for account in self._accounts:
+                self._prune(account, now)
+
+            ready = [a for a in self._accounts if self._is_ready(a, now)]
+            while ready:
+                account = self._pick(ready)
+                if self.ledger is not None:
+                    account.reservation = self.ledger.reserve_account_send(
+                        account.account_id, self.interval, self.daily_quota)
+                    if account.reservation is None:
+                        # Another runner sent from this account meanwhile
+                        self._sync(account)
+                        ready.remove(account)
+                        continue
+
+                # Reserve the pacing slot so concurrent callers pick another account
+                account.next_send_at = now + self.interval
+                return account
+            return None
+
+    def _pick(self, ready):
+        """Choose among the ready accounts according to the strategy"""
+        if self.strategy == LEAST_LOADED:
+            return min(ready, key=lambda a: (len(a.sent_times), a.next_send_at))
+        # Walk the rotation from where we left off
+        for offset in range(len(self._accounts)):
+            candidate = self._accounts[(self._next_index + offset) % len(self._accounts)]
+            if candidate in ready:
+                self._next_index = (self._accounts.index(candidate) + 1) % len(self._accounts)
+                return candidate
+
+    def _sync(self, account):
+        """Adopt the account's sends recorded by every runner"""
+        sent_times = self.ledger.recent_account_sends([account.account_id])[account.account_id]
+        account.sent_times = deque(sent_times)
+        if sent_times:
+            account.next_send_at = max(account.next_send_at, sent_times[-1] + self.interval)
+
+    def seconds_until_available(self):
+        """
+        Time until some account may send again
+
+        Returns:
+            float: Seconds to wait, or None if every account has used its daily quota
+        """
+        now = self.clock()
+        with self._lock:
+            waits = []
+            for account in self._accounts:
+                self._prune(account, now)
+                if len(account.sent_times) >= self.daily_quota:
+                    continue
+                ready_at = max(account.next_send_at, account.disabled_until)
+                waits.append(max(0.0, ready_at - now))
+        return min(waits) if waits else None
+
+    def seconds_until_quota(self):
+        """
+        Time until an account that used its daily quota may send again
+
+        Returns:
+            float: Seconds until the oldest send of such an account leaves the
+            24 hour window, or None if some account still has quota
+        """
+        now = self.clock()
+        with self._lock:
+            resets = []
+            for account in self._accounts:
+                self._prune(account, now)
+                if len(account.sent_times) < self.daily_quota:
+                    return None
+                # The quota frees up once enough of the oldest sends expire
+                oldest = account.sent_times[len(account.sent_times) - self.daily_quota]
+                resets.append(max(oldest + 86400 - now, account.disabled_until - now, 0.0))
+        return min(resets) if resets else None
+
+    def record_success(self, account):
+        """Count a delivered message against the account's quota"""
+        with self._lock:
+            account.sent_times.append(self.clock())
+            account.total_sent += 1
+            account.consecutive_errors = 0
+            # The ledger slot now stands for the delivered message
+            account.reservation = None
+
+    def release(self, account):
+        """Give back an acquired slot that was not used for a send"""
+        with self._lock:
+            if account.reservation is not None:
+                self.ledger.release_account_send(account.reservation)
+                account.reservation = None
+            account.next_send_at = 0.0
+
+    def record_failure(self, account, retry_after=None):
+        """
+        Count a failed send; rest the account if it keeps failing
+
+        Args:
+            account (SenderAccount): Account that failed
+            retry_after (float, optional): Server-provided back-off in seconds
+        """
+        with self._lock:
+            if account.reservation is not None:
+                self.ledger.release_account_send(account.reservation)
+                account.reservation = None
+            account.total_failed += 1
+            account.consecutive_errors += 1
+            if retry_after or account.consecutive_errors >= self.max_consecutive_errors:
+                account.disabled_until = self.clock() + (retry_after or self.cooldown_seconds)
+                account.consecutive_errors = 0
+
+    def stats(self):
+        """Per-account quota usage and health"""
+        now = self.clock()
+        with self._lock:
+            return [account.to_dict(now) for account in self._accounts]
@@ -0,0 +1,431 @@
+"""
+Suppression Service - addresses and domains that must never be contacted
+
+Suppression lists (unsubscribes, competitors, past employers) can hold
+millions of entries. They are kept in suppression.db, one row per entry:
+
+    jane@acme.com   an address
+    @acme.com       a whole domain, including its subdomains
+
+Addresses are stored canonicalized (see `canonical_email`), so
+'Jane.Doe+jobs@GoogleMail.com' and 'janedoe@gmail.com' are the same entry.
+
+Every campaign recipient is checked against the list. To keep that cheap,
+a Bloom filter over all entries sits in front of the table. A recipient the
+filter has never seen (almost everyone) costs a few hash probes in memory
+and no database query. Only filter hits, about 1% false positives plus the
+real matches, are confirmed with a primary-key lookup. The filter uses about
+1.2 MB per million entries. It is saved in the database with the list
+version it covers, so a restart loads it instead of rebuilding it.
+"""
+
+import csv
+import hashlib
+import io
+import math
+import os
+import sqlite3
+import threading
+import time
+import logging
+from datetime import datetime
+
+GMAIL_DOMAINS = ('gmail.com', 'googlemail.com')
+# Header names that mark the column holding the entries in an imported CSV
+ENTRY_COLUMNS = ('email', 'e-mail', 'email address', 'address', 'domain', 'value')
+IMPORT_BATCH = 10000
+# Smallest filter allocated, in entries
+MIN_CAPACITY = 100000
+FALSE_POSITIVE_RATE = 0.01
+# Seconds between checks for changes made by other processes
+REFRESH_INTERVAL = 30
+
+
+def canonical_email(email):
+    """
+    Canonical form of an address for suppression matching
+
+    Lower-cases it, drops a '+tag' from the local part and, for Gmail,
+    drops dots and maps googlemail.com to gmail.com.
+
+    Returns:
+        str: The canonical address, or None if it is not an address
+    """
+    local, sep, domain = (email or '').strip().strip('<>"\'').lower().rpartition('@')
+    domain = domain.rstrip('.')
+    local = local.split('+', 1)[0]
+    if domain in GMAIL_DOMAINS:
+        local, domain = local.replace('.', ''), 'gmail.com'
+    if not sep or not local or '.' not in domain or ' ' in local + domain:
+        return None
+    return f'{local}@{domain}'
+
+
+def parse_entry(value):
+    """
+    Stored key of a list entry: a canonical address or '@domain'
+
+    Returns:
+        str: The key, or None if the value is neither an address nor a domain
+    """
+    value = (value or '').strip().strip('<>"\'').lower()
+    if value.startswith('mailto:'):
+        value = value[len('mailto:'):]
+    if value.startswith('@') or ('@' not in value and value):
+        domain = value.lstrip('@').rstrip('.')
+        if '.' not in domain or any(c in domain for c in ' @/,;'):
+            return None
+        return '@' + ('gmail.com' if domain in GMAIL_DOMAINS else domain)
+    return canonical_email(value)
+
+
+def _candidate_keys(email):
+    """Keys that would suppress an address: itself and each of its parent domains"""
+    address = canonical_email(email)
+    if address is None:
+        return []
+    keys = [address]
+    labels = address.rsplit('@', 1)[1].split('.')
+    for i in range(len(labels) - 1):
+        keys.append('@' + '.'.join(labels[i:]))
+    return keys
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings (double hashing on BLAKE2b)"""
+
+    def __init__(self, capacity, error_rate=FALSE_POSITIVE_RATE, bits=None, hashes=None):
+        """
+        Args:
+            capacity (int): Entries the filter is sized for
+            error_rate (float): False positive rate at capacity
+            bits (bytes, optional): Saved bit array
+            hashes (int, optional): Saved number of hash functions
+        """
+        self.capacity = max(int(capacity), 1)
+        self.error_rate = error_rate
+        self.size = max(int(-self.capacity * math.log(error_rate) / math.log(2) ** 2), 8)
+        self.hashes = hashes or max(round(self.size / self.capacity * math.log(2)), 1)
+        self.bits = bytearray(bits) if bits is not None else bytearray((self.size + 7) // 8)
+
+    def _positions(self, value):
+        digest = hashlib.blake2b(value.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, value):
+        for pos in self._positions(value):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, value):
+        bits = self.bits
+        return all(bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(value))
+
+
+class SuppressionService:
+    """Suppression list in SQLite behind an in-memory Bloom filter"""
+
+    DB_NAME = 'suppression.db'
+
+    def __init__(self, db_path=None, refresh_interval=REFRESH_INTERVAL):
+        """
+        Args:
+            db_path (str, optional): SQLite file holding the list
+            refresh_interval (float): Seconds between checks for changes
+                made by other processes
+        """
+        self.db_path = db_path or os.path.join(os.path.dirname(os.path.dirname(__file__)), self.DB_NAME)
+        self.refresh_interval = refresh_interval
+        self._filter = None
+        self._version = None
+        self._checked_at = 0
+        self._lock = threading.Lock()
+        self._init_db()
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def _init_db(self):
+        """Initialize database with required tables"""
+        try:
+            conn = self._connect()
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS suppressions (
+                    value TEXT PRIMARY KEY,
+                    source TEXT,
+                    added_at TIMESTAMP
+                ) WITHOUT ROWID
+            ''')
+            # Bumped on every change so other processes know to reload
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS suppression_meta (
+                    id INTEGER PRIMARY KEY CHECK (id = 1),
+                    version INTEGER NOT NULL,
+                    entries INTEGER NOT NULL
+                )
+            ''')
+            conn.execute("INSERT OR IGNORE INTO suppression_meta (id, version, entries) VALUES (1, 0, 0)")
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS suppression_filter (
+                    id INTEGER PRIMARY KEY CHECK (id = 1),
+                    version INTEGER NOT NULL,
+                    capacity INTEGER NOT NULL,
+                    error_rate REAL NOT NULL,
+                    hashes INTEGER NOT NULL,
+                    bits BLOB NOT NULL
+                )
+            ''')
+            conn.commit()
+            conn.close()
+        except Exception as e:
+            logging.error(f"Suppression database initialization error: {e}")
+
+    def _meta(self, conn):
+        return conn.execute("SELECT version, entries FROM suppression_meta WHERE id = 1").fetchone()
+
+    def _save_filter(self, conn, bloom, version):
+        conn.execute(
+            '''
+            INSERT OR REPLACE INTO suppression_filter (id, version, capacity, error_rate, hashes, bits)
+            VALUES (1, ?, ?, ?, ?, ?)
+            ''',
+            (version, bloom.capacity, bloom.error_rate, bloom.hashes, bytes(bloom.bits))
+        )
+
+    def _build_filter(self, conn, entries):
+        """New filter over every stored entry, sized with room to grow"""
+        bloom = BloomFilter(max(entries * 2, MIN_CAPACITY))
+        for (value,) in conn.execute("SELECT value FROM suppressions"):
+            bloom.add(value)
+        return bloom
+
+    def _load(self, force=False):
+        """Make the in-memory filter match the stored list"""
+        now = time.time()
+        if not force and self._filter is not None and now - self._checked_at < self.refresh_interval:
+            return
+        with self._lock:
+            conn = self._connect()
+            try:
+                version, entries = self._meta(conn)
+                self._checked_at = now
+                if self._filter is not None and version == self._version:
+                    return
+                row = conn.execute(
+                    "SELECT version, capacity, error_rate, hashes, bits FROM suppression_filter WHERE id = 1"
+                ).fetchone()
+                if row and row[0] == version and entries <= row[1]:
+                    bloom = BloomFilter(row[1], row[2], bits=row[4], hashes=row[3])
+                else:
+                    started = time.time()
+                    bloom = self._build_filter(conn, entries)
+                    with conn:
+                        self._save_filter(conn, bloom, version)
+                    if entries:
+                        print(f"🚫 Built suppression filter over {entries} entries in {time.time() - started:.1f}s")
+                self._filter, self._version = bloom, version
+            finally:
+                conn.close()
+
+    def refresh(self):
+        """Pick up changes made by other processes now (e.g. when a campaign starts)"""
+        self._load(force=True)
+
+    def match(self, email):
+        """
+        Entry that suppresses an address
+
+        Args:
+            email (str): Recipient address
+
+        Returns:
+            str: The matching entry ('jane@acme.com' or '@acme.com'), or None
+        """
+        self._load()
+        bloom = self._filter
+        keys = [key for key in _candidate_keys(email) if key in bloom]
+        if not keys:
+            return None
+        conn = self._connect()
+        try:
+            for key in keys:
+                if conn.execute("SELECT 1 FROM suppressions WHERE value = ?", (key,)).fetchone():
+                    return key
+        finally:
+            conn.close()
+        return None
+
+    def is_suppressed(self, email):
+        """
+        Check if an address (or its domain) is on the suppression list
+
+        Args:
+            email (str): Recipient address
+
+        Returns:
+            bool: True if the address must not be contacted
+        """
+        return self.match(email) is not None
+
+    def import_entries(self, values, source=None):
+        """
+        Add entries to the list in bulk
+
+        Args:
+            values (iterable): Addresses, '@domain' or bare domain strings;
+                consumed lazily, so a file can be streamed
+            source (str, optional): Where the entries came from (e.g. 'unsubscribes')
+
+        Returns:
+            dict: read, added, duplicates and invalid counts
+        """
+        self._load(force=True)
+        stats = {'read': 0, 'added': 0, 'duplicates': 0, 'invalid': 0}
+        now = datetime.now()
+
+        with self._lock:
+            conn = self._connect()
+            try:
+                with conn:
+                    # Hold the write lock from the start so the filter saved at
+                    # the end covers changes other processes made meanwhile
+                    conn.execute("BEGIN IMMEDIATE")
+                    version, entries = self._meta(conn)
+                    bloom = self._filter if version == self._version else self._build_filter(conn, entries)
+                    batch = []
+                    for value in values:
+                        stats['read'] += 1
+                        key = parse_entry(value)
+                        if key is None:
+                            stats['invalid'] += 1
+                            continue
+                        batch.append((key, source, now))
+                        if len(batch) >= IMPORT_BATCH:
+                            stats['added'] += self._insert(conn, batch, bloom)
+                            batch = []
+                    if batch:
+                        stats['added'] += self._insert(conn, batch, bloom)
+                    stats['duplicates'] = stats['read'] - stats['invalid'] - stats['added']
+
+                    if stats['added']:
+                        conn.execute(
+                            "UPDATE suppression_meta SET version = version + 1, entries = entries + ? WHERE id = 1",
+                            (stats['added'],)
+                        )
+                        version, entries = self._meta(conn)
+                        if entries > bloom.capacity:
+                            # Past its capacity the filter answers 'maybe' too often
+                            bloom = self._build_filter(conn, entries)
+                        self._save_filter(conn, bloom, version)
+                        self._filter, self._version = bloom, version
+            finally:
+                conn.close()
+        return stats
+
+    def _insert(self, conn, batch, bloom):
+        """Insert one batch; returns the number of new entries"""
+        before = conn.total_changes
+        conn.executemany("INSERT OR IGNORE INTO suppressions (value, source, added_at) VALUES (?, ?, ?)", batch)
+        for key, _, _ in batch:
+            bloom.add(key)
+        return conn.total_changes - before
+
+    def import_stream(self, stream, source=None):
+        """
+        Import a text or CSV list, one entry per line
+
+        If the first row has a column named email, address or domain,
+        that column is used; otherwise the first column.
+
+        Args:
+            stream: Text file object
+            source (str, optional): Where the entries came from
+
+        Returns:
+            dict: read, added, duplicates and invalid counts
+        """
+        reader = csv.reader(stream)
+        header = next(reader, None)
+        if header is None:
+            return {'read': 0, 'added': 0, 'duplicates': 0, 'invalid': 0}
+        names = [cell.strip().lower() for cell in header]
+        column = next((names.index(name) for name in ENTRY_COLUMNS if name in names), None)
+
+        def values():
+            if column is None:
+                yield header[0] if header else ''
+            for row in reader:
+                if row:
+                    yield row[column or 0] if len(row) > (column or 0) else ''
+
+        return self.import_entries(values(), source)
+
+    def import_file(self, path, source=None):
+        """Import a list file from disk (see `import_stream`)"""
+        with open(path, newline='', encoding='utf-8-sig', errors='replace') as f:
+            return self.import_stream(f, source or os.path.basename(path))
+
+    def import_upload(self, file, source=None):
+        """Import an uploaded list file (werkzeug FileStorage) without saving it"""
+        stream = io.TextIOWrapper(file.stream, encoding='utf-8-sig', errors='replace', newline='')
+        return self.import_stream(stream, source or file.filename)
+
+    def remove(self, value):
+        """
+        Take an entry off the list
+
+        The filter keeps the removed key; it only costs one extra lookup.
+
+        Returns:
+            bool: True if the entry existed
+        """
+        key = parse_entry(value)
+        if key is None:
+            return False
+        conn = self._connect()
+        try:
+            with conn:
+                removed = conn.execute("DELETE FROM suppressions WHERE value = ?", (key,)).rowcount
+                if removed:
+                    conn.execute(
+                        "UPDATE suppression_meta SET version = version + 1, entries = entries - 1 WHERE id = 1"
+                    )
+                    # The saved filter is still a superset of the list
+                    conn.execute("UPDATE suppression_filter SET version = version + 1 WHERE id = 1")
+        finally:
+            conn.close()
+        return bool(removed)
+
+    def stats(self):
+        """Entry counts and filter size"""
+        self._load()
+        conn = self._connect()
+        try:
+            _, entries = self._meta(conn)
+            domains = conn.execute(
+                "SELECT COUNT(*) FROM suppressions WHERE value >= '@' AND value < 'A'"
+            ).fetchone()[0]
+        finally:
+            conn.close()
+        return {
+            'entries': entries,
+            'addresses': entries - domains,
+            'domains': domains,
+            'filter_capacity': self._filter.capacity,
+            'filter_bytes': len(self._filter.bits)
+        }
+
+
+# Singleton instance
+_suppression_service = None
+_suppression_service_lock = threading.Lock()
+
+def get_suppression_service():
+    """Get or create the suppression service instance"""
+    global _suppression_service
+    if _suppression_service is None:
+        with _suppression_service_lock:
+            if _suppression_service is None:
+                _suppression_service = SuppressionService()
+    return _suppression_service
@@ -0,0 +1,194 @@
+"""
+Template Service - compiled placeholder templates for non-AI personalization
+
+Templates are parsed once into a flat list of literal strings and small
+render functions, so rendering a subject/body for each recipient is a single
+join over pre-built parts.
+
+Syntax:
+    {name}                  value of a field (any CSV column, normalized)
+    {company|your team}     value with a default when the field is empty
+    {?company}...{/company} section rendered only if the field is non-empty
+    {!company}...{/company} section rendered only if the field is empty
+    {{ and }}               literal braces
+
+Placeholders that name an unknown field and have no default are left as
+written, so existing plain-text templates containing braces are unaffected.
+"""
+
+import re
+from functools import lru_cache
+
+TOKEN_RE = re.compile(r'\{\{|\}\}|\{([?!/]?)([A-Za-z_][\w .-]*?)(?:\|([^{}]*))?\}')
+
+
+class TemplateError(ValueError):
+    """Raised for malformed templates (e.g. an unclosed section)"""
+
+
+def normalize_key(key):
+    """Normalize a placeholder or column name: 'First Name' -> 'first_name'"""
+    return re.sub(r'[\s.-]+', '_', key.strip().lower())
+
+
+def build_context(recipient):
+    """
+    Flatten a recipient dictionary into template fields
+
+    Args:
+        recipient (dict): Recipient from FileService (email, name, company, fields)
+
+    Returns:
+        dict: Normalized field name -> string value
+    """
+    context = {normalize_key(k): v for k, v in (recipient.get('fields') or {}).items()}
+    for key in ('email', 'name', 'company'):
+        if recipient.get(key):
+            context[key] = recipient[key]
+
+    name = context.get('name', '')
+    if name and 'first_name' not in context:
+        context['first_name'] = name.split()[0]
+    email = context.get('email', '')
+    if '@' in email and 'domain' not in context:
+        context['domain'] = email.rsplit('@', 1)[1].lower()
+    return context
+
+
+def _field(key, default, raw):
+    def render(context):
+        value = context.get(key)
+        if value:
+            return value
+        if default is not None:
+            return default
+        # Unknown field without a default: keep the text as written
+        return '' if key in context else raw
+    return render
+
+
+def _section(key, negate, parts):
+    def render(context):
+        if bool(context.get(key)) == negate:
+            return ''
+        return ''.join(p if p.__class__ is str else p(context) for p in parts)
+    return render
+
+
+class CompiledTemplate:
+    """A parsed template; render() is cheap and thread-safe"""
+
+    def __init__(self, source):
+        self.source = source
+        self.fields = set()
+        self._parts = self._compile(source)
+        # Plain text needs no per-recipient work at all
+        self._static = ''.join(self._parts) if all(p.__class__ is str for p in self._parts) else None
+
+    def _compile(self, source):
+        stack = [(None, None, [])]
+        pos = 0
+
+        for match in TOKEN_RE.finditer(source):
+            parts = stack[-1][2]
+            if match.start() > pos:
+                parts.append(source[pos:match.start()])
+            pos = match.end()
+
+            token = match.group(0)
+            if token in ('{{', '}}'):
+                parts.append(token[0])
+                continue
+
+            marker, key, default = match.group(1), normalize_key(match.group(2)), match.group(3)
+
+            if marker in ('?', '!'):
+                self.fields.add(key)
+                stack.append((key, marker == '!', []))
+            elif marker == '/':
+                open_key, negate, section_parts = stack.pop() if len(stack) > 1 else (None, None, None)
+                if open_key != key:
+                    raise TemplateError(f"Unexpected closing tag {token}")
+                stack[-1][2].append(_section(key, negate, self._merge(section_parts)))
+            else:
+                self.fields.add(key)
+                parts.append(_field(key, default, token))
+
+        if len(stack) > 1:
+            raise TemplateError(f"Unclosed section {{?{stack[-1][0]}}}")
+
+        parts = stack[0][2]
+        if pos < len(source):
+            parts.append(source[pos:])
+        return self._merge(parts)
+
+    @staticmethod
+    def _merge(parts):
+        """Join adjacent literals so rendering touches as few parts as possible"""
+        merged = []
+        for part in parts:
+            if part.__class__ is str and merged and merged[-1].__class__ is str:
+                merged[-1] += part
+            else:
+                merged.append(part)
+        return merged
+
+    def render(self, context):
+        """
+        Render the template for one recipient
+
+        Args:
+            context (dict): Fields from build_context()
+
+        Returns:
+            str: Rendered text
+        """
+        if self._static is not None:
+            return self._static
+        return ''.join(p if p.__class__ is str else p(context) for p in self._parts)
+
+
+def escape_braces(text, keep=()):
+    """
+    Escape text so it renders as written, apart from the given placeholders
+
+    Args:
+        text (str): Free text, e.g. model output, that may contain braces
+        keep (iterable): Placeholders (e.g. '{name}') left active
+
+    Returns:
+        str: Template source that always compiles
+    """
+    keep = tuple(keep)
+    parts = re.split('(' + '|'.join(map(re.escape, keep)) + ')', text) if keep else [text]
+    return ''.join(part if part in keep else part.replace('{', '{{').replace('}', '}}') for part in parts)
+
+
+@lru_cache(maxsize=256)
+def compile_template(source):
+    """
+    Compile (and cache) a template string
+
+    Args:
+        source (str): Template text
+
+    Returns:
+        CompiledTemplate: Reusable compiled template
+    """
+    return CompiledTemplate(source or '')
+
+
+def render_email(subject_template, body_template, recipient):
+    """
+    Render a subject/body pair for one recipient
+
+    Args:
+        subject_template (CompiledTemplate): Compiled subject
+        body_template (CompiledTemplate): Compiled body
+        recipient (dict): Recipient from FileService
+
+    Returns:
+        tuple: (subject, body)
+    """
+    context = build_context(recipient)
+    return subject_template.render(context), body_template.render(context)
@@ -0,0 +1,262 @@
+"""
+Tracking Archive - moves old send history out of tracking.db
+
+`sent_emails` gains a row for every attempt and is never trimmed, so the
+hot database (and every backup of it) keeps growing. The archiver moves
+rows older than the retention period into one archive database per month
+(or year):
+
+    archive/tracking-2025-01.db
+    archive/tracking-2025-02.db
+    ...
+
+Closed periods are never written again, so they only need to be backed up
+once. Rows move in small batches. Each batch is copied and deleted in one
+transaction spanning both files, so a crash never loses or duplicates a
+row, and the runner's inserts wait only for one batch.
+
+Dedup and statistics do not read the moved rows: `contacted` and the
+aggregate tables in the hot database already cover them. After a pass
+the space freed in tracking.db is returned with incremental vacuum. A
+database created before this feature needs one full VACUUM to switch to
+incremental auto-vacuum. That VACUUM locks the file for as long as it
+takes, so it only runs from `python manage.py archive`; background passes
+still move rows but leave the freed pages in place until then.
+"""
+
+import glob
+import os
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+
+# Length of the sent_at prefix that names a period ('2025-01' / '2025')
+PERIOD_KEYS = {'month': 7, 'year': 4}
+
+
+def period_bounds(key):
+    """
+    First timestamp of a period and of the next one
+
+    Args:
+        key (str): '2025-01' (month) or '2025' (year)
+
+    Returns:
+        tuple: ('2025-01-01', '2025-02-01') style bounds comparable with sent_at
+    """
+    if len(key) == PERIOD_KEYS['year']:
+        return f'{key}-01-01', f'{int(key) + 1:04d}-01-01'
+    year, month = (int(part) for part in key.split('-'))
+    year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return f'{key}-01', f'{year:04d}-{month:02d}-01'
+
+
+class TrackingArchiver:
+    """Moves sent_emails rows past the retention period into per-period databases"""
+
+    def __init__(self, tracking_service, archive_dir, retention_days=180, period='month',
+                 interval=86400, batch_size=5000, vacuum_pages=5000):
+        """
+        Args:
+            tracking_service (TrackingService): Owner of the hot database
+            archive_dir (str): Folder for the archive databases
+            retention_days (float): Rows older than this are archived; 0 disables archiving
+            period (str): 'month' or 'year', the span of one archive database
+            interval (float): Seconds between background passes
+            batch_size (int): Rows moved per transaction
+            vacuum_pages (int): Free pages returned to the file system per vacuum step
+
+        Raises:
+            ValueError: If the period is unknown
+        """
+        if period not in PERIOD_KEYS:
+            raise ValueError(f"Archive period must be one of {', '.join(PERIOD_KEYS)}, got '{period}'")
+        self.tracking_service = tracking_service
+        self.archive_dir = archive_dir
+        self.retention_days = retention_days
+        self.period = period
+        self.interval = interval
+        self.batch_size = batch_size
+        self.vacuum_pages = vacuum_pages
+        self._timer = None
+        self._lock = threading.Lock()
+        self._run_lock = threading.Lock()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.tracking_service.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def archive_path(self, key):
+        return os.path.join(self.archive_dir, f'tracking-{key}.db')
+
+    def archive_paths(self):
+        """Existing archive databases, oldest first"""
+        return sorted(glob.glob(os.path.join(self.archive_dir, 'tracking-*.db')))
+
+    def archives(self):
+        """
+        Archive databases with their size and row count
+
+        Returns:
+            list: Dicts with period, path, rows and bytes
+        """
+        result = []
+        for path in self.archive_paths():
+            conn = sqlite3.connect(path)
+            try:
+                rows = conn.execute("SELECT COUNT(*) FROM sent_emails").fetchone()[0]
+            finally:
+                conn.close()
+            result.append({
+                'period': os.path.basename(path)[len('tracking-'):-len('.db')],
+                'path': path,
+                'rows': rows,
+                'bytes': os.path.getsize(path)
+            })
+        return result
+
+    def _move_period(self, conn, key, cutoff):
+        """Move one period's rows older than the cutoff; returns the number moved"""
+        start, end = period_bounds(key)
+        end = min(end, cutoff)
+
+        conn.execute("ATTACH DATABASE ? AS archive", (self.archive_path(key),))
+        try:
+            # Same columns as the hot table; ids are kept for cross-reference
+            conn.execute("CREATE TABLE IF NOT EXISTS archive.sent_emails AS SELECT * FROM main.sent_emails WHERE 0")
+            conn.execute("CREATE INDEX IF NOT EXISTS archive.idx_email ON sent_emails(email)")
+            columns = ', '.join(row['name'] for row in conn.execute("PRAGMA archive.table_info(sent_emails)"))
+            conn.execute("CREATE TEMP TABLE IF NOT EXISTS archive_batch (id INTEGER PRIMARY KEY)")
+
+            moved = 0
+            while True:
+                with conn:
+                    conn.execute("DELETE FROM temp.archive_batch")
+                    batch = conn.execute(
+                        '''
+                        INSERT INTO temp.archive_batch (id)
+                        SELECT id FROM main.sent_emails WHERE sent_at >= ? AND sent_at < ? LIMIT ?
+                        ''',
+                        (start, end, self.batch_size)
+                    ).rowcount
+                    if not batch:
+                        break
+                    conn.execute(f'''
+                        INSERT INTO archive.sent_emails ({columns})
+                        SELECT {columns} FROM main.sent_emails WHERE id IN temp.archive_batch
+                    ''')
+                    conn.execute("DELETE FROM main.sent_emails WHERE id IN temp.archive_batch")
+                moved += batch
+            return moved
+        finally:
+            conn.execute("DETACH DATABASE archive")
+
+    def _vacuum(self, conn, convert=False):
+        """Return free pages to the file system; returns the number of pages freed"""
+        before = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+            if not convert:
+                # A full VACUUM would block the runner's inserts until it finishes
+                print("🗜️ tracking.db does not use incremental auto-vacuum; "
+                      "run 'python manage.py archive' once to convert it")
+                return 0
+            # One-off conversion of a database created without incremental vacuum
+            print("🗜️ Converting tracking.db to incremental auto-vacuum (one full VACUUM)")
+            conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            conn.execute("VACUUM")
+            return before
+        while conn.execute("PRAGMA freelist_count").fetchone()[0]:
+            # The pragma only runs while its result rows are read
+            conn.execute(f"PRAGMA incremental_vacuum({int(self.vacuum_pages)})").fetchall()
+        return before
+
+    def archive(self, now=None, convert=False):
+        """
+        Run one archiving pass
+
+        Args:
+            now (datetime, optional): Reference time for the retention cutoff
+            convert (bool): Allow the one-off full VACUUM that switches an old
+                database to incremental auto-vacuum (manage.py only)
+
+        Returns:
+            dict: cutoff, rows moved per period and free pages returned
+        """
+        report = {'cutoff': None, 'moved': {}, 'pages_freed': 0}
+        if not self.retention_days:
+            return report
+
+        with self._run_lock:
+            cutoff = ((now or datetime.now()) - timedelta(days=self.retention_days)).strftime('%Y-%m-%d %H:%M:%S')
+            report['cutoff'] = cutoff
+            os.makedirs(self.archive_dir, exist_ok=True)
+
+            conn = self._connect()
+            try:
+                keys = [row[0] for row in conn.execute(
+                    "SELECT DISTINCT substr(sent_at, 1, ?) FROM sent_emails WHERE sent_at < ? ORDER BY 1",
+                    (PERIOD_KEYS[self.period], cutoff)
+                )]
+                for key in keys:
+                    moved = self._move_period(conn, key, cutoff)
+                    if moved:
+                        report['moved'][key] = moved
+                if report['moved'] or convert:
+                    report['pages_freed'] = self._vacuum(conn, convert)
+            finally:
+                conn.close()
+
+            if report['moved']:
+                print(f"🗄️ Archived {sum(report['moved'].values())} sent email record(s) "
+                      f"older than {cutoff} into {len(report['moved'])} period(s)")
+            return report
+
+    def _tick(self):
+        try:
+            self.archive()
+        except Exception as e:
+            print(f"Tracking archive pass failed: {e}")
+        finally:
+            self._schedule()
+
+    def _schedule(self):
+        self._timer = threading.Timer(self.interval, self._tick)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def start(self):
+        """Start the background archive timer (idempotent; no-op when archiving is disabled)"""
+        with self._lock:
+            if self._timer is None and self.retention_days:
+                self._schedule()
+
+    def stop(self):
+        """Stop the background archive timer"""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+
+# Singleton instance
+_tracking_archiver = None
+_tracking_archiver_lock = threading.Lock()
+
+def get_tracking_archiver():
+    """Get or create the archiver for tracking.db"""
+    global _tracking_archiver
+    if _tracking_archiver is None:
+        with _tracking_archiver_lock:
+            if _tracking_archiver is None:
+                from services.tracking_service import get_tracking_service
+                tracking_service = get_tracking_service()
+                default_dir = os.path.join(os.path.dirname(tracking_service.db_path), 'archive')
+                _tracking_archiver = TrackingArchiver(
+                    tracking_service,
+                    archive_dir=os.getenv('TRACKING_ARCHIVE_DIR', default_dir),
+                    retention_days=float(os.getenv('TRACKING_ARCHIVE_DAYS', 180)),
+                    period=os.getenv('TRACKING_ARCHIVE_PERIOD', 'month'),
+                    interval=float(os.getenv('TRACKING_ARCHIVE_INTERVAL', 86400))
+                )
+    return _tracking_archiver
@@ -1,12 +1,36 @@
 """
 Tracking Service for preventing duplicate emails using SQLite
+
+Every attempt is a row in `sent_emails`. Reporting reads aggregate tables
+instead of scanning that log:
+
+    email_stats   - count per campaign, day, status and recipient domain
+    email_totals  - count per status
+
+Both are kept up to date by an INSERT trigger on `sent_emails`, so every
+writer (runner, test sends, scripts) is counted without extra code on the
+write path. Databases that hold history from before the aggregates existed
+are backfilled on first start; `python manage.py rebuild-stats` recomputes
+them from the log at any time.
+
+Duplicate checks read `contacted`, one row per address and campaign that
+was ever sent to, also filled by a trigger. Old log rows can therefore be
+moved to archive databases (see tracking_archive.py) without forgetting
+who was contacted or changing the statistics.
 """
 
 import sqlite3
 import os
+import time
 import logging
 from datetime import datetime
 
+# Seconds a connection waits for a lock (archive batches, incremental vacuum)
+DB_TIMEOUT = 30
+
+# Attempts to record a send while the database stays locked
+LOG_ATTEMPTS = 3
+
 class TrackingService:
     """Service to track sent emails and prevent duplicates"""
     
@@ -16,11 +40,17 @@ class TrackingService:
         self.db_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), self.DB_NAME)
         self._init_db()
 
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=DB_TIMEOUT)
+
     def _init_db(self):
         """Initialize database with required tables"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect()
             cursor = conn.cursor()
+
+            # Only takes effect on a new database; the archiver converts old ones
+            cursor.execute("PRAGMA auto_vacuum = INCREMENTAL")
             
             # Create sent_emails table
             cursor.execute('''
@@ -38,6 +68,72 @@ class TrackingService:
             cursor.execute('''
                 CREATE INDEX IF NOT EXISTS idx_email ON sent_emails(email)
             ''')
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_sent_at ON sent_emails(sent_at)
+            ''')
+
+            # Everyone ever sent to, per campaign ('' when sent outside one)
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS contacted (
+                    email TEXT NOT NULL,
+                    campaign_id TEXT NOT NULL,
+                    PRIMARY KEY (email, campaign_id)
+                ) WITHOUT ROWID
+            ''')
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = 'sent_emails_contacted'")
+            if cursor.fetchone() is None:
+                cursor.execute('''
+                    INSERT OR IGNORE INTO contacted (email, campaign_id)
+                    SELECT DISTINCT email, COALESCE(campaign_id, '') FROM sent_emails WHERE status = 'sent'
+                ''')
+            cursor.execute('''
+                CREATE TRIGGER IF NOT EXISTS sent_emails_contacted AFTER INSERT ON sent_emails
+                WHEN NEW.status = 'sent'
+                BEGIN
+                    INSERT OR IGNORE INTO contacted (email, campaign_id)
+                    VALUES (NEW.email, COALESCE(NEW.campaign_id, ''));
+                END
+            ''')
+
+            # Aggregates maintained by the trigger below
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS email_stats (
+                    campaign_id TEXT NOT NULL,
+                    day TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    domain TEXT NOT NULL,
+                    count INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (campaign_id, day, status, domain)
+                )
+            ''')
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_email_stats_day ON email_stats(day)
+            ''')
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS email_totals (
+                    status TEXT PRIMARY KEY,
+                    count INTEGER NOT NULL DEFAULT 0
+                )
+            ''')
+
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = 'sent_emails_stats'")
+            backfill = cursor.fetchone() is None
+            cursor.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS sent_emails_stats AFTER INSERT ON sent_emails
+                BEGIN
+                    INSERT INTO email_stats (campaign_id, day, status, domain, count)
+                    VALUES ({self._stats_key('NEW.')}, 1)
+                    ON CONFLICT (campaign_id, day, status, domain) DO UPDATE SET count = count + 1;
+                    INSERT INTO email_totals (status, count)
+                    VALUES (COALESCE(NEW.status, 'unknown'), 1)
+                    ON CONFLICT (status) DO UPDATE SET count = count + 1;
+                END
+            ''')
+            conn.commit()
+
+            # History logged before the trigger existed
+            if backfill:
+                self._rebuild_stats(conn)
             
             conn.commit()
             conn.close()
@@ -56,18 +152,18 @@ class TrackingService:
             bool: True if already sent, False otherwise
         """
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect()
             cursor = conn.cursor()
             
             if campaign_id:
                 cursor.execute(
-                    "SELECT 1 FROM sent_emails WHERE email = ? AND campaign_id = ? AND status = 'sent'", 
+                    "SELECT 1 FROM contacted WHERE email = ? AND campaign_id = ?", 
                     (email.lower(), campaign_id)
                 )
             else:
                 # Global check - if sent at all (user's request: "No repeats")
                 cursor.execute(
-                    "SELECT 1 FROM sent_emails WHERE email = ? AND status = 'sent'", 
+                    "SELECT 1 FROM contacted WHERE email = ? LIMIT 1", 
                     (email.lower(),)
                 )
                 
@@ -81,43 +177,164 @@ class TrackingService:
     def log_email(self, email, status='sent', subject=None, campaign_id=None):
         """
         Log an email attempt
-        
+
+        A 'sent' row is also the dedup record for later campaigns, so a write
+        that still finds the database locked after a few attempts raises
+        instead of being dropped.
+
         Args:
             email (str): Email address
             status (str): Status of sending (sent/failed)
             subject (str): Email subject
             campaign_id (str): Campaign identifier
+
+        Raises:
+            sqlite3.Error: If the row could not be written
+        """
+        for attempt in range(1, LOG_ATTEMPTS + 1):
+            try:
+                conn = self._connect()
+                try:
+                    conn.execute(
+                        '''
+                        INSERT INTO sent_emails (email, status, subject, campaign_id, sent_at)
+                        VALUES (?, ?, ?, ?, ?)
+                        ''',
+                        (email.lower(), status, subject, campaign_id, datetime.now())
+                    )
+                    conn.commit()
+                finally:
+                    conn.close()
+                return
+            except sqlite3.OperationalError as e:
+                if 'locked' not in str(e) or attempt == LOG_ATTEMPTS:
+                    logging.error(f"Error logging email: {e}")
+                    raise
+                logging.warning(f"tracking.db is locked, retrying log of {email} ({attempt}/{LOG_ATTEMPTS})")
+                time.sleep(attempt)
+
+    @staticmethod
+    def _stats_key(prefix=''):
+        """SQL for the (campaign_id, day, status, domain) of a sent_emails row"""
+        return (f"COALESCE({prefix}campaign_id, ''), "
+                f"COALESCE(date({prefix}sent_at), 'unknown'), "
+                f"COALESCE({prefix}status, 'unknown'), "
+                f"lower(substr({prefix}email, instr({prefix}email, '@') + 1))")
+
+    def _rebuild_stats(self, conn, archives=()):
+        """Recompute the aggregate tables from sent_emails in one transaction"""
+        upsert = '''
+            INSERT INTO email_stats (campaign_id, day, status, domain, count) VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (campaign_id, day, status, domain) DO UPDATE SET count = count + excluded.count
+        '''
+        grouped = f"SELECT {self._stats_key()}, COUNT(*) FROM sent_emails GROUP BY 1, 2, 3, 4"
+        with conn:
+            conn.execute("DELETE FROM email_stats")
+            conn.execute("DELETE FROM email_totals")
+            conn.executemany(upsert, conn.execute(grouped).fetchall())
+            for path in archives:
+                archive = sqlite3.connect(path)
+                try:
+                    conn.executemany(upsert, archive.execute(grouped).fetchall())
+                finally:
+                    archive.close()
+            conn.execute('''
+                INSERT INTO email_totals (status, count)
+                SELECT status, SUM(count) FROM email_stats GROUP BY status
+            ''')
+
+    def rebuild_stats(self, archives=()):
+        """
+        Recompute the aggregates from the full log
+
+        Needed only if sent_emails was edited by hand; the trigger keeps the
+        aggregates current otherwise.
+
+        Args:
+            archives (iterable): Archive database paths whose rows count too
+                (TrackingArchiver.archive_paths()); rows moved out of the hot
+                table are otherwise dropped from the statistics
+
+        Returns:
+            int: Number of logged attempts counted
         """
+        conn = self._connect()
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute(
-                '''
-                INSERT INTO sent_emails (email, status, subject, campaign_id, sent_at)
-                VALUES (?, ?, ?, ?, ?)
-                ''',
-                (email.lower(), status, subject, campaign_id, datetime.now())
-            )
-            
-            conn.commit()
+            self._rebuild_stats(conn, archives)
+            return conn.execute("SELECT COALESCE(SUM(count), 0) FROM email_totals").fetchone()[0]
+        finally:
             conn.close()
-        except Exception as e:
-            logging.error(f"Error logging email: {e}")
 
     def get_stats(self):
-        """Get simple stats"""
+        """Totals per status, read from the aggregates"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect()
             cursor = conn.cursor()
             
-            cursor.execute("SELECT COUNT(*) FROM sent_emails WHERE status = 'sent'")
-            total_sent = cursor.fetchone()[0]
+            cursor.execute("SELECT status, count FROM email_totals")
+            by_status = dict(cursor.fetchall())
             
             conn.close()
-            return {'total_unique_sent': total_sent}
-        except Exception:
-            return {'total_unique_sent': 0}
+            return {
+                'total_unique_sent': by_status.get('sent', 0),
+                'total_attempts': sum(by_status.values()),
+                'by_status': by_status
+            }
+        except Exception as e:
+            logging.error(f"Error reading stats: {e}")
+            return {'total_unique_sent': 0, 'total_attempts': 0, 'by_status': {}}
+
+    def get_breakdown(self, group_by=('day', 'status'), campaign_id=None,
+                      since=None, until=None, limit=None):
+        """
+        Counts grouped by any of campaign, day, status and domain
+
+        Args:
+            group_by (iterable): Dimensions to group by, in output order
+            campaign_id (str, optional): Only this campaign
+            since (str, optional): First day, 'YYYY-MM-DD'
+            until (str, optional): Last day, 'YYYY-MM-DD'
+            limit (int, optional): Keep only the largest groups
+
+        Returns:
+            list: Dicts with the grouped dimensions and 'count'
+
+        Raises:
+            ValueError: If a dimension is unknown
+        """
+        columns = {'campaign': 'campaign_id', 'day': 'day', 'status': 'status', 'domain': 'domain'}
+        group_by = list(group_by)
+        unknown = [g for g in group_by if g not in columns]
+        if unknown:
+            raise ValueError(f"Unknown stats dimension(s): {', '.join(unknown)}")
+
+        conditions, params = [], []
+        if campaign_id is not None:
+            conditions.append('campaign_id = ?')
+            params.append(campaign_id)
+        if since:
+            conditions.append('day >= ?')
+            params.append(since)
+        if until:
+            conditions.append('day <= ?')
+            params.append(until)
+
+        selected = ', '.join(columns[g] for g in group_by)
+        query = f"SELECT {selected + ', ' if selected else ''}SUM(count) AS total FROM email_stats"
+        if conditions:
+            query += ' WHERE ' + ' AND '.join(conditions)
+        if selected:
+            query += f' GROUP BY {selected}'
+        query += ' ORDER BY ' + ('total DESC' if limit else (selected or 'total'))
+        if limit:
+            query += f' LIMIT {int(limit)}'
+
+        conn = self._connect()
+        try:
+            rows = conn.execute(query, params).fetchall()
+        finally:
+            conn.close()
+        return [dict(zip(group_by + ['count'], row)) for row in rows if row[-1] is not None]
 
 # Singleton
 _tracking_service = None
@@ -0,0 +1,183 @@
+"""
+Upload Retention - keeps the upload folder under a disk quota
+
+Nothing else deletes uploads. The retention manager runs on a background
+timer. It adds up the size of every file in the upload folder (content-hashed
+store files as well as legacy timestamped ones) and, while the total is over
+the quota, removes the least recently used file. Last use is the later of
+the store's recorded access and the file's mtime.
+
+A file is never evicted while it is protected:
+- it is referenced by a queued, running or resumable campaign, or
+- it was used within the grace period (e.g. uploaded, but the campaign
+  has not been started yet).
+
+Every eviction is recorded in the upload store's `upload_evictions` table.
+"""
+
+import os
+import threading
+import time
+from datetime import datetime
+
+# Half-written uploads older than this are removed
+STALE_TEMP_SECONDS = 3600
+
+
+class UploadRetentionManager:
+    """LRU eviction of uploads beyond a size quota"""
+
+    def __init__(self, root, quota_bytes, store, campaign_service, interval=600, grace_seconds=3600):
+        """
+        Args:
+            root (str): Upload folder
+            quota_bytes (int): Maximum total size of the folder; 0 disables eviction
+            store (UploadStore): Access times and eviction log
+            campaign_service (CampaignService): Source of files still in use
+            interval (float): Seconds between background passes
+            grace_seconds (float): Files used this recently are never evicted
+        """
+        self.root = root
+        self.quota_bytes = quota_bytes
+        self.store = store
+        self.campaign_service = campaign_service
+        self.interval = interval
+        self.grace_seconds = grace_seconds
+        self._timer = None
+        self._lock = threading.Lock()
+        self._run_lock = threading.Lock()
+
+    def _scan(self):
+        """Files in the upload folder with their size and last use"""
+        accessed = self.store.last_access_times()
+        files = []
+        for entry in os.scandir(self.root):
+            if not entry.is_file() or entry.name.endswith('.db'):
+                continue
+            path = os.path.abspath(entry.path)
+            stat = entry.stat()
+            last_used = stat.st_mtime
+            if path in accessed:
+                last_used = max(last_used, accessed[path].timestamp())
+            files.append({'path': path, 'name': entry.name, 'size': stat.st_size, 'last_used': last_used})
+        return files
+
+    def usage(self):
+        """
+        Current size of the upload folder
+
+        Returns:
+            dict: files, bytes, quota_bytes
+        """
+        files = [f for f in self._scan() if not f['name'].startswith('.upload-')]
+        return {
+            'files': len(files),
+            'bytes': sum(f['size'] for f in files),
+            'quota_bytes': self.quota_bytes
+        }
+
+    def _remove(self, record, reason):
+        try:
+            os.remove(record['path'])
+        except FileNotFoundError:
+            pass
+        self.store.record_eviction(record['path'], record['size'],
+                                   datetime.fromtimestamp(record['last_used']), reason)
+
+    def enforce(self):
+        """
+        Run one retention pass
+
+        Returns:
+            dict: Usage before and after, and the files removed
+        """
+        with self._run_lock:
+            now = time.time()
+            files = self._scan()
+
+            removed = []
+            for record in [f for f in files if f['name'].startswith('.upload-')]:
+                files.remove(record)
+                if now - record['last_used'] > STALE_TEMP_SECONDS:
+                    self._remove(record, 'stale_temp')
+                    removed.append(record)
+
+            total = sum(f['size'] for f in files)
+            report = {'bytes_before': total, 'quota_bytes': self.quota_bytes, 'evicted': []}
+            if self.quota_bytes and total > self.quota_bytes:
+                protected = self.campaign_service.referenced_files()
+                candidates = sorted(
+                    (f for f in files
+                     if f['path'] not in protected and now - f['last_used'] > self.grace_seconds),
+                    key=lambda f: f['last_used']
+                )
+                for record in candidates:
+                    if total <= self.quota_bytes:
+                        break
+                    try:
+                        self._remove(record, 'quota')
+                    except Exception as e:
+                        print(f"Could not evict upload {record['name']}: {e}")
+                        continue
+                    total -= record['size']
+                    report['evicted'].append(record['name'])
+                if total > self.quota_bytes:
+                    print(f"Upload folder still over quota ({total} > {self.quota_bytes} bytes): "
+                          f"remaining files are in use")
+
+            report['bytes_after'] = total
+            report['stale_temp_removed'] = len(removed)
+            if report['evicted']:
+                print(f"Upload retention evicted {len(report['evicted'])} file(s), "
+                      f"{report['bytes_before'] - total} bytes freed")
+            return report
+
+    def _tick(self):
+        try:
+            self.enforce()
+        except Exception as e:
+            print(f"Upload retention pass failed: {e}")
+        finally:
+            self._schedule()
+
+    def _schedule(self):
+        self._timer = threading.Timer(self.interval, self._tick)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def start(self):
+        """Start the background retention timer (idempotent)"""
+        with self._lock:
+            if self._timer is None:
+                self._schedule()
+
+    def stop(self):
+        """Stop the background retention timer"""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+
+# Singleton instance
+_retention_manager = None
+_retention_manager_lock = threading.Lock()
+
+def get_upload_retention(root=None):
+    """Get or create the retention manager for the upload folder"""
+    global _retention_manager
+    if _retention_manager is None:
+        with _retention_manager_lock:
+            if _retention_manager is None:
+                from services.upload_store import get_upload_store
+                from services.campaign_service import get_campaign_service
+                root = root or os.getenv('UPLOAD_FOLDER', 'uploads')
+                _retention_manager = UploadRetentionManager(
+                    root,
+                    quota_bytes=int(float(os.getenv('UPLOAD_QUOTA_MB', 500)) * 1024 * 1024),
+                    store=get_upload_store(root),
+                    campaign_service=get_campaign_service(),
+                    interval=float(os.getenv('UPLOAD_RETENTION_INTERVAL', 600)),
+                    grace_seconds=float(os.getenv('UPLOAD_RETENTION_GRACE', 3600))
+                )
+    return _retention_manager
@@ -0,0 +1,304 @@
+"""
+Upload Store - content-addressed storage for uploaded resumes and lists
+
+Every upload is streamed to disk in chunks while it is hashed (SHA-256),
+then stored once as `<hash>.<ext>` in the upload folder. Uploading the same
+file again, under any name, reuses the stored copy. The original file names
+are kept as aliases in SQLite. Because the path is derived from the content,
+anything keyed on the path (PDF extraction, parsing) is keyed on content too.
+"""
+
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import uuid
+import logging
+from datetime import datetime
+
+from werkzeug.utils import secure_filename
+
+CHUNK_SIZE = 1024 * 1024
+# Seconds between recorded accesses of the same file
+TOUCH_INTERVAL = 60
+HASH_NAME_RE = re.compile(r'^[0-9a-f]{64}$')
+
+
+def content_hash_for_path(path):
+    """
+    Content hash of a stored upload, read from its file name
+
+    Args:
+        path (str): Path to a file
+
+    Returns:
+        str: The SHA-256 hex digest, or None if the path is not in the store
+    """
+    stem = os.path.splitext(os.path.basename(path or ''))[0]
+    return stem if HASH_NAME_RE.match(stem) else None
+
+
+class UploadStore:
+    """Deduplicating upload storage with name aliases"""
+
+    DB_NAME = 'uploads.db'
+
+    def __init__(self, root, db_path=None):
+        """
+        Args:
+            root (str): Upload folder
+            db_path (str, optional): SQLite file holding upload metadata
+        """
+        self.root = root
+        self.db_path = db_path or os.path.join(os.path.dirname(os.path.dirname(__file__)), self.DB_NAME)
+        self._touched = {}
+        os.makedirs(root, exist_ok=True)
+        self._init_db()
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def _init_db(self):
+        """Initialize database with required tables"""
+        try:
+            conn = self._connect()
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS uploads (
+                    content_hash TEXT PRIMARY KEY,
+                    path TEXT NOT NULL,
+                    ext TEXT,
+                    size INTEGER,
+                    created_at TIMESTAMP,
+                    last_access TIMESTAMP
+                )
+            ''')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS upload_aliases (
+                    content_hash TEXT NOT NULL,
+                    original_name TEXT NOT NULL,
+                    uploaded_at TIMESTAMP,
+                    PRIMARY KEY (content_hash, original_name)
+                )
+            ''')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS upload_evictions (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    path TEXT NOT NULL,
+                    content_hash TEXT,
+                    size INTEGER,
+                    last_access TIMESTAMP,
+                    reason TEXT,
+                    evicted_at TIMESTAMP
+                )
+            ''')
+            conn.commit()
+            conn.close()
+        except Exception as e:
+            logging.error(f"Upload database initialization error: {e}")
+
+    def save(self, file):
+        """
+        Stream an uploaded file into the store
+
+        Args:
+            file: File object from request (werkzeug FileStorage)
+
+        Returns:
+            dict: content_hash, path, filename (original, sanitized), size,
+            and deduplicated (True if the content was already stored)
+        """
+        filename = secure_filename(file.filename) or 'upload'
+        ext = os.path.splitext(filename)[1].lower()
+
+        digest = hashlib.sha256()
+        size = 0
+        temp_path = os.path.join(self.root, f'.upload-{uuid.uuid4().hex}.tmp')
+        try:
+            with open(temp_path, 'wb') as out:
+                while True:
+                    chunk = file.stream.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    digest.update(chunk)
+                    out.write(chunk)
+                    size += len(chunk)
+
+            content_hash = digest.hexdigest()
+            path = os.path.join(self.root, f'{content_hash}{ext}')
+            deduplicated = os.path.exists(path)
+            if deduplicated:
+                os.remove(temp_path)
+            else:
+                os.replace(temp_path, path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+        now = datetime.now()
+        conn = self._connect()
+        try:
+            conn.execute(
+                '''
+                INSERT INTO uploads (content_hash, path, ext, size, created_at, last_access)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(content_hash) DO UPDATE SET path = excluded.path,
+                                                        last_access = excluded.last_access
+                ''',
+                (content_hash, path, ext, size, now, now)
+            )
+            conn.execute(
+                '''
+                INSERT INTO upload_aliases (content_hash, original_name, uploaded_at) VALUES (?, ?, ?)
+                ON CONFLICT(content_hash, original_name) DO UPDATE SET uploaded_at = excluded.uploaded_at
+                ''',
+                (content_hash, filename, now)
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+        return {
+            'content_hash': content_hash,
+            'path': path,
+            'filename': filename,
+            'size': size,
+            'deduplicated': deduplicated
+        }
+
+    def get(self, content_hash):
+        """
+        Look up a stored upload
+
+        Args:
+            content_hash (str): SHA-256 hex digest
+
+        Returns:
+            dict: Upload record with its aliases, or None if unknown
+        """
+        conn = self._connect()
+        conn.row_factory = sqlite3.Row
+        try:
+            row = conn.execute("SELECT * FROM uploads WHERE content_hash = ?", (content_hash,)).fetchone()
+            if row is None:
+                return None
+            aliases = [r['original_name'] for r in conn.execute(
+                "SELECT original_name FROM upload_aliases WHERE content_hash = ? ORDER BY uploaded_at DESC",
+                (content_hash,)
+            )]
+        finally:
+            conn.close()
+        record = dict(row)
+        record['aliases'] = aliases
+        return record
+
+    def touch(self, path):
+        """
+        Record that a stored upload was read (drives LRU retention)
+
+        Args:
+            path (str): Path of a stored upload; other paths are ignored
+        """
+        content_hash = content_hash_for_path(path)
+        if content_hash is None:
+            return
+        now = datetime.now()
+        last = self._touched.get(content_hash)
+        if last and (now - last).total_seconds() < TOUCH_INTERVAL:
+            return
+        self._touched[content_hash] = now
+        try:
+            conn = self._connect()
+            conn.execute("UPDATE uploads SET last_access = ? WHERE content_hash = ?", (now, content_hash))
+            conn.commit()
+            conn.close()
+        except Exception as e:
+            logging.error(f"Error recording upload access: {e}")
+
+    def last_access_times(self):
+        """Last recorded access per stored file, keyed by absolute path"""
+        conn = self._connect()
+        try:
+            rows = conn.execute("SELECT path, last_access FROM uploads").fetchall()
+        finally:
+            conn.close()
+        return {os.path.abspath(path): datetime.fromisoformat(last_access)
+                for path, last_access in rows if last_access}
+
+    def record_eviction(self, path, size=None, last_access=None, reason='quota'):
+        """
+        Drop a deleted file's metadata and log the eviction
+
+        Args:
+            path (str): Path of the removed file
+            size (int, optional): Its size in bytes
+            last_access (datetime, optional): When it was last used
+            reason (str): Why it was removed
+        """
+        content_hash = content_hash_for_path(path)
+        conn = self._connect()
+        try:
+            if content_hash:
+                conn.execute("DELETE FROM uploads WHERE content_hash = ?", (content_hash,))
+                conn.execute("DELETE FROM upload_aliases WHERE content_hash = ?", (content_hash,))
+                self._touched.pop(content_hash, None)
+            conn.execute(
+                '''
+                INSERT INTO upload_evictions (path, content_hash, size, last_access, reason, evicted_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ''',
+                (path, content_hash, size, last_access, reason, datetime.now())
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+    def get_evictions(self, limit=50):
+        """
+        Most recent evictions
+
+        Args:
+            limit (int): Maximum number of records
+
+        Returns:
+            list: Eviction records, newest first
+        """
+        conn = self._connect()
+        conn.row_factory = sqlite3.Row
+        try:
+            rows = conn.execute(
+                "SELECT * FROM upload_evictions ORDER BY id DESC LIMIT ?", (limit,)
+            ).fetchall()
+        finally:
+            conn.close()
+        return [dict(row) for row in rows]
+
+    def resolve(self, ref):
+        """
+        Turn a content hash or a path into a readable file path
+
+        Args:
+            ref (str): Content hash from an upload response, or a file path
+
+        Returns:
+            str: Path, or None if a hash is unknown
+        """
+        if ref and HASH_NAME_RE.match(ref):
+            record = self.get(ref)
+            return record['path'] if record else None
+        return ref
+
+
+# Singleton instance
+_upload_store = None
+_upload_store_lock = threading.Lock()
+
+def get_upload_store(root=None):
+    """Get or create the upload store for the upload folder"""
+    global _upload_store
+    if _upload_store is None:
+        with _upload_store_lock:
+            if _upload_store is None:
+                _upload_store = UploadStore(root or os.getenv('UPLOAD_FOLDER', 'uploads'))
+    return _upload_store
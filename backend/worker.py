@@ -0,0 +1,97 @@
+"""
+Campaign Worker - runs queued email campaigns outside the web process
+
+Start the web tier with CAMPAIGN_RUNNER=external so `/send_emails` only
+queues campaigns, then run one or more workers:
+
+    python worker.py                  # poll for queued campaigns forever
+    python worker.py --once           # drain the queue, then exit
+    python worker.py --concurrency 2  # run up to two campaigns at a time
+
+Workers and the web tier share state through campaigns.db: workers claim
+queued campaigns atomically, heartbeat while running, and write progress and
+logs that `/progress` serves.
+"""
+
+import argparse
+import os
+import socket
+import sys
+import threading
+
+# Add backend to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from config import Config
+from services.campaign_service import get_campaign_service
+from services.campaign_runner import CampaignRunner
+from services.campaign_scheduler import get_campaign_scheduler
+
+
+def load_settings():
+    """Collect runner settings from Config"""
+    return {key: getattr(Config, key) for key in dir(Config) if key.isupper()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run queued email campaigns')
+    parser.add_argument('--once', action='store_true', help='Exit when the queue is empty')
+    parser.add_argument('--concurrency', type=int, default=1, help='Campaigns to run at once')
+    parser.add_argument('--poll-interval', type=float, default=Config.WORKER_POLL_INTERVAL,
+                        help='Seconds between queue checks')
+    args = parser.parse_args()
+
+    settings = load_settings()
+    campaign_service = get_campaign_service()
+    worker_id = f'{socket.gethostname()}-{os.getpid()}'
+    active = {}
+
+    # Scheduled campaigns are queued again when due; wake the loop to claim them
+    wake = threading.Event()
+    scheduler = get_campaign_scheduler()
+    scheduler.start(lambda campaign_id: wake.set())
+
+    print("=" * 60)
+    print(f"📬 Campaign worker {worker_id} started (concurrency {args.concurrency})")
+    print("=" * 60)
+
+    try:
+        while True:
+            # Campaigns whose runner stopped heartbeating can be resumed
+            recovered = campaign_service.mark_interrupted(settings['CAMPAIGN_HEARTBEAT_TIMEOUT'])
+            if recovered:
+                print(f"⚠️ Flagged {recovered} stale campaign(s) as interrupted")
+
+            active = {cid: thread for cid, thread in active.items() if thread.is_alive()}
+
+            while len(active) < args.concurrency:
+                campaign_id = campaign_service.claim_campaign(worker_id)
+                if campaign_id is None:
+                    break
+
+                print(f"▶️ Running campaign {campaign_id}")
+                runner = CampaignRunner(campaign_id, settings, campaign_service, worker_id)
+                thread = threading.Thread(target=runner.run, name=f'campaign-{campaign_id}')
+                thread.daemon = True
+                thread.start()
+                active[campaign_id] = thread
+
+            if args.once and not active:
+                break
+
+            wake.wait(args.poll_interval)
+            wake.clear()
+
+    except KeyboardInterrupt:
+        # Leave our campaigns resumable instead of waiting for the heartbeat timeout
+        for campaign_id in active:
+            if campaign_service.get_status(campaign_id) == 'running':
+                campaign_service.set_status(campaign_id, 'interrupted')
+                print(f"⏸️ Campaign {campaign_id} interrupted")
+
+    scheduler.stop()
+    print("Campaign worker stopped")
+
+
+if __name__ == '__main__':
+    main()
@@ -31,6 +31,40 @@ export const generateAIEmail = async (data) => {
     return response.data;
 };
 
+// Streams the body as it is generated: onEvent(event, payload) is called for
+// 'chunk', 'fallback', 'done' and 'error' events; resolves with the 'done' payload
+export const generateAIEmailStream = async (data, onEvent) => {
+    const response = await fetch(`${API_BASE_URL}/api/ai/generate_email_ai/stream`, {
+        method: 'POST',
+        credentials: 'include',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify(data),
+    });
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    let result = null;
+
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+            const raw = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+
+            const event = (raw.match(/^event: (.*)$/m) || [])[1] || 'message';
+            const payload = JSON.parse((raw.match(/^data: (.*)$/m) || [])[1] || '{}');
+            if (event === 'done') result = payload;
+            onEvent?.(event, payload);
+        }
+    }
+    return result;
+};
+
 export const generateBatchEmails = async (data) => {
     const response = await api.post('/api/ai/generate_batch_emails', data);
     return response.data;
@@ -43,6 +77,12 @@ export const analyzeResume = async (data) => {
     return response.data;
 };
 
+export const matchJobs = async (data) => {
+    // data = { resume_file | resume_hash, job_descriptions: [text | { id, title, text }], limit }
+    const response = await api.post('/api/ai/match_jobs', data);
+    return response.data;
+};
+
 // Gmail OAuth
 export const getGmailAuthUrl = async () => {
     const response = await api.get('/api/auth/gmail/authorize');